@@ -1,21 +1,38 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
+import json
 import sys
 import os
+from datetime import datetime, date, timedelta
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from services.analytics_service import AnalyticsService
+from services.contact_stats_service import ContactStatsService
+from services.response_cache import analytics_cache
+from services.outreach_rollup_service import OutreachRollupService
+from services.cohort_service import CohortService
 
 analytics_bp = Blueprint('analytics', __name__)
 
+def cached_response(name, field, compute, **extra):
+    """
+    Serve {"success": true, **extra, field: compute()} from the shared analytics cache.
+    Sends an ETag and answers If-None-Match with 304 when nothing changed.
+    """
+    payload, etag = analytics_cache.get_or_compute(name, compute)
+    extra_fields = ''.join(f'{json.dumps(key)}: {json.dumps(value)}, ' for key, value in extra.items())
+    response = current_app.response_class(
+        f'{{"success": true, {extra_fields}"{field}": {payload}}}\n',
+        mimetype='application/json'
+    )
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
 @analytics_bp.route('/analytics/dashboard', methods=['GET'])
 def get_dashboard_analytics():
     """Get dashboard statistics"""
     try:
-        stats = AnalyticsService.get_dashboard_stats()
-        return jsonify({
-            'success': True,
-            'stats': stats
-        })
+        return cached_response('dashboard', 'stats', AnalyticsService.get_dashboard_stats)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -23,11 +40,7 @@ def get_dashboard_analytics():
 def get_industry_performance():
     """Get performance by industry"""
     try:
-        performance = AnalyticsService.get_industry_performance()
-        return jsonify({
-            'success': True,
-            'performance': performance
-        })
+        return cached_response('industry-performance', 'performance', AnalyticsService.get_industry_performance)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -35,10 +48,89 @@ def get_industry_performance():
 def get_source_performance():
     """Get performance by source (Google vs Yelp)"""
     try:
-        performance = AnalyticsService.get_source_performance()
-        return jsonify({
-            'success': True,
-            'performance': performance
-        })
+        return cached_response('source-performance', 'performance', AnalyticsService.get_source_performance)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@analytics_bp.route('/analytics/breakdown/<dimension>', methods=['GET'])
+def get_breakdown(dimension):
+    """Get performance broken down by industry, source, tier, city or job_category"""
+    if dimension not in AnalyticsService.BREAKDOWN_DIMENSIONS:
+        return jsonify({'success': False, 'error': f"Unknown dimension '{dimension}'"}), 400
+    
+    try:
+        return cached_response(f'breakdown:{dimension}', 'breakdown', lambda: AnalyticsService.get_breakdown(dimension),
+                               dimension=dimension)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
+
+@analytics_bp.route('/analytics/rollup/reconcile', methods=['POST'])
+def reconcile_rollup():
+    """Rebuild the contact_stats rollup from contacts"""
+    result = ContactStatsService.reconcile()
+    if not result['success']:
+        return jsonify(result), 500
+    return jsonify(result)
+
+@analytics_bp.route('/analytics/outreach-timeseries', methods=['GET'])
+def get_outreach_timeseries():
+    """
+    Outreach counts over time from the daily/weekly rollups.
+    Query: start, end (YYYY-MM-DD, default last 30 days), granularity (day|week),
+    group_by (outreach_type|campaign|industry|source), and any dimension as a filter
+    """
+    try:
+        end = date.fromisoformat(request.args['end']) if request.args.get('end') else datetime.utcnow().date()
+        start = date.fromisoformat(request.args['start']) if request.args.get('start') else end - timedelta(days=29)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'start and end must be YYYY-MM-DD'}), 400
+    
+    granularity = request.args.get('granularity', 'day')
+    group_by = request.args.get('group_by') or None
+    filters = {
+        dimension: request.args[dimension]
+        for dimension in OutreachRollupService.DIMENSIONS
+        if dimension in request.args
+    }
+    
+    try:
+        # Validate before caching so bad parameters get a 400
+        if granularity not in OutreachRollupService.GRANULARITIES:
+            raise ValueError(f"Unknown granularity '{granularity}'")
+        if group_by is not None and group_by not in OutreachRollupService.DIMENSIONS:
+            raise ValueError(f"Unknown dimension '{group_by}'")
+        if start > end:
+            raise ValueError("start must be on or before end")
+        if 'campaign' in filters and filters['campaign'] and not filters['campaign'].isdigit():
+            raise ValueError("campaign must be a campaign id")
+        filters = OutreachRollupService.normalize_filters(filters)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    # Keyed on the parsed parameters, so equivalent queries (defaults spelled out, other params) share an entry
+    params = [('start', start), ('end', end), ('granularity', granularity), ('group_by', group_by or '')]
+    params += sorted(filters.items())
+    name = 'outreach-timeseries:' + '&'.join(f"{key}={value}" for key, value in params)
+    try:
+        return cached_response(name, 'series', lambda: OutreachRollupService.series(start, end, granularity, group_by, filters))
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@analytics_bp.route('/analytics/cohorts/<cohort_type>', methods=['GET'])
+def get_cohort_funnels(cohort_type):
+    """Funnel counts and rates per cohort: week (of created_at), discovery (job) or tier (at import)"""
+    if cohort_type not in CohortService.COHORT_TYPES:
+        return jsonify({'success': False, 'error': f"Unknown cohort type '{cohort_type}'"}), 400
+    
+    try:
+        return cached_response(f'cohorts:{cohort_type}', 'funnels', lambda: CohortService.funnels(cohort_type))
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@analytics_bp.route('/analytics/cohorts/refresh', methods=['POST'])
+def refresh_cohorts():
+    """Materialize new cohort members and rebuild the cohort funnels"""
+    result = CohortService.refresh()
+    if not result['success']:
+        return jsonify(result), 500
+    return jsonify(result)
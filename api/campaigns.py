@@ -1,13 +1,13 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, Response
 import sys
 import os
-import io
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.connection import get_session
 from models.campaign import Campaign
 from services.campaign_service import CampaignService
+from services.campaign_dispatcher import CampaignDispatcher
 
 campaigns_bp = Blueprint('campaigns', __name__)
 
@@ -37,40 +37,75 @@ def create_campaign():
             target_industries=data.get('target_industries', []),
             target_tiers=data.get('target_tiers', []),
             target_sources=data.get('target_sources', []),
+            target_tags=data.get('target_tags', []),
             daily_limit=data.get('daily_limit', 30)
         )
         
         return jsonify(result)
-        
+    
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @campaigns_bp.route('/campaigns/<int:campaign_id>/recipients', methods=['GET'])
 def get_recipients(campaign_id):
-    """Get campaign recipients"""
+    """Get campaign recipients (page with ?limit=&after_id=)"""
     try:
-        result = CampaignService.get_campaign_recipients(campaign_id)
+        result = CampaignService.get_campaign_recipients(
+            campaign_id,
+            limit=request.args.get('limit', type=int),
+            after_id=request.args.get('after_id', type=int)
+        )
         return jsonify(result)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@campaigns_bp.route('/campaigns/schedule', methods=['GET'])
+def get_schedule():
+    """Send window and today's quota for active campaigns"""
+    try:
+        return jsonify(dict(success=True, **CampaignDispatcher.shared().schedule()))
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@campaigns_bp.route('/campaigns/dispatch', methods=['POST'])
+def dispatch_campaigns():
+    """Run a dispatcher tick now"""
+    try:
+        queued = CampaignDispatcher.shared().tick()
+        return jsonify({'success': True, 'queued': queued, 'total': sum(queued.values())})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@campaigns_bp.route('/campaigns/<int:campaign_id>/launch', methods=['POST'])
+def launch_campaign(campaign_id):
+    """Freeze the campaign's audience"""
+    try:
+        result = CampaignService.launch_campaign(campaign_id)
+        
+        if not result['success']:
+            return jsonify(result), 400
+        
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @campaigns_bp.route('/campaigns/<int:campaign_id>/preview', methods=['GET'])
 def preview_campaign(campaign_id):
-    """Generate preview CSV"""
+    """Stream preview CSV"""
     try:
-        result = CampaignService.generate_preview_csv(campaign_id)
+        result = CampaignService.stream_preview_csv(campaign_id)
         
         if not result['success']:
             return jsonify(result), 400
         
-        # Return CSV as download
-        return send_file(
-            io.BytesIO(result['csv_content'].encode()),
+        # Return CSV as a streamed download
+        return Response(
+            result['chunks'],
             mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'campaign_{campaign_id}_preview.csv'
+            headers={'Content-Disposition': f'attachment; filename=campaign_{campaign_id}_preview.csv'}
         )
-        
+    
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -89,7 +124,7 @@ def send_campaign(campaign_id):
         )
         
         return jsonify(result)
-        
+    
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -113,7 +148,7 @@ def update_campaign(campaign_id):
             'success': True,
             'campaign': campaign.to_dict()
         })
-        
+    
     except Exception as e:
         session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -133,7 +168,7 @@ def delete_campaign(campaign_id):
         session.commit()
         
         return jsonify({'success': True})
-        
+    
     except Exception as e:
         session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
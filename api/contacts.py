@@ -5,9 +5,12 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.connection import get_session
+from database.json_columns import contains_any, contains_all
 from models.contact import Contact
 from models.outreach import Outreach
 from models.note import Note
+from services.campaign_service import CampaignService
+from services.suppression_list import suppression_list
 from sqlalchemy import or_, func
 
 contacts_bp = Blueprint('contacts', __name__)
@@ -33,6 +36,13 @@ def get_contacts():
         if request.args.get('source'):
             query = query.filter(Contact.source == request.args.get('source'))
         
+        # ?tags=a,b matches contacts with any of the tags; add tags_match=all to require every one
+        if request.args.get('tags'):
+            tags = [tag.strip() for tag in request.args.get('tags').split(',') if tag.strip()]
+            if tags:
+                match = contains_all if request.args.get('tags_match') == 'all' else contains_any
+                query = query.filter(match(Contact.tags, tags))
+        
         if request.args.get('search'):
             search = f"%{request.args.get('search')}%"
             query = query.filter(or_(
@@ -128,11 +138,19 @@ def update_contact(contact_id):
             return jsonify({'success': False, 'error': 'Contact not found'}), 404
         
         data = request.json
+        had_replied = contact.has_replied
+        previous_status = contact.status
         
         for key, value in data.items():
             if hasattr(contact, key):
                 setattr(contact, key, value)
         
+        if contact.has_replied and not had_replied:
+            CampaignService.mark_replied(session, [contact.id])
+        
+        if contact.status == 'Not Interested' and previous_status != 'Not Interested' and contact.email:
+            suppression_list.add(session, [contact.email], reason='not_interested', source='contact')
+        
         session.commit()
         
         return jsonify({
@@ -1,25 +1,37 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy import select
 import sys
 import os
+import uuid
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from services.email_service import EmailService
 from database.connection import get_session
 from models.contact import Contact
 from models.outreach import Outreach
+from models.outbox_message import OutboxMessage
+from services.email_outbox import EmailOutbox, OutboxSender
+from services.email_events import EmailEventService, EmailEventBuffer
+from services.suppression_list import suppression_list
+from config import EMAIL_WEBHOOK_SECRET
 
 email_bp = Blueprint('email', __name__)
 email_service = EmailService()
 
 @email_bp.route('/email/send', methods=['POST'])
 def send_email():
-    """Send email to contacts"""
+    """
+    Queue an email to contacts and return immediately; the outbox workers deliver it
+    and log the touch on each contact.
+    Body may include idempotency_key so a retried request doesn't queue the emails twice.
+    """
     data = request.json
     
     contact_ids = data.get('contact_ids', [])
     subject = data.get('subject')
     body_html = data.get('body_html')
     body_text = data.get('body_text')
+    request_key = data.get('idempotency_key') or uuid.uuid4().hex
     
     if not contact_ids or not subject or not body_html:
         return jsonify({'success': False, 'error': 'Missing required fields'}), 400
@@ -28,54 +40,102 @@ def send_email():
     try:
         contacts = session.query(Contact).filter(Contact.id.in_(contact_ids)).all()
         
-        # Filter contacts with valid emails
-        recipients = []
-        for contact in contacts:
-            if contact.email and '@' in contact.email:
-                recipients.append({
-                    'email': contact.email,
-                    'name': contact.name,
-                    'company': contact.company
-                })
+        # Filter contacts with valid, unsuppressed emails
+        recipients = [contact for contact in contacts if contact.email and '@' in contact.email]
+        blocked = suppression_list.suppressed(session, [contact.email for contact in recipients])
+        recipients = [contact for contact in recipients if contact.email not in blocked]
         
         if not recipients:
-            return jsonify({'success': False, 'error': 'No valid email addresses found'}), 400
+            return jsonify({'success': False, 'error': 'No valid email addresses found', 'suppressed': len(blocked)}), 400
         
-        # Send emails
-        results = email_service.send_bulk_emails(recipients, subject, body_html, body_text)
+        # Queue emails, skipping contacts this request already queued (a retried request)
+        keys = {contact.id: f"email:{request_key}:contact:{contact.id}" for contact in recipients}
+        already_queued = set(session.scalars(
+            select(OutboxMessage.idempotency_key).where(OutboxMessage.idempotency_key.in_(keys.values()))
+        ))
+        new_recipients = [contact for contact in recipients if keys[contact.id] not in already_queued]
         
-        # Record outreach
-        for recipient in recipients:
-            contact = next((c for c in contacts if c.email == recipient['email']), None)
-            if contact:
-                outreach = Outreach(
-                    contact_id=contact.id,
-                    outreach_type='email',
-                    subject=subject,
-                    message=body_html
-                )
-                session.add(outreach)
-                
-                contact.total_touches = (contact.total_touches or 0) + 1
-                if contact.status == 'Lead':
-                    contact.status = 'Contacted'
+        queued = EmailOutbox.enqueue(session, [
+            EmailOutbox.message(keys[contact.id], contact.email, subject, body_html, body_text, contact_id=contact.id)
+            for contact in new_recipients
+        ])
         
+        # Outreach and touches are recorded by the sender once each email is delivered
         session.commit()
+        OutboxSender.wake()
         
         return jsonify({
             'success': True,
-            'results': results
-        })
-        
+            'idempotency_key': request_key,
+            'results': {
+                'total': len(recipients),
+                'queued': queued,
+                'duplicates': len(recipients) - queued,
+                'suppressed': len(blocked)
+            }
+        }), 202
+    
     except Exception as e:
         session.rollback()
-        print(f"Error sending emails: {str(e)}", flush=True)
+        print(f"Error queueing emails: {str(e)}", flush=True)
         import traceback
         traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)}), 500
     finally:
         session.close()
 
+@email_bp.route('/email/outbox', methods=['GET'])
+def get_outbox_summary():
+    """Queued/sending/sent/failed counts, optionally for ?campaign_id="""
+    campaign_id = request.args.get('campaign_id', type=int)
+    return jsonify({'success': True, 'counts': EmailOutbox.summary(campaign_id)})
+
+@email_bp.route('/email/outbox/<int:message_id>', methods=['GET'])
+def get_outbox_message(message_id):
+    """Delivery status of one queued email"""
+    session = get_session()
+    try:
+        message = session.query(OutboxMessage).filter(OutboxMessage.id == message_id).first()
+        if not message:
+            return jsonify({'success': False, 'error': 'Message not found'}), 404
+        return jsonify({'success': True, 'message': message.to_dict()})
+    finally:
+        session.close()
+
+@email_bp.route('/email/events', methods=['POST'])
+def ingest_email_events():
+    """
+    Provider webhook for delivered/opened/bounced/complained/replied events.
+    Takes one event, a list, or {'events': [...]}; events are buffered and written in batches.
+    Disabled until EMAIL_WEBHOOK_SECRET is set.
+    """
+    if not EMAIL_WEBHOOK_SECRET:
+        return jsonify({'success': False, 'error': 'Email webhook is not configured'}), 503
+    if not EmailEventService.verify_signature(request.headers, request.get_data(as_text=True)):
+        return jsonify({'success': False, 'error': 'Invalid signature'}), 401
+    
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return jsonify({'success': False, 'error': 'Expected a JSON body'}), 400
+    
+    if isinstance(payload, dict):
+        payloads = payload['events'] if isinstance(payload.get('events'), list) else [payload]
+    else:
+        payloads = payload
+    
+    # A single Resend event carries its id in the svix-id header
+    delivery_id = request.headers.get('svix-id') if len(payloads) == 1 else None
+    events = [event for event in (EmailEventService.normalize(item, delivery_id) for item in payloads) if event]
+    EmailEventBuffer.shared().add(events)
+    
+    return jsonify({'success': True, 'accepted': len(events), 'ignored': len(payloads) - len(events)}), 202
+
+@email_bp.route('/email/events/flush', methods=['POST'])
+def flush_email_events():
+    """Write buffered events now"""
+    result = EmailEventBuffer.shared().flush()
+    return jsonify(result), (200 if result['success'] else 500)
+
 @email_bp.route('/email/log-touch', methods=['POST'])
 def log_touch():
     """Manually log an outreach touch"""
@@ -104,7 +164,7 @@ def log_touch():
         
         session.commit()
         return jsonify({'success': True})
-        
+    
     except Exception as e:
         session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
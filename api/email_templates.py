@@ -6,6 +6,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.connection import get_session
 from models.email_template import EmailTemplate
+from services.template_engine import compile_template, TemplateError
 
 templates_bp = Blueprint('email_templates', __name__)
 
@@ -29,6 +30,12 @@ def create_template():
     try:
         data = request.json
         
+        try:
+            compile_template(data['subject_line'])
+            compile_template(data['body'])
+        except TemplateError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
         template = EmailTemplate(
             name=data['name'],
             subject_line=data['subject_line'],
@@ -60,6 +67,13 @@ def update_template(template_id):
             return jsonify({'success': False, 'error': 'Template not found'}), 404
         
         data = request.json
+        
+        try:
+            compile_template(data.get('subject_line', template.subject_line))
+            compile_template(data.get('body', template.body))
+        except TemplateError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
         template.name = data.get('name', template.name)
         template.subject_line = data.get('subject_line', template.subject_line)
         template.body = data.get('body', template.body)
@@ -1,12 +1,18 @@
 from flask import Blueprint, request, jsonify
+from datetime import datetime
+import json
 import sys
 import os
+import threading
+import uuid
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.connection import get_session
 from models.lead_discovery import LeadDiscovery
+from models.rescore_job import RescoreJob
 from services.lead_discovery_service import LeadDiscoveryService
+from services.batch_scorer import BatchScorer
 from config import GOOGLE_PLACES_API_KEY, YELP_API_KEY
 
 lead_discovery_bp = Blueprint('lead_discovery', __name__)
@@ -19,9 +25,18 @@ def update_job_progress(job_id, message, step=None, total=None):
         'message': message,
         'step': step,
         'total': total,
-        'timestamp': __import__('datetime').datetime.utcnow().isoformat()
+        'timestamp': datetime.utcnow().isoformat()
     }
 
+def save_rescore_job(job_id, **values):
+    """Write a rescore job's state to the database, where every worker can read it"""
+    session = get_session()
+    try:
+        session.query(RescoreJob).filter(RescoreJob.id == job_id).update(values)
+        session.commit()
+    finally:
+        session.close()
+
 @lead_discovery_bp.route('/lead-discovery/jobs', methods=['GET'])
 def get_jobs():
     """Get all discovery jobs"""
@@ -68,7 +83,7 @@ def create_job():
             'success': True,
             'job': job
         }), 201
-        
+    
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -87,7 +102,7 @@ def run_job(job_id):
             del job_progress[job_id]
         
         return jsonify(result)
-        
+    
     except Exception as e:
         print(f"❌ ERROR in run_job API: {str(e)}", flush=True)
         import traceback
@@ -117,7 +132,7 @@ def delete_job(job_id):
         print(f"🗑️  Deleted job: {job.job_name} (was: {job.status})", flush=True)
         
         return jsonify({'success': True})
-        
+    
     except Exception as e:
         session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -128,13 +143,15 @@ def delete_job(job_id):
 def enrich_leads():
     """Bulk enrich unenriched leads"""
     try:
-        batch_size = request.json.get('batch_size', 10) if request.json else 10
+        data = request.json or {}
+        batch_size = data.get('batch_size', 10)
+        concurrent = data.get('concurrent', True)
         
         service = LeadDiscoveryService()
-        result = service.bulk_enrich(batch_size)
+        result = service.bulk_enrich(batch_size, concurrent=concurrent)
         
         return jsonify(result)
-        
+    
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -151,6 +168,68 @@ def import_lead():
             'success': result['imported'],
             'result': result
         })
-        
+    
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
+
+@lead_discovery_bp.route('/lead-discovery/rescore', methods=['POST'])
+def start_rescore():
+    """
+    Start a background job that re-tiers enriched contacts with the active scoring rules.
+    Body: {"only_stale": true} skips contacts already scored under the active rule set version
+    """
+    data = request.get_json(silent=True) or {}
+    only_stale = bool(data.get('only_stale', False))
+    job_id = uuid.uuid4().hex[:12]
+    
+    session = get_session()
+    try:
+        job = RescoreJob(id=job_id, status='running', only_stale=1 if only_stale else 0)
+        session.add(job)
+        session.commit()
+        job_data = job.to_dict()
+    finally:
+        session.close()
+    
+    def update_rescore_progress(message, step=None, total=None):
+        save_rescore_job(job_id, progress=json.dumps({
+            'message': message,
+            'step': step,
+            'total': total,
+            'timestamp': datetime.utcnow().isoformat()
+        }))
+    
+    def run():
+        try:
+            result = BatchScorer(progress_callback=update_rescore_progress).rescore_all(only_stale=only_stale)
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        save_rescore_job(
+            job_id,
+            result=json.dumps(result, default=str),
+            status='completed' if result['success'] else 'failed',
+            completed_at=datetime.utcnow()
+        )
+    
+    threading.Thread(target=run, daemon=True).start()
+    
+    return jsonify({
+        'success': True,
+        'job': job_data
+    }), 202
+
+@lead_discovery_bp.route('/lead-discovery/rescore/<job_id>', methods=['GET'])
+def get_rescore_job(job_id):
+    """Get status of a rescore job"""
+    session = get_session()
+    try:
+        job = session.query(RescoreJob).filter(RescoreJob.id == job_id).first()
+        if not job:
+            return jsonify({'success': False, 'error': 'Job not found'}), 404
+        
+        return jsonify({
+            'success': True,
+            'job': job.to_dict()
+        })
+    finally:
+        session.close()
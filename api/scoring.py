@@ -0,0 +1,54 @@
+from flask import Blueprint, request, jsonify
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import get_session
+from models.scoring_rule_set import ScoringRuleSet
+from services.rules_engine import RulesEngine, DEFAULT_SCORING_RULES
+
+scoring_bp = Blueprint('scoring', __name__)
+
+@scoring_bp.route('/scoring/rules', methods=['GET'])
+def get_rules():
+    """Get the active scoring rule set and all stored versions"""
+    session = get_session()
+    try:
+        versions = session.query(ScoringRuleSet).order_by(ScoringRuleSet.id.desc()).all()
+        active = RulesEngine.active()
+        return jsonify({
+            'success': True,
+            'active': {
+                'version': active.version,
+                'rules': active.definition
+            },
+            'defaults': DEFAULT_SCORING_RULES,
+            'versions': [v.to_dict() for v in versions]
+        })
+    finally:
+        session.close()
+
+@scoring_bp.route('/scoring/rules', methods=['POST'])
+def create_rules():
+    """
+    Store a new rule set version.
+    Body: {"name": "...", "rules": {"rules": [...], "tiers": [...]}, "activate": false}
+    """
+    data = request.json or {}
+    if 'rules' not in data:
+        return jsonify({'success': False, 'error': 'rules is required'}), 400
+    
+    result = RulesEngine.create_version(data['rules'], name=data.get('name'), activate=data.get('activate', False))
+    if not result['success']:
+        return jsonify(result), 400
+    return jsonify(result), 201
+
+@scoring_bp.route('/scoring/rules/<int:version>/activate', methods=['POST'])
+def activate_rules(version):
+    """Activate a stored rule set version (0 reverts to the built-in rules); run a rescore afterwards"""
+    result = RulesEngine.activate(version)
+    if not result['success']:
+        status = 404 if result['error'] == 'Rule set not found' else 500
+        return jsonify(result), status
+    return jsonify(result)
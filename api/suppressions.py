@@ -0,0 +1,84 @@
+from flask import Blueprint, request, jsonify
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import get_session
+from models.suppression import Suppression, SUPPRESSION_REASONS
+from services.suppression_list import suppression_list
+
+suppressions_bp = Blueprint('suppressions', __name__)
+
+@suppressions_bp.route('/suppressions', methods=['GET'])
+def get_suppressions():
+    """List suppressed addresses and domains (page with ?limit=&after_id=, filter by ?reason=)"""
+    session = get_session()
+    try:
+        limit = min(request.args.get('limit', 100, type=int), 1000)
+        query = session.query(Suppression)
+        if request.args.get('reason'):
+            query = query.filter(Suppression.reason == request.args.get('reason'))
+        if request.args.get('after_id', type=int):
+            query = query.filter(Suppression.id > request.args.get('after_id', type=int))
+        
+        suppressions = query.order_by(Suppression.id).limit(limit).all()
+        return jsonify({
+            'success': True,
+            'suppressions': [s.to_dict() for s in suppressions],
+            'next_after_id': suppressions[-1].id if len(suppressions) == limit else None
+        })
+    finally:
+        session.close()
+
+@suppressions_bp.route('/suppressions', methods=['POST'])
+def add_suppressions():
+    """
+    Suppress addresses or domains.
+    Body: {"values": ["someone@example.com", "example.org"], "reason": "unsubscribed"}
+    """
+    data = request.json or {}
+    values = data.get('values') or []
+    reason = data.get('reason', 'manual')
+    
+    if not values:
+        return jsonify({'success': False, 'error': 'values is required'}), 400
+    if reason not in SUPPRESSION_REASONS:
+        return jsonify({'success': False, 'error': f"reason must be one of {', '.join(SUPPRESSION_REASONS)}"}), 400
+    
+    session = get_session()
+    try:
+        added = suppression_list.add(session, values, reason=reason, source='api')
+        session.commit()
+        return jsonify({'success': True, 'added': added, 'already_suppressed': len(set(values)) - added})
+    except Exception as e:
+        session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+    finally:
+        session.close()
+
+@suppressions_bp.route('/suppressions/check', methods=['GET'])
+def check_suppression():
+    """Whether ?email= is suppressed"""
+    email = request.args.get('email')
+    if not email:
+        return jsonify({'success': False, 'error': 'email is required'}), 400
+    return jsonify({'success': True, 'email': email, 'suppressed': suppression_list.is_suppressed(email)})
+
+@suppressions_bp.route('/suppressions/<int:suppression_id>', methods=['DELETE'])
+def delete_suppression(suppression_id):
+    """Allow an address or domain to be emailed again"""
+    session = get_session()
+    try:
+        suppression = session.query(Suppression).filter(Suppression.id == suppression_id).first()
+        if not suppression:
+            return jsonify({'success': False, 'error': 'Suppression not found'}), 404
+        
+        session.delete(suppression)
+        session.commit()
+        return jsonify({'success': True})
+    except Exception as e:
+        session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+    finally:
+        session.close()
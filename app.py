@@ -16,6 +16,11 @@ from api.filters import filters_bp
 from api.lead_discovery import lead_discovery_bp
 from api.campaigns import campaigns_bp
 from api.email_templates import templates_bp
+from api.scoring import scoring_bp
+from api.suppressions import suppressions_bp
+from services.campaign_dispatcher import CampaignDispatcher
+from services.outreach_rollup_service import RollupRefresher
+from services.cohort_service import CohortRefresher
 from config import DEBUG, HOST, PORT
 
 app = Flask(__name__)
@@ -29,6 +34,17 @@ app.register_blueprint(filters_bp, url_prefix='/api')
 app.register_blueprint(lead_discovery_bp, url_prefix='/api')
 app.register_blueprint(campaigns_bp, url_prefix='/api')
 app.register_blueprint(templates_bp, url_prefix='/api')
+app.register_blueprint(scoring_bp, url_prefix='/api')
+app.register_blueprint(suppressions_bp, url_prefix='/api')
+
+# Send active campaigns on their schedule
+CampaignDispatcher.start_inline()
+
+# Keep the outreach timeseries rollups current
+RollupRefresher.start_inline()
+
+# Keep the cohort funnels current
+CohortRefresher.start_inline()
 
 @app.route('/')
 def index():
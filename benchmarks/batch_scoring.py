@@ -0,0 +1,128 @@
+"""
+Check the rules engine (row and vectorized paths) against the original
+hand-written scoring logic, and time both on synthetic rows.
+
+    python benchmarks/batch_scoring.py [num_rows]
+"""
+import sys
+import os
+import json
+import random
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.lead_scorer import LeadScorer
+from services.batch_scorer import BatchScorer
+from services.rules_engine import DEFAULT_RULE_SET
+
+def reference_score_lead(contact_data):
+    """The scoring rules as they were hard-coded before the rules engine"""
+    score = 0
+    tags = []
+    
+    if not contact_data.get('website_url'):
+        score += 30
+        tags.append('no-website')
+    else:
+        health_score = contact_data.get('website_health_score') or 0
+        if health_score < 40:
+            score += 25
+            tags.append('poor-website')
+        elif health_score < 70:
+            score += 15
+            tags.append('needs-improvement')
+        if not contact_data.get('has_https'):
+            score += 10
+            tags.append('no-https')
+        if not contact_data.get('has_mobile_optimization'):
+            score += 10
+            tags.append('no-mobile')
+        if (contact_data.get('page_load_speed') or 0) > 4:
+            score += 10
+            tags.append('slow-site')
+    
+    ai_score = contact_data.get('ai_opportunity_score') or 0
+    if ai_score > 60:
+        score += 20
+        tags.append('ai-opportunity')
+    elif ai_score > 30:
+        score += 10
+        tags.append('ai-potential')
+    
+    if contact_data.get('email'):
+        score += 15
+        tags.append('has-email')
+    else:
+        tags.append('no-email')
+    
+    if contact_data.get('source'):
+        tags.append(f"source:{contact_data['source']}")
+    if contact_data.get('industry'):
+        tags.append(f"industry:{contact_data['industry']}")
+    tags.append('local-smb')
+    
+    if score >= 60:
+        tier = 'High'
+    elif score >= 30:
+        tier = 'Medium'
+    else:
+        tier = 'Low'
+    
+    return tier, tags
+
+def make_contacts(count, seed=7):
+    """Synthetic contact dicts, including the NULLs real data has"""
+    rng = random.Random(seed)
+    maybe = lambda value: None if rng.random() < 0.1 else value
+    contacts = []
+    for i in range(count):
+        contacts.append({
+            'id': i + 1,
+            'website_url': rng.choice([None, '', 'https://acme.com', 'acme.com']),
+            'website_health_score': maybe(rng.choice([0, 25, 39.5, 40, 60, 69.9, 70, 100])),
+            'has_https': maybe(rng.choice([0, 1])),
+            'has_mobile_optimization': maybe(rng.choice([0, 1])),
+            'page_load_speed': maybe(rng.choice([0.4, 2.5, 4, 4.01, 9.3])),
+            'ai_opportunity_score': maybe(rng.choice([0, 20, 30, 31, 60, 61, 100])),
+            'email': rng.choice([None, '', 'info@acme.com']),
+            'source': rng.choice([None, 'google', 'yelp', 'manual']),
+            'industry': rng.choice([None, 'healthcare', 'food', 'legal', 'other']),
+        })
+    return contacts
+
+def make_rows(scorer, contacts):
+    """Rows shaped like scorer.scoring_columns() for a never-scored table"""
+    fields = scorer.rule_set.fields
+    return [(contact['id'], None, None, None) + tuple(contact[field] for field in fields) for contact in contacts]
+
+def run(count=1000000):
+    contacts = make_contacts(count)
+    expected = [(tier, json.dumps(tags)) for tier, tags in map(reference_score_lead, contacts)]
+    
+    start = time.perf_counter()
+    results = []
+    for contact in contacts:
+        tier, tags = LeadScorer.score_lead(contact, DEFAULT_RULE_SET)
+        results.append((tier, json.dumps(tags)))
+    loop_elapsed = time.perf_counter() - start
+    row_mismatches = sum(1 for pair, row_pair in zip(expected, results) if pair != row_pair)
+    
+    scorer = BatchScorer(rule_set=DEFAULT_RULE_SET)
+    rows = make_rows(scorer, contacts)
+    start = time.perf_counter()
+    results = []
+    for offset in range(0, count, scorer.chunk_size):
+        _, tiers, tags, _ = scorer.score_rows(rows[offset:offset + scorer.chunk_size])
+        results.extend(zip(tiers, tags))
+    batch_elapsed = time.perf_counter() - start
+    batch_mismatches = sum(1 for pair, batch_pair in zip(expected, results) if pair != batch_pair)
+    
+    print(f"Scoring {count} contacts with the default rule set")
+    print(f"  LeadScorer.score_lead loop: {loop_elapsed:6.2f}s  mismatches: {row_mismatches}")
+    print(f"  BatchScorer.score_rows:     {batch_elapsed:6.2f}s  mismatches: {batch_mismatches}")
+    print(f"  Speedup: {loop_elapsed / batch_elapsed:.1f}x")
+    assert row_mismatches == 0 and batch_mismatches == 0
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,80 @@
+"""
+Check the compiled template engine against the original str.replace
+personalization, and time both rendering a campaign email for many contacts.
+
+    python benchmarks/template_rendering.py [num_emails]
+"""
+import sys
+import os
+import random
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.template_engine import compile_template
+
+SUBJECT = 'Quick question about {{Company}}'
+BODY = '''Hi {{Name}},
+
+I came across {{Business}} and wanted to reach out about your online presence.
+As a web design agency, we're offering a free website review for local {{Industry}} businesses.
+
+No strings attached - just want to help {{Company}} succeed online.
+
+Best,
+Everly Studio'''
+
+def reference_personalize_email(template, contact):
+    """Personalization as it was before the template engine"""
+    replacements = {
+        '{{Business}}': contact.get('name') or 'your business',
+        '{{Name}}': contact.get('name') or 'there',
+        '{{Company}}': contact.get('company') or 'your company',
+        '{{Industry}}': contact.get('industry') or 'your industry',
+    }
+    
+    result = template
+    for placeholder, value in replacements.items():
+        result = result.replace(placeholder, value)
+    
+    return result
+
+def make_contacts(count, seed=7):
+    """Synthetic contact dicts, including the NULLs real data has"""
+    rng = random.Random(seed)
+    maybe = lambda value: None if rng.random() < 0.1 else value
+    return [
+        {
+            'id': i + 1,
+            'name': maybe(f"Business {i}"),
+            'company': maybe(rng.choice(['Acme Dental', 'Bright Smiles LLC', 'Oak Law Group'])),
+            'industry': maybe(rng.choice(['healthcare', 'food', 'legal', 'other'])),
+        }
+        for i in range(count)
+    ]
+
+def run(count=100000):
+    contacts = make_contacts(count)
+    
+    start = time.perf_counter()
+    expected = [
+        (reference_personalize_email(SUBJECT, contact), reference_personalize_email(BODY, contact))
+        for contact in contacts
+    ]
+    replace_elapsed = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    subject, body = compile_template(SUBJECT), compile_template(BODY)
+    results = [(subject.render(contact), body.render(contact)) for contact in contacts]
+    compiled_elapsed = time.perf_counter() - start
+    
+    mismatches = sum(1 for pair, result in zip(expected, results) if pair != result)
+    
+    print(f"Rendering subject + body for {count} contacts")
+    print(f"  str.replace passes: {replace_elapsed:6.2f}s")
+    print(f"  compiled templates: {compiled_elapsed:6.2f}s  mismatches: {mismatches}")
+    print(f"  Speedup: {replace_elapsed / compiled_elapsed:.1f}x")
+    assert mismatches == 0
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
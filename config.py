@@ -20,6 +20,10 @@ SMTP_USERNAME = os.getenv('SMTP_USERNAME')
 SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
 SMTP_FROM_EMAIL = os.getenv('SMTP_FROM_EMAIL')
 SMTP_FROM_NAME = os.getenv('SMTP_FROM_NAME', 'Everly Studio')
+SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', 'True') == 'True'
+
+# Email transport: resend, smtp (e.g. a local sink) or memory (tests)
+EMAIL_PROVIDER = os.getenv('EMAIL_PROVIDER', 'resend')
 
 # Job categories for lead discovery
 JOB_CATEGORIES = [
@@ -36,3 +40,49 @@ CONTACT_STATUSES = [
 # API Keys for lead discovery
 GOOGLE_PLACES_API_KEY = os.getenv('GOOGLE_PLACES_API_KEY', '')
 YELP_API_KEY = os.getenv('YELP_API_KEY', '')
+
+# Website crawling politeness (enrichment fetches)
+CRAWL_BUDGET = int(os.getenv('CRAWL_BUDGET', 5000))  # fetches per window, all hosts
+CRAWL_BUDGET_WINDOW = int(os.getenv('CRAWL_BUDGET_WINDOW', 3600))  # seconds
+CRAWL_PER_HOST_CONCURRENCY = int(os.getenv('CRAWL_PER_HOST_CONCURRENCY', 4))
+CRAWL_PER_HOST_DELAY = float(os.getenv('CRAWL_PER_HOST_DELAY', 0.25))  # seconds between requests
+
+# Analytics response cache (shared through the database)
+ANALYTICS_CACHE_TTL = int(os.getenv('ANALYTICS_CACHE_TTL', 60))  # seconds
+
+# Outreach timeseries rollups are refreshed by a background thread, not by the request
+OUTREACH_ROLLUP_REFRESH_INTERVAL = int(os.getenv('OUTREACH_ROLLUP_REFRESH_INTERVAL', 60))  # seconds
+OUTREACH_ROLLUP_REFRESH_INLINE = os.getenv('OUTREACH_ROLLUP_REFRESH_INLINE', 'True') == 'True'  # run the refresher inside the web process
+
+# Cohort funnels are rebuilt by a background thread (or by POST /api/analytics/cohorts/refresh), not by the request
+COHORT_REFRESH_INTERVAL = int(os.getenv('COHORT_REFRESH_INTERVAL', 3600))  # seconds
+COHORT_REFRESH_INLINE = os.getenv('COHORT_REFRESH_INLINE', 'True') == 'True'  # run the refresher inside the web process
+
+# Outbound email queue (email_outbox table, drained by the OutboxSender worker pool)
+EMAIL_SEND_RATE = float(os.getenv('EMAIL_SEND_RATE', 2))  # sends per second per process (Resend's default limit)
+EMAIL_SEND_BURST = int(os.getenv('EMAIL_SEND_BURST', 2))
+EMAIL_SENDER_WORKERS = int(os.getenv('EMAIL_SENDER_WORKERS', 4))
+EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', 5))
+EMAIL_RETRY_BASE_DELAY = float(os.getenv('EMAIL_RETRY_BASE_DELAY', 30))  # seconds, doubled per attempt
+EMAIL_SENDING_TIMEOUT = int(os.getenv('EMAIL_SENDING_TIMEOUT', 300))  # seconds before a stuck claim is retried
+EMAIL_OUTBOX_INLINE_WORKER = os.getenv('EMAIL_OUTBOX_INLINE_WORKER', 'True') == 'True'  # run the pool inside the web process
+
+# Scheduled campaign sends (CampaignDispatcher): active campaigns send up to daily_limit a day, spread over the window
+CAMPAIGN_TIMEZONE = os.getenv('CAMPAIGN_TIMEZONE', 'UTC')  # send window and daily quota days are in this timezone
+CAMPAIGN_SEND_WINDOW_START = os.getenv('CAMPAIGN_SEND_WINDOW_START', '09:00')
+CAMPAIGN_SEND_WINDOW_END = os.getenv('CAMPAIGN_SEND_WINDOW_END', '17:00')
+CAMPAIGN_DISPATCH_INTERVAL = int(os.getenv('CAMPAIGN_DISPATCH_INTERVAL', 60))  # seconds between ticks
+CAMPAIGN_DISPATCH_MAX_PER_TICK = int(os.getenv('CAMPAIGN_DISPATCH_MAX_PER_TICK', 200))  # emails queued per tick, all campaigns
+CAMPAIGN_DISPATCH_LEASE = int(os.getenv('CAMPAIGN_DISPATCH_LEASE', 300))  # seconds a dispatcher's lease outlives its last renewal
+CAMPAIGN_DISPATCHER_INLINE = os.getenv('CAMPAIGN_DISPATCHER_INLINE', 'True') == 'True'  # run the dispatcher inside the web process
+
+# Provider webhook events (POST /api/email/events), buffered in process and written in batches
+EMAIL_WEBHOOK_SECRET = os.getenv('EMAIL_WEBHOOK_SECRET', '')  # Resend's whsec_... signing secret, or a shared token; required
+EMAIL_EVENT_BATCH_SIZE = int(os.getenv('EMAIL_EVENT_BATCH_SIZE', 500))  # events per write
+EMAIL_EVENT_FLUSH_INTERVAL = float(os.getenv('EMAIL_EVENT_FLUSH_INTERVAL', 5))  # seconds a partial batch waits
+EMAIL_EVENT_MAX_BUFFERED = int(os.getenv('EMAIL_EVENT_MAX_BUFFERED', 50000))  # events kept while writes fail
+
+# Suppression list: in-process Bloom filter in front of the suppressions table
+SUPPRESSION_FILTER_CAPACITY = int(os.getenv('SUPPRESSION_FILTER_CAPACITY', 100000))  # grows when exceeded
+SUPPRESSION_FILTER_ERROR_RATE = float(os.getenv('SUPPRESSION_FILTER_ERROR_RATE', 0.001))  # false positives go to the database
+SUPPRESSION_REBUILD_INTERVAL = int(os.getenv('SUPPRESSION_REBUILD_INTERVAL', 600))  # seconds between full rebuilds
@@ -0,0 +1,40 @@
+from sqlalchemy import JSON, Text, TypeDecorator, cast, exists, func, select
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, array
+import json
+
+from database.connection import engine
+
+class JSONList(TypeDecorator):
+    """
+    A list of strings stored as JSONB on PostgreSQL and as JSON text (queried with JSON1) on SQLite.
+    Reads return lists; writes take lists or, for older callers, their JSON encoding.
+    """
+    impl = JSON
+    cache_ok = True
+    
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(JSONB(none_as_null=True))
+        return dialect.type_descriptor(JSON(none_as_null=True))
+    
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, str):
+            return json.loads(value) if value else None
+        return list(value) if value is not None else None
+
+def contains_any(column, values):
+    """Condition: the JSONList column holds at least one of values (the ?| operator, GIN-indexed, on PostgreSQL)"""
+    values = list(values)
+    if engine.dialect.name == 'postgresql':
+        return column.op('?|')(cast(array(values), ARRAY(Text)))
+    elements = func.json_each(column).table_valued('value')
+    return exists(select(1).select_from(elements).where(elements.c.value.in_(values)))
+
+def contains_all(column, values):
+    """Condition: the JSONList column holds every one of values (the ?& operator, GIN-indexed, on PostgreSQL)"""
+    values = list(dict.fromkeys(values))
+    if engine.dialect.name == 'postgresql':
+        return column.op('?&')(cast(array(values), ARRAY(Text)))
+    elements = func.json_each(column).table_valued('value')
+    matched = select(func.count(func.distinct(elements.c.value))).select_from(elements).where(elements.c.value.in_(values))
+    return matched.scalar_subquery() == len(values)
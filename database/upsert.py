@@ -0,0 +1,73 @@
+from sqlalchemy import update, select, tuple_
+
+def _dialect_insert(connection):
+    """The dialect's INSERT construct with ON CONFLICT support, or None"""
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+def increment_rows(connection, table, key_fields, rows, **set_values):
+    """
+    Add each row's counter values onto the table row with the same key, inserting it if missing.
+    rows: dicts holding the key_fields plus the counters to add.
+    set_values: extra columns overwritten on every write (e.g. updated_at).
+    Uses INSERT ... ON CONFLICT on PostgreSQL and SQLite, UPDATE-then-INSERT elsewhere.
+    """
+    insert = _dialect_insert(connection)
+    
+    for row in rows:
+        counters = [field for field in row if field not in key_fields]
+        
+        if insert is not None:
+            statement = insert(table).values(**row, **set_values)
+            statement = statement.on_conflict_do_update(
+                index_elements=key_fields,
+                set_=dict({field: table.c[field] + statement.excluded[field] for field in counters}, **set_values)
+            )
+            connection.execute(statement)
+            continue
+        
+        result = connection.execute(
+            update(table).where(*[table.c[field] == row[field] for field in key_fields]).values(
+                **{field: table.c[field] + row[field] for field in counters}, **set_values
+            )
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row, **set_values))
+
+def insert_missing(connection, table, key_fields, rows, returning=False):
+    """
+    Insert rows whose key_fields aren't in the table yet, in one statement; existing keys are left alone.
+    Uses INSERT ... ON CONFLICT DO NOTHING on PostgreSQL and SQLite, a key lookup first elsewhere.
+    Returns the number of rows inserted, or with returning=True the keys of the rows this call
+    inserted (RETURNING; tuples of the key_fields values), so rows a concurrent transaction
+    inserted first are not mistaken for this one's.
+    """
+    if not rows:
+        return [] if returning else 0
+    
+    key_of = lambda row: tuple(row[field] for field in key_fields)
+    insert = _dialect_insert(connection)
+    if insert is not None:
+        statement = insert(table).on_conflict_do_nothing(index_elements=key_fields)
+        if returning:
+            statement = statement.returning(*[table.c[field] for field in key_fields])
+            return [tuple(row) for row in connection.execute(statement, rows)]
+        return connection.execute(statement, rows).rowcount
+    
+    existing = {
+        tuple(row) for row in connection.execute(
+            select(*[table.c[field] for field in key_fields]).where(
+                tuple_(*[table.c[field] for field in key_fields]).in_([key_of(row) for row in rows])
+            )
+        )
+    }
+    missing = [row for row in rows if key_of(row) not in existing]
+    if missing:
+        connection.execute(table.insert(), missing)
+    return [key_of(row) for row in missing] if returning else len(missing)
@@ -6,6 +6,21 @@ from models.outreach import Outreach
 from models.lead_discovery import LeadDiscovery
 from models.email_template import EmailTemplate
 from models.note import Note
+from models.scoring_rule_set import ScoringRuleSet
+from models.rescore_job import RescoreJob
+from models.contact_stats import ContactStats
+from models.cache_entry import CacheVersion, CacheEntry
+from models.outreach_rollup import OutreachRollup
+from models.rollup_watermark import RollupWatermark
+from models.rollup_folded_row import RollupFoldedRow
+from models.cohort_member import CohortMember
+from models.cohort_funnel import CohortFunnel
+from models.outbox_message import OutboxMessage
+from models.campaign_recipient import CampaignRecipient
+from models.campaign_daily_send import CampaignDailySend
+from models.email_event import EmailEvent
+from models.suppression import Suppression
+from models.job_lease import JobLease
 
 print("Creating database tables...")
 Base.metadata.create_all(engine)
@@ -0,0 +1,30 @@
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+from database.connection import engine, Base
+from models.campaign_daily_send import CampaignDailySend
+from models.job_lease import JobLease
+
+def migrate():
+    columns = [column['name'] for column in inspect(engine).get_columns('campaigns')]
+    if 'last_dispatched_at' in columns:
+        print("✓ campaigns.last_dispatched_at already exists")
+    else:
+        with engine.begin() as connection:
+            connection.execute(text("ALTER TABLE campaigns ADD COLUMN last_dispatched_at TIMESTAMP"))
+        print("✓ campaigns.last_dispatched_at added")
+    
+    print("Creating campaign_daily_sends table...")
+    Base.metadata.create_all(engine, tables=[CampaignDailySend.__table__])
+    print("✓ campaign_daily_sends table created")
+    
+    print("Creating job_leases table...")
+    Base.metadata.create_all(engine, tables=[JobLease.__table__])
+    print("✓ job_leases table created")
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,33 @@
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+from database.connection import engine, Base
+from models.campaign_recipient import CampaignRecipient
+
+CAMPAIGN_COLUMNS = {
+    'audience_size': 'INTEGER DEFAULT 0',
+    'total_pending': 'INTEGER DEFAULT 0',
+    'total_failed': 'INTEGER DEFAULT 0',
+    'launched_at': 'TIMESTAMP',
+}
+
+def migrate():
+    columns = [column['name'] for column in inspect(engine).get_columns('campaigns')]
+    with engine.begin() as connection:
+        for name, definition in CAMPAIGN_COLUMNS.items():
+            if name in columns:
+                print(f"✓ campaigns.{name} already exists")
+                continue
+            connection.execute(text(f"ALTER TABLE campaigns ADD COLUMN {name} {definition}"))
+            print(f"✓ campaigns.{name} added")
+    
+    print("Creating campaign_recipients table...")
+    Base.metadata.create_all(engine, tables=[CampaignRecipient.__table__])
+    print("✓ campaign_recipients table created")
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,43 @@
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+from database.connection import engine, Base
+from models.cohort_member import CohortMember
+from models.cohort_funnel import CohortFunnel
+from models.rollup_watermark import RollupWatermark
+from services.cohort_service import CohortService
+
+def migrate():
+    columns = [column['name'] for column in inspect(engine).get_columns('contacts')]
+    if 'discovery_id' in columns:
+        print("✓ contacts.discovery_id already exists")
+    else:
+        print("Adding contacts.discovery_id...")
+        with engine.begin() as connection:
+            connection.execute(text(
+                "ALTER TABLE contacts ADD COLUMN discovery_id INTEGER REFERENCES lead_discoveries(id) ON DELETE SET NULL"
+            ))
+            connection.execute(text("CREATE INDEX IF NOT EXISTS ix_contacts_discovery_id ON contacts (discovery_id)"))
+        print("✓ contacts.discovery_id added")
+    
+    # The contacted stage probes outreach by contact
+    with engine.begin() as connection:
+        connection.execute(text("CREATE INDEX IF NOT EXISTS ix_outreach_contact_id ON outreach (contact_id)"))
+    print("✓ outreach.contact_id indexed")
+    
+    print("Creating cohort tables...")
+    Base.metadata.create_all(engine, tables=[CohortMember.__table__, CohortFunnel.__table__, RollupWatermark.__table__])
+    print("✓ cohort tables created")
+    
+    print("Building cohort funnels...")
+    result = CohortService.refresh()
+    if not result['success']:
+        raise SystemExit(f"✗ Cohort refresh failed: {result['error']}")
+    print(f"✓ {result['new_members']} contacts assigned to {result['cohorts']} cohorts")
+
+if __name__ == '__main__':
+    migrate()
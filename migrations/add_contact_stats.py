@@ -0,0 +1,23 @@
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import engine, Base
+from models.contact_stats import ContactStats
+from services.contact_stats_service import ContactStatsService
+
+def migrate():
+    print("Creating contact_stats table...")
+    Base.metadata.create_all(engine, tables=[ContactStats.__table__])
+    print("✓ contact_stats table created")
+    
+    print("Building contact_stats from contacts...")
+    result = ContactStatsService.reconcile()
+    if not result['success']:
+        raise SystemExit(f"✗ Reconcile failed: {result['error']}")
+    print(f"✓ contact_stats built ({result['groups']} groups)")
+
+if __name__ == '__main__':
+    migrate()
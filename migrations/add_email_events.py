@@ -0,0 +1,35 @@
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+from database.connection import engine, Base
+from models.email_event import EmailEvent
+
+NEW_COLUMNS = [
+    ('campaigns', 'total_bounced', 'INTEGER DEFAULT 0'),
+    ('campaign_recipients', 'opened_at', 'TIMESTAMP'),
+    ('email_outbox', 'provider_message_id', 'VARCHAR(255)'),
+]
+
+def migrate():
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table, name, definition in NEW_COLUMNS:
+            if name in [column['name'] for column in inspector.get_columns(table)]:
+                print(f"✓ {table}.{name} already exists")
+                continue
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {definition}"))
+            print(f"✓ {table}.{name} added")
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_email_outbox_provider_message_id ON email_outbox (provider_message_id)"
+        ))
+    
+    print("Creating email_events table...")
+    Base.metadata.create_all(engine, tables=[EmailEvent.__table__])
+    print("✓ email_events table created")
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,33 @@
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+from database.connection import engine, Base
+from models.outbox_message import OutboxMessage
+
+def migrate():
+    print("Creating email_outbox table...")
+    Base.metadata.create_all(engine, tables=[OutboxMessage.__table__])
+    print("✓ email_outbox table created")
+    
+    columns = [column['name'] for column in inspect(engine).get_columns('email_outbox')]
+    with engine.begin() as connection:
+        if 'applied_at' in columns:
+            print("✓ email_outbox.applied_at already exists")
+        else:
+            connection.execute(text("ALTER TABLE email_outbox ADD COLUMN applied_at TIMESTAMP"))
+            # Outcomes recorded before this column existed were applied in the same commit
+            connection.execute(text(
+                "UPDATE email_outbox SET applied_at = COALESCE(sent_at, created_at, CURRENT_TIMESTAMP) "
+                "WHERE status IN ('sent', 'failed')"
+            ))
+            print("✓ email_outbox.applied_at added")
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_email_outbox_unapplied ON email_outbox (status, applied_at)"
+        ))
+
+if __name__ == '__main__':
+    migrate()
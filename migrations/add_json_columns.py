@@ -0,0 +1,87 @@
+import sys
+import os
+import json
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+from database.connection import engine
+
+# JSON-array columns that used to be JSON strings in Text columns
+JSON_COLUMNS = [
+    ('contacts', 'tags'),
+    ('campaigns', 'target_industries'),
+    ('campaigns', 'target_tiers'),
+    ('campaigns', 'target_sources'),
+    ('lead_discoveries', 'industries'),
+]
+
+def legacy_list(value):
+    """
+    JSON array text for a legacy value, or None for a blank one.
+    Valid arrays are kept; any other value (a JSON scalar, or text that isn't JSON)
+    becomes a one-element list, so the column can be cast to JSON without losing it.
+    """
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        # SQLite's JSON affinity stores bare numbers as numbers
+        return json.dumps([value])
+    if not value.strip():
+        return None
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        return json.dumps([value.strip()])
+    if isinstance(parsed, list):
+        return value
+    return json.dumps([parsed]) if parsed is not None else None
+
+def clean_column(connection, table, column):
+    """Rewrite the rows whose value isn't a JSON array (checked in Python, row by row); returns how many changed"""
+    changed = []
+    for row_id, value in connection.execute(text(f"SELECT id, {column} FROM {table} WHERE {column} IS NOT NULL")):
+        cleaned = legacy_list(value)
+        if cleaned != value:
+            changed.append({'id': row_id, 'value': cleaned})
+    if changed:
+        connection.execute(text(f"UPDATE {table} SET {column} = :value WHERE id = :id"), changed)
+    return len(changed)
+
+def migrate():
+    postgres = engine.dialect.name == 'postgresql'
+    inspector = inspect(engine)
+    
+    with engine.begin() as connection:
+        campaign_columns = [column['name'] for column in inspector.get_columns('campaigns')]
+        if 'target_tags' in campaign_columns:
+            print("✓ campaigns.target_tags already exists")
+        else:
+            connection.execute(text(f"ALTER TABLE campaigns ADD COLUMN target_tags {'JSONB' if postgres else 'JSON'}"))
+            print("✓ campaigns.target_tags added")
+        
+        for table, column in JSON_COLUMNS:
+            if postgres:
+                types = {c['name']: str(c['type']) for c in inspector.get_columns(table)}
+                if types[column] == 'JSONB':
+                    print(f"✓ {table}.{column} is already JSONB")
+                    continue
+                # The cast aborts the whole migration on one bad value, so clean them up first
+                fixed = clean_column(connection, table, column)
+                connection.execute(text(
+                    f"ALTER TABLE {table} ALTER COLUMN {column} TYPE JSONB USING NULLIF({column}, '')::jsonb"
+                ))
+                print(f"✓ {table}.{column} converted to JSONB ({fixed} legacy values rewritten)")
+            else:
+                # SQLite keeps the JSON text as is; JSON1 reads it once every value is an array
+                fixed = clean_column(connection, table, column)
+                print(f"✓ {table}.{column} checked ({fixed} legacy values rewritten)")
+        
+        if postgres:
+            print("Creating GIN index on contacts.tags...")
+            connection.execute(text("CREATE INDEX IF NOT EXISTS ix_contacts_tags ON contacts USING gin (tags)"))
+            print("✓ ix_contacts_tags created")
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,38 @@
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+from database.connection import engine, Base
+from models.outreach_rollup import OutreachRollup
+from models.rollup_watermark import RollupWatermark
+from models.rollup_folded_row import RollupFoldedRow
+from services.outreach_rollup_service import OutreachRollupService
+
+def migrate():
+    columns = [column['name'] for column in inspect(engine).get_columns('outreach')]
+    if 'campaign_id' in columns:
+        print("✓ outreach.campaign_id already exists")
+    else:
+        print("Adding outreach.campaign_id...")
+        with engine.begin() as connection:
+            connection.execute(text(
+                "ALTER TABLE outreach ADD COLUMN campaign_id INTEGER REFERENCES campaigns(id) ON DELETE SET NULL"
+            ))
+            connection.execute(text("CREATE INDEX IF NOT EXISTS ix_outreach_campaign_id ON outreach (campaign_id)"))
+        print("✓ outreach.campaign_id added")
+    
+    print("Creating outreach_rollups, rollup_watermarks and rollup_folded_rows tables...")
+    Base.metadata.create_all(engine, tables=[OutreachRollup.__table__, RollupWatermark.__table__, RollupFoldedRow.__table__])
+    print("✓ rollup tables created")
+    
+    print("Building outreach rollups...")
+    result = OutreachRollupService.rebuild()
+    if not result['success']:
+        raise SystemExit(f"✗ Rollup build failed: {result['error']}")
+    print(f"✓ {result['folded']} outreach rows rolled up")
+
+if __name__ == '__main__':
+    migrate()
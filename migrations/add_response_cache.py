@@ -0,0 +1,21 @@
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from database.connection import engine, Base
+from models.cache_entry import CacheVersion, CacheEntry
+
+def migrate():
+    print("Creating cache_versions and cache_entries tables...")
+    Base.metadata.create_all(engine, tables=[CacheVersion.__table__, CacheEntry.__table__])
+    print("✓ response cache tables created")
+    
+    with engine.begin() as connection:
+        connection.execute(text("CREATE INDEX IF NOT EXISTS ix_cache_entries_expires_at ON cache_entries (expires_at)"))
+    print("✓ cache_entries.expires_at indexed")
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,29 @@
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+from database.connection import engine, Base
+from models.scoring_rule_set import ScoringRuleSet
+from models.rescore_job import RescoreJob
+
+def migrate():
+    print("Creating scoring_rule_sets and rescore_jobs tables...")
+    Base.metadata.create_all(engine, tables=[ScoringRuleSet.__table__, RescoreJob.__table__])
+    print("✓ scoring_rule_sets and rescore_jobs tables created")
+    
+    columns = [column['name'] for column in inspect(engine).get_columns('contacts')]
+    if 'score_version' in columns:
+        print("✓ contacts.score_version already exists")
+        return
+    
+    print("Adding contacts.score_version...")
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TABLE contacts ADD COLUMN score_version INTEGER"))
+        connection.execute(text("CREATE INDEX IF NOT EXISTS ix_contacts_score_version ON contacts (score_version)"))
+    print("✓ contacts.score_version added")
+
+if __name__ == '__main__':
+    migrate()
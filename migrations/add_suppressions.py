@@ -0,0 +1,47 @@
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+from database.connection import engine, Base, get_session
+from models.contact import Contact
+from models.email_event import EmailEvent
+from models.suppression import Suppression
+from services.suppression_list import suppression_list
+
+def migrate():
+    columns = [column['name'] for column in inspect(engine).get_columns('campaigns')]
+    if 'total_suppressed' in columns:
+        print("✓ campaigns.total_suppressed already exists")
+    else:
+        with engine.begin() as connection:
+            connection.execute(text("ALTER TABLE campaigns ADD COLUMN total_suppressed INTEGER DEFAULT 0"))
+        print("✓ campaigns.total_suppressed added")
+    
+    print("Creating suppressions table...")
+    Base.metadata.create_all(engine, tables=[Suppression.__table__])
+    print("✓ suppressions table created")
+    
+    print("Seeding from 'Not Interested' contacts and bounce/complaint events...")
+    session = get_session()
+    try:
+        added = suppression_list.add(session, [
+            email for (email,) in session.query(Contact.email).filter(
+                Contact.status == 'Not Interested', Contact.email.isnot(None), Contact.email != ''
+            )
+        ], reason='not_interested', source='migration')
+        for reason in ('bounced', 'complained'):
+            added += suppression_list.add(session, [
+                email for (email,) in session.query(EmailEvent.email).filter(
+                    EmailEvent.event_type == reason, EmailEvent.email.isnot(None)
+                ).distinct()
+            ], reason=reason, source='migration')
+        session.commit()
+        print(f"✓ {added} addresses suppressed")
+    finally:
+        session.close()
+
+if __name__ == '__main__':
+    migrate()
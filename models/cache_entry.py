@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from datetime import datetime
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.connection import Base
+
+class CacheVersion(Base):
+    """Invalidation counter per cache namespace, bumped after every relevant write"""
+    __tablename__ = 'cache_versions'
+    
+    namespace = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class CacheEntry(Base):
+    """Serialized response shared by every worker; valid while version matches and not expired"""
+    __tablename__ = 'cache_entries'
+    
+    key = Column(String(255), primary_key=True)  # "<namespace>:<name>"
+    version = Column(Integer, nullable=False)
+    etag = Column(String(64), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)  # expired entries are deleted as new ones are stored
@@ -5,6 +5,7 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database.connection import Base
+from database.json_columns import JSONList
 
 class Campaign(Base):
     __tablename__ = 'campaigns'
@@ -17,22 +18,32 @@ class Campaign(Base):
     email_body = Column(Text, nullable=True)
     
     # Targeting
-    target_industries = Column(Text, nullable=True)  # JSON array
-    target_tiers = Column(Text, nullable=True)  # JSON array
-    target_sources = Column(Text, nullable=True)  # JSON array
+    target_industries = Column(JSONList, nullable=True)
+    target_tiers = Column(JSONList, nullable=True)
+    target_sources = Column(JSONList, nullable=True)
+    target_tags = Column(JSONList, nullable=True)  # contacts with any of these tags
     
     # Schedule
     daily_limit = Column(Integer, default=30)
     is_active = Column(Integer, default=0)
     
+    # Audience (frozen into campaign_recipients at launch)
+    audience_size = Column(Integer, default=0)
+    total_pending = Column(Integer, default=0)  # recipients not handed to the outbox yet
+    
     # Stats
-    total_sent = Column(Integer, default=0)
-    total_opened = Column(Integer, default=0)
+    total_sent = Column(Integer, default=0)  # delivered by the outbox
+    total_opened = Column(Integer, default=0)  # recipients with at least one open event
     total_replied = Column(Integer, default=0)
     total_converted = Column(Integer, default=0)
+    total_failed = Column(Integer, default=0)
+    total_bounced = Column(Integer, default=0)
+    total_suppressed = Column(Integer, default=0)  # recipients skipped at send time
     
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
+    launched_at = Column(DateTime, nullable=True)
+    last_dispatched_at = Column(DateTime, nullable=True)  # last scheduled dispatch tick that claimed it
     started_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
     
@@ -43,16 +54,23 @@ class Campaign(Base):
             'name': self.name,
             'subject_lines': json.loads(self.subject_lines) if self.subject_lines else [],
             'email_body': self.email_body,
-            'target_industries': json.loads(self.target_industries) if self.target_industries else [],
-            'target_tiers': json.loads(self.target_tiers) if self.target_tiers else [],
-            'target_sources': json.loads(self.target_sources) if self.target_sources else [],
+            'target_industries': self.target_industries or [],
+            'target_tiers': self.target_tiers or [],
+            'target_sources': self.target_sources or [],
+            'target_tags': self.target_tags or [],
             'daily_limit': self.daily_limit,
             'is_active': bool(self.is_active),
+            'audience_size': self.audience_size,
+            'total_pending': self.total_pending,
             'total_sent': self.total_sent,
             'total_opened': self.total_opened,
             'total_replied': self.total_replied,
             'total_converted': self.total_converted,
+            'total_failed': self.total_failed,
+            'total_bounced': self.total_bounced,
+            'total_suppressed': self.total_suppressed,
             'created_at': self.created_at.isoformat() if self.created_at else None,
+            'launched_at': self.launched_at.isoformat() if self.launched_at else None,
             'started_at': self.started_at.isoformat() if self.started_at else None,
             'completed_at': self.completed_at.isoformat() if self.completed_at else None
         }
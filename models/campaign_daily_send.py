@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, UniqueConstraint
+from datetime import datetime
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.connection import Base
+from models.campaign import Campaign  # foreign key target must be mapped before a flush
+
+class CampaignDailySend(Base):
+    """Emails a campaign queued on one day (in CAMPAIGN_TIMEZONE), checked against its daily_limit"""
+    __tablename__ = 'campaign_daily_sends'
+    __table_args__ = (UniqueConstraint('campaign_id', 'day', name='uq_campaign_daily_sends_day'),)
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    campaign_id = Column(Integer, ForeignKey('campaigns.id', ondelete='CASCADE'), nullable=False)
+    day = Column(Date, nullable=False)
+    sent = Column(Integer, nullable=False, default=0)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
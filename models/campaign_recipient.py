@@ -0,0 +1,49 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint, Index
+from datetime import datetime
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.connection import Base
+from models.contact import Contact  # foreign key targets must be mapped before a flush
+from models.campaign import Campaign
+
+# pending: in the audience, not handed to the outbox yet; queued: in the outbox;
+# sent / failed: outbox delivery outcome; replied: the contact replied after a send;
+# suppressed: the address or domain was suppressed before the send
+RECIPIENT_STATUSES = ['pending', 'queued', 'sent', 'failed', 'replied', 'suppressed']
+
+class CampaignRecipient(Base):
+    """A campaign's audience, frozen when the campaign launches, with per-recipient send state"""
+    __tablename__ = 'campaign_recipients'
+    __table_args__ = (
+        UniqueConstraint('campaign_id', 'contact_id', name='uq_campaign_recipients_contact'),
+        Index('ix_campaign_recipients_status', 'campaign_id', 'status', 'id'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    campaign_id = Column(Integer, ForeignKey('campaigns.id', ondelete='CASCADE'), nullable=False)
+    contact_id = Column(Integer, ForeignKey('contacts.id', ondelete='CASCADE'), nullable=False, index=True)
+    
+    status = Column(String(20), nullable=False, default='pending')
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    queued_at = Column(DateTime, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
+    opened_at = Column(DateTime, nullable=True)  # first open event
+    replied_at = Column(DateTime, nullable=True)
+    
+    def to_dict(self):
+        """Convert recipient to dictionary"""
+        return {
+            'id': self.id,
+            'campaign_id': self.campaign_id,
+            'contact_id': self.contact_id,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'queued_at': self.queued_at.isoformat() if self.queued_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None,
+            'opened_at': self.opened_at.isoformat() if self.opened_at else None,
+            'replied_at': self.replied_at.isoformat() if self.replied_at else None
+        }
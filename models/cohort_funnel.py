@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+from datetime import datetime
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.connection import Base
+
+# Funnel stages in order; each counts the cohort's contacts that reached it
+FUNNEL_STAGES = ['members', 'with_email', 'contacted', 'replied', 'converted']
+
+class CohortFunnel(Base):
+    """Materialized funnel counts per cohort, rebuilt by CohortService.refresh()"""
+    __tablename__ = 'cohort_funnels'
+    __table_args__ = (UniqueConstraint('cohort_type', 'cohort_key', name='uq_cohort_funnels_cohort'),)
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    
+    cohort_type = Column(String(20), nullable=False)  # week, discovery, tier
+    cohort_key = Column(String(100), nullable=False)  # '' for contacts without a value
+    label = Column(String(255), nullable=True)
+    
+    members = Column(Integer, nullable=False, default=0)
+    with_email = Column(Integer, nullable=False, default=0)
+    contacted = Column(Integer, nullable=False, default=0)
+    replied = Column(Integer, nullable=False, default=0)
+    converted = Column(Integer, nullable=False, default=0)
+    
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Stage counts plus step-to-step and overall conversion rates"""
+        result = {
+            'cohort': self.cohort_key or None,
+            'label': self.label,
+        }
+        result.update({stage: getattr(self, stage) for stage in FUNNEL_STAGES})
+        
+        rate = lambda part, whole: round(part / whole * 100, 2) if whole else 0
+        result['contact_rate'] = rate(self.contacted, self.members)
+        result['reply_rate'] = rate(self.replied, self.contacted)
+        result['conversion_rate'] = rate(self.converted, self.contacted)
+        result['overall_conversion_rate'] = rate(self.converted, self.members)
+        return result
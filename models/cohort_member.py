@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey
+from datetime import datetime
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.connection import Base
+from models.contact import Contact  # foreign key target must be mapped before a flush
+
+class CohortMember(Base):
+    """
+    A contact's cohorts, fixed when it is first materialized so later edits
+    (rescoring, re-imports) don't move it. Missing values are stored as '' / 0.
+    """
+    __tablename__ = 'cohort_members'
+    
+    contact_id = Column(Integer, ForeignKey('contacts.id', ondelete='CASCADE'), primary_key=True)
+    
+    cohort_week = Column(Date, nullable=False, index=True)  # Monday of the week the contact was created
+    discovery_id = Column(Integer, nullable=False, default=0, index=True)  # discovery job that imported it
+    initial_tier = Column(String(20), nullable=False, default='', index=True)  # first tier it was scored into
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,13 +1,20 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Index
 from datetime import datetime
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database.connection import Base
+from database.json_columns import JSONList
+from models.contact_stats import track_contact_stats
+from models.lead_discovery import LeadDiscovery  # discovery_id foreign key target
 
 class Contact(Base):
     __tablename__ = 'contacts'
+    __table_args__ = (
+        # Tag filters use the JSONB ?| / ?& operators; SQLite scans tags with json_each instead
+        Index('ix_contacts_tags', 'tags', postgresql_using='gin').ddl_if(dialect='postgresql'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     
@@ -33,10 +40,12 @@ class Contact(Base):
     
     # Lead Generation Fields
     source = Column(String(50), nullable=True)  # google, yelp, manual
+    discovery_id = Column(Integer, ForeignKey('lead_discoveries.id', ondelete='SET NULL'), nullable=True, index=True)  # discovery job that imported it
     industry = Column(String(100), nullable=True)
     job_category = Column(String(100), nullable=True)
     tier = Column(String(20), nullable=True)  # High, Medium, Low
-    tags = Column(Text, nullable=True)  # JSON array of tags
+    tags = Column(JSONList, nullable=True)  # list of tags
+    score_version = Column(Integer, nullable=True, index=True)  # scoring rule set version that set tier/tags
     
     # AI Opportunity Signals
     has_forms = Column(Integer, default=0)
@@ -61,7 +70,6 @@ class Contact(Base):
     
     def to_dict(self):
         """Convert contact to dictionary"""
-        import json
         return {
             'id': self.id,
             'name': self.name,
@@ -79,10 +87,12 @@ class Contact(Base):
             'has_https': bool(self.has_https),
             'page_load_speed': self.page_load_speed,
             'source': self.source,
+            'discovery_id': self.discovery_id,
             'industry': self.industry,
             'job_category': self.job_category,
             'tier': self.tier,
-            'tags': json.loads(self.tags) if self.tags else [],
+            'tags': self.tags or [],
+            'score_version': self.score_version,
             'has_forms': bool(self.has_forms),
             'has_appointments': bool(self.has_appointments),
             'has_faq': bool(self.has_faq),
@@ -97,3 +107,5 @@ class Contact(Base):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+
+track_contact_stats(Contact)
@@ -0,0 +1,158 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, UniqueConstraint, event, inspect
+from sqlalchemy.orm import Session
+from datetime import datetime
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.connection import Base
+from database.upsert import increment_rows
+
+# Group key of the rollup. NULL is stored as '' so the unique constraint holds.
+KEY_FIELDS = ['industry', 'source', 'tier', 'status']
+METRIC_FIELDS = ['total', 'with_email', 'contacted', 'replied', 'converted', 'high_ai_opportunity', 'health_sum', 'health_count']
+
+# Contact columns that feed the rollup
+TRACKED_FIELDS = KEY_FIELDS + ['email', 'total_touches', 'has_replied', 'ai_opportunity_score', 'website_health_score']
+
+class ContactStats(Base):
+    __tablename__ = 'contact_stats'
+    __table_args__ = (UniqueConstraint(*KEY_FIELDS, name='uq_contact_stats_key'),)
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    
+    industry = Column(String(100), nullable=False, default='')
+    source = Column(String(50), nullable=False, default='')
+    tier = Column(String(20), nullable=False, default='')
+    status = Column(String(50), nullable=False, default='')
+    
+    total = Column(Integer, nullable=False, default=0)
+    with_email = Column(Integer, nullable=False, default=0)
+    contacted = Column(Integer, nullable=False, default=0)
+    replied = Column(Integer, nullable=False, default=0)
+    converted = Column(Integer, nullable=False, default=0)
+    high_ai_opportunity = Column(Integer, nullable=False, default=0)
+    health_sum = Column(Float, nullable=False, default=0)
+    health_count = Column(Integer, nullable=False, default=0)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert rollup row to dictionary ('' keys read back as None)"""
+        result = {field: getattr(self, field) or None for field in KEY_FIELDS}
+        result.update({field: getattr(self, field) for field in METRIC_FIELDS})
+        return result
+
+def stats_key(values):
+    """Rollup key for a contact's field values"""
+    return tuple(values.get(field) or '' for field in KEY_FIELDS)
+
+def stats_metrics(values):
+    """One contact's contribution to its rollup row (mirrors AnalyticsService.performance_metrics)"""
+    health = values.get('website_health_score')
+    return {
+        'total': 1,
+        'with_email': 1 if values.get('email') else 0,
+        'contacted': 1 if (values.get('total_touches') or 0) > 0 else 0,
+        'replied': 1 if values.get('has_replied') == 1 else 0,
+        'converted': 1 if values.get('status') == 'Converted' else 0,
+        'high_ai_opportunity': 1 if (values.get('ai_opportunity_score') or 0) > 60 else 0,
+        'health_sum': health or 0,
+        'health_count': 1 if health is not None else 0,
+    }
+
+def _current_values(obj):
+    return {field: getattr(obj, field) for field in TRACKED_FIELDS}
+
+def _previous_values(obj):
+    # Changed attributes keep their old value in history; untouched ones are read (and loaded if expired)
+    state = inspect(obj)
+    values = {}
+    for field in TRACKED_FIELDS:
+        history = state.attrs[field].history
+        values[field] = history.deleted[0] if history.deleted else getattr(obj, field)
+    return values
+
+def _add_delta(deltas, values, sign):
+    metrics = deltas.setdefault(stats_key(values), dict.fromkeys(METRIC_FIELDS, 0))
+    for field, value in stats_metrics(values).items():
+        metrics[field] += sign * value
+
+def apply_deltas(connection, deltas):
+    """Add per-key metric deltas to the rollup with one upsert per key"""
+    rows = [
+        dict(zip(KEY_FIELDS, key), **metrics)
+        for key, metrics in deltas.items()
+        if any(metrics.values())
+    ]
+    increment_rows(connection, ContactStats.__table__, KEY_FIELDS, rows, updated_at=datetime.utcnow())
+
+def _load_old_value(target, value, oldvalue, initiator):
+    pass
+
+def track_contact_stats(contact_class):
+    """
+    Keep contact_stats current for every ORM write to contact_class.
+    Per-object adds, updates and deletes become rollup deltas applied in the
+    same transaction as the flush. Bulk UPDATE/DELETE statements can't be
+    diffed, so they mark the session and the rollup is reconciled after commit
+    (unless the caller set session.info['defer_contact_stats'] and reconciles itself).
+    """
+    # The reconcile below bumps the response cache, whose module registers session listeners on import;
+    # import it now, since adding listeners while after_commit is dispatching fails
+    import services.response_cache
+    
+    # Load the old value on assignment so history always has it, even for expired attributes
+    for field in TRACKED_FIELDS:
+        event.listen(getattr(contact_class, field), 'set', _load_old_value, active_history=True)
+    
+    @event.listens_for(Session, 'before_flush')
+    def collect_previous(session, flush_context, instances):
+        # Old values must be read before the flush writes (or deletes) the rows
+        deltas = session.info.setdefault('contact_stats_deltas', {})
+        changed = session.info.setdefault('contact_stats_changed', [])
+        
+        for obj in session.deleted:
+            if isinstance(obj, contact_class):
+                _add_delta(deltas, _previous_values(obj), -1)
+        
+        for obj in session.dirty:
+            if not isinstance(obj, contact_class) or obj in session.deleted:
+                continue
+            state = inspect(obj)
+            if any(state.attrs[field].history.has_changes() for field in TRACKED_FIELDS):
+                _add_delta(deltas, _previous_values(obj), -1)
+                changed.append(obj)
+    
+    @event.listens_for(Session, 'after_flush')
+    def apply_changes(session, flush_context):
+        # New rows are counted after the flush so column defaults are filled in
+        deltas = session.info.pop('contact_stats_deltas', {})
+        changed = session.info.pop('contact_stats_changed', [])
+        
+        for obj in list(session.new) + changed:
+            if isinstance(obj, contact_class):
+                _add_delta(deltas, _current_values(obj), 1)
+        
+        if deltas:
+            apply_deltas(session.connection(), deltas)
+    
+    @event.listens_for(Session, 'do_orm_execute')
+    def flag_bulk_writes(orm_execute_state):
+        if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+            return
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.class_ is contact_class:
+            orm_execute_state.session.info['contact_stats_stale'] = True
+    
+    @event.listens_for(Session, 'after_commit')
+    def reconcile_after_bulk(session):
+        if session.info.pop('contact_stats_stale', False) and not session.info.get('defer_contact_stats'):
+            from services.contact_stats_service import ContactStatsService
+            ContactStatsService.reconcile()
+    
+    @event.listens_for(Session, 'after_rollback')
+    def discard(session):
+        session.info.pop('contact_stats_deltas', None)
+        session.info.pop('contact_stats_changed', None)
+        session.info.pop('contact_stats_stale', None)
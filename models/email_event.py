@@ -0,0 +1,50 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
+from datetime import datetime
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.connection import Base
+from models.contact import Contact  # foreign key targets must be mapped before a flush
+from models.campaign import Campaign
+
+EVENT_TYPES = ['delivered', 'opened', 'bounced', 'complained', 'replied']
+
+class EmailEvent(Base):
+    """
+    A delivery event reported by the email provider's webhook.
+    event_key is the provider's event id (or a hash of the event), so redelivered webhooks are stored once.
+    """
+    __tablename__ = 'email_events'
+    __table_args__ = (
+        Index('ix_email_events_campaign_type', 'campaign_id', 'event_type'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    event_key = Column(String(255), nullable=False, unique=True)
+    event_type = Column(String(20), nullable=False)
+    
+    # Matched to the outbox message by provider_message_id, else to the contact by email
+    provider_message_id = Column(String(255), nullable=True)
+    email = Column(String(255), nullable=True, index=True)
+    contact_id = Column(Integer, ForeignKey('contacts.id', ondelete='SET NULL'), nullable=True, index=True)
+    campaign_id = Column(Integer, ForeignKey('campaigns.id', ondelete='SET NULL'), nullable=True)
+    
+    payload = Column(Text, nullable=True)  # JSON as received
+    
+    # Timestamps
+    occurred_at = Column(DateTime, nullable=False)
+    received_at = Column(DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert event to dictionary"""
+        return {
+            'id': self.id,
+            'event_type': self.event_type,
+            'provider_message_id': self.provider_message_id,
+            'email': self.email,
+            'contact_id': self.contact_id,
+            'campaign_id': self.campaign_id,
+            'occurred_at': self.occurred_at.isoformat() if self.occurred_at else None,
+            'received_at': self.received_at.isoformat() if self.received_at else None
+        }
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, DateTime
+from datetime import datetime
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.connection import Base
+
+class JobLease(Base):
+    """Exclusive lease on a periodic job, so only one process runs it at a time"""
+    __tablename__ = 'job_leases'
+    
+    name = Column(String(50), primary_key=True)
+    owner = Column(String(64), nullable=True)  # holder's token; NULL when released
+    expires_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # a crashed holder's lease lapses here
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -5,6 +5,7 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database.connection import Base
+from database.json_columns import JSONList
 
 class LeadDiscovery(Base):
     __tablename__ = 'lead_discoveries'
@@ -18,7 +19,7 @@ class LeadDiscovery(Base):
     # Parameters
     location = Column(String(255), nullable=True)
     radius_miles = Column(Integer, nullable=True)
-    industries = Column(Text, nullable=True)  # JSON array
+    industries = Column(JSONList, nullable=True)
     
     # Results
     total_found = Column(Integer, default=0)
@@ -35,14 +36,13 @@ class LeadDiscovery(Base):
     completed_at = Column(DateTime, nullable=True)
     
     def to_dict(self):
-        import json
         return {
             'id': self.id,
             'job_name': self.job_name,
             'source': self.source,
             'location': self.location,
             'radius_miles': self.radius_miles,
-            'industries': json.loads(self.industries) if self.industries else [],
+            'industries': self.industries or [],
             'total_found': self.total_found,
             'total_imported': self.total_imported,
             'total_duplicates': self.total_duplicates,
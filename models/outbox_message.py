@@ -0,0 +1,64 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
+from datetime import datetime
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.connection import Base
+from models.contact import Contact  # foreign key targets must be mapped before a flush
+from models.campaign import Campaign
+
+class OutboxMessage(Base):
+    """
+    One outbound email, written in the request and delivered later by the
+    OutboxSender worker pool. idempotency_key is unique, so enqueueing the same
+    (campaign, contact) twice keeps a single message.
+    """
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        Index('ix_email_outbox_due', 'status', 'next_attempt_at'),
+        Index('ix_email_outbox_unapplied', 'status', 'applied_at'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    idempotency_key = Column(String(255), nullable=False, unique=True)
+    
+    campaign_id = Column(Integer, ForeignKey('campaigns.id', ondelete='SET NULL'), nullable=True, index=True)
+    contact_id = Column(Integer, ForeignKey('contacts.id', ondelete='SET NULL'), nullable=True, index=True)
+    
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(500), nullable=False)
+    body_html = Column(Text, nullable=False)
+    body_text = Column(Text, nullable=True)
+    
+    # Delivery
+    status = Column(String(20), nullable=False, default='queued')  # queued, sending, sent, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    claim_token = Column(String(32), nullable=True, index=True)  # set by the worker that claimed it
+    claimed_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    provider_message_id = Column(String(255), nullable=True, index=True)  # matches delivery events to the message
+    applied_at = Column(DateTime, nullable=True)  # when a sent/failed outcome reached campaign_recipients and outreach
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+    
+    def to_dict(self):
+        """Convert outbox message to dictionary"""
+        return {
+            'id': self.id,
+            'idempotency_key': self.idempotency_key,
+            'campaign_id': self.campaign_id,
+            'contact_id': self.contact_id,
+            'to_email': self.to_email,
+            'subject': self.subject,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'provider_message_id': self.provider_message_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None
+        }
@@ -5,12 +5,15 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database.connection import Base
+from models.contact import Contact  # foreign key targets must be mapped before a flush
+from models.campaign import Campaign
 
 class Outreach(Base):
     __tablename__ = 'outreach'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    contact_id = Column(Integer, ForeignKey('contacts.id'), nullable=False)
+    contact_id = Column(Integer, ForeignKey('contacts.id'), nullable=False, index=True)
+    campaign_id = Column(Integer, ForeignKey('campaigns.id', ondelete='SET NULL'), nullable=True, index=True)  # set for campaign sends
     
     outreach_type = Column(String(50), default='Email')  # Email, Call, Meeting, etc.
     subject = Column(String(500), nullable=True)
@@ -23,6 +26,7 @@ class Outreach(Base):
         return {
             'id': self.id,
             'contact_id': self.contact_id,
+            'campaign_id': self.campaign_id,
             'outreach_type': self.outreach_type,
             'subject': self.subject,
             'message': self.message,
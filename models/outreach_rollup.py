@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, UniqueConstraint, Index
+from datetime import datetime
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.connection import Base
+
+class OutreachRollup(Base):
+    """Outreach counts per time bucket; NULL dimensions are stored as '' / 0 so the unique key holds"""
+    __tablename__ = 'outreach_rollups'
+    __table_args__ = (
+        UniqueConstraint('granularity', 'bucket_start', 'outreach_type', 'campaign_id', 'industry', 'source',
+                         name='uq_outreach_rollups_bucket'),
+        Index('ix_outreach_rollups_range', 'granularity', 'bucket_start'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    
+    granularity = Column(String(10), nullable=False)  # day, week
+    bucket_start = Column(Date, nullable=False)  # the day, or the Monday of the week
+    
+    outreach_type = Column(String(50), nullable=False, default='')
+    campaign_id = Column(Integer, nullable=False, default=0)
+    industry = Column(String(100), nullable=False, default='')
+    source = Column(String(50), nullable=False, default='')
+    
+    count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
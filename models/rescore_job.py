@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from datetime import datetime
+import json
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.connection import Base
+
+class RescoreJob(Base):
+    """A background rescore run; stored so any worker can report its progress"""
+    __tablename__ = 'rescore_jobs'
+    
+    id = Column(String(32), primary_key=True)
+    status = Column(String(20), nullable=False, default='running')  # running, completed, failed
+    only_stale = Column(Integer, default=0)
+    
+    progress = Column(Text, nullable=True)  # JSON: {message, step, total, timestamp}
+    result = Column(Text, nullable=True)  # JSON: BatchScorer.rescore_all's result
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+    
+    def to_dict(self):
+        """Convert job to dictionary"""
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'only_stale': bool(self.only_stale),
+            'progress': json.loads(self.progress) if self.progress else {},
+            'result': json.loads(self.result) if self.result else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.connection import Base
+
+class RollupFoldedRow(Base):
+    """Source row ids near a rollup's watermark that are already folded in, so a re-scan skips them"""
+    __tablename__ = 'rollup_folded_rows'
+    
+    name = Column(String(50), primary_key=True)
+    source_id = Column(Integer, primary_key=True, autoincrement=False)
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from datetime import datetime
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.connection import Base
+
+class ScoringRuleSet(Base):
+    __tablename__ = 'scoring_rule_sets'
+    
+    # The id doubles as the rule set version stamped on scored contacts
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(255), nullable=True)
+    
+    rules = Column(Text, nullable=False)  # JSON: {"rules": [...], "tiers": [...]}
+    is_active = Column(Integer, default=0)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    activated_at = Column(DateTime, nullable=True)
+    
+    def to_dict(self):
+        import json
+        return {
+            'version': self.id,
+            'name': self.name,
+            'rules': json.loads(self.rules) if self.rules else {},
+            'is_active': bool(self.is_active),
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'activated_at': self.activated_at.isoformat() if self.activated_at else None
+        }
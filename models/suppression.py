@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.connection import Base
+
+SUPPRESSION_REASONS = ['bounced', 'complained', 'unsubscribed', 'not_interested', 'manual']
+
+class Suppression(Base):
+    """An email address or whole domain that must not be emailed (value is lowercased)"""
+    __tablename__ = 'suppressions'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    value = Column(String(255), nullable=False, unique=True)  # address, or domain without '@'
+    kind = Column(String(10), nullable=False)  # address, domain
+    reason = Column(String(20), nullable=False, default='manual')
+    source = Column(String(50), nullable=True)  # what added it: webhook, contact, api, migration
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert suppression to dictionary"""
+        return {
+            'id': self.id,
+            'value': self.value,
+            'kind': self.kind,
+            'reason': self.reason,
+            'source': self.source,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -5,6 +5,8 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from services.industry_taxonomy import IndustryTaxonomy
+
 class GooglePlacesScraper:
     def __init__(self, api_key):
         self.api_key = api_key
@@ -149,29 +151,4 @@ class GooglePlacesScraper:
     
     def _categorize_industry(self, types):
         """Map Google place types to our industries"""
-        types_str = ' '.join(types).lower()
-        
-        industry_mapping = {
-            'healthcare': ['doctor', 'physician', 'hospital', 'health', 'medical'],
-            'dental': ['dentist', 'dental'],
-            'veterinary': ['veterinary'],
-            'home_services': ['plumber', 'electrician', 'roofing', 'contractor', 'hvac', 'general_contractor'],
-            'food': ['restaurant', 'cafe', 'bakery', 'food', 'meal_takeaway'],
-            'legal': ['lawyer', 'attorney', 'legal'],
-            'accounting': ['accountant', 'accounting'],
-            'wellness': ['spa', 'gym', 'fitness', 'physiotherapist'],
-            'beauty': ['beauty', 'salon', 'hair'],
-            'retail': ['store', 'shopping', 'clothing'],
-            'real_estate': ['real_estate'],
-            'auto': ['car_repair', 'car_dealer', 'auto'],
-            'pet_services': ['pet', 'grooming'],
-            'cleaning': ['cleaning'],
-            'landscaping': ['landscaping', 'lawn'],
-            'photography': ['photographer'],
-        }
-        
-        for industry, keywords in industry_mapping.items():
-            if any(keyword in types_str for keyword in keywords):
-                return industry
-        
-        return 'other'
+        return IndustryTaxonomy.normalize(types)
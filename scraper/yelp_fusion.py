@@ -4,6 +4,8 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from services.industry_taxonomy import IndustryTaxonomy
+
 class YelpScraper:
     def __init__(self, api_key):
         self.api_key = api_key
@@ -86,19 +88,4 @@ class YelpScraper:
     
     def _categorize_industry(self, categories):
         """Map Yelp categories to our industries"""
-        industry_mapping = {
-            'healthcare': ['physicians', 'dentists', 'veterinarians', 'health'],
-            'home_services': ['plumbing', 'electricians', 'roofing', 'contractors'],
-            'food': ['restaurants', 'cafes', 'bakeries', 'food'],
-            'legal': ['lawyers', 'accountants'],
-            'wellness': ['spas', 'gyms', 'beautysvc'],
-            'retail': ['shopping'],
-        }
-        
-        category_titles = [cat.get('alias', '').lower() for cat in categories]
-        
-        for industry, keywords in industry_mapping.items():
-            if any(keyword in title for title in category_titles for keyword in keywords):
-                return industry
-        
-        return 'other'
+        return IndustryTaxonomy.normalize([cat.get('alias', '') for cat in categories])
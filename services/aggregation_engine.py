@@ -0,0 +1,121 @@
+from sqlalchemy import func, case, select, tuple_
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class AggregationEngine:
+    """
+    Computes many additive metrics over several GROUP BY dimensions in one scan.
+    PostgreSQL gets COUNT(*) FILTER (WHERE ...) with GROUPING SETS; other
+    databases (SQLite) get SUM(CASE ...) grouped by every dimension at once,
+    rolled up per dimension in Python (the group count stays small).
+    """
+    
+    def __init__(self, session):
+        self.session = session
+        self.dialect = session.get_bind().dialect.name
+    
+    @property
+    def supports_grouping_sets(self):
+        return self.dialect == 'postgresql'
+    
+    def count_if(self, condition):
+        """COUNT of rows matching condition"""
+        if self.dialect == 'postgresql':
+            return func.count().filter(condition)
+        return func.sum(case((condition, 1), else_=0))
+    
+    def sum_if(self, expression, condition):
+        """SUM of expression over rows matching condition"""
+        if self.dialect == 'postgresql':
+            return func.sum(expression).filter(condition)
+        return func.sum(case((condition, expression), else_=0))
+    
+    def totals(self, metrics, *filters):
+        """
+        One row of metrics over the whole table.
+        metrics: {name: aggregate expression}
+        """
+        names = list(metrics)
+        row = self.session.execute(
+            select(*[metrics[name].label(name) for name in names]).where(*filters)
+        ).one()
+        return {name: row[index] or 0 for index, name in enumerate(names)}
+    
+    def group_by(self, column, metrics, *filters):
+        """
+        Metrics for each distinct value of one column, from a single GROUP BY.
+        Returns {value: {metric: value}} in the database's group order.
+        """
+        metric_names = list(metrics)
+        query = select(
+            column,
+            *[metrics[name].label(name) for name in metric_names]
+        ).where(*filters).group_by(column)
+        
+        return {
+            row[0]: {name: row[index + 1] or 0 for index, name in enumerate(metric_names)}
+            for row in self.session.execute(query)
+        }
+    
+    def rollup(self, dimensions, metrics, *filters):
+        """
+        Totals plus a per-value breakdown for each dimension, from a single query.
+        dimensions: {name: column}, metrics: {name: additive aggregate (count/sum)}
+        Returns {'total': {metric: value}, 'by': {dimension: {value: {metric: value}}}}
+        """
+        if self.supports_grouping_sets:
+            return self._rollup_grouping_sets(dimensions, metrics, filters)
+        return self._rollup_in_python(dimensions, metrics, filters)
+    
+    def _rollup_grouping_sets(self, dimensions, metrics, filters):
+        dimension_names = list(dimensions)
+        metric_names = list(metrics)
+        columns = [dimensions[name] for name in dimension_names]
+        
+        query = select(
+            *[column.label(f"d_{index}") for index, column in enumerate(columns)],
+            *[func.grouping(column).label(f"g_{index}") for index, column in enumerate(columns)],
+            *[metrics[name].label(name) for name in metric_names]
+        ).where(*filters).group_by(
+            func.grouping_sets(tuple_(), *[tuple_(column) for column in columns])
+        )
+        
+        result = {'total': dict.fromkeys(metric_names, 0), 'by': {name: {} for name in dimension_names}}
+        width = len(columns)
+        for row in self.session.execute(query):
+            values = {name: row[2 * width + index] or 0 for index, name in enumerate(metric_names)}
+            grouped = [index for index in range(width) if row[width + index] == 0]
+            if not grouped:
+                result['total'] = values
+            else:
+                index = grouped[0]
+                result['by'][dimension_names[index]][row[index]] = values
+        return result
+    
+    def _rollup_in_python(self, dimensions, metrics, filters):
+        dimension_names = list(dimensions)
+        metric_names = list(metrics)
+        columns = [dimensions[name] for name in dimension_names]
+        
+        query = select(
+            *columns,
+            *[metrics[name].label(name) for name in metric_names]
+        ).where(*filters).group_by(*columns)
+        
+        total = dict.fromkeys(metric_names, 0)
+        by = {name: {} for name in dimension_names}
+        width = len(columns)
+        for row in self.session.execute(query):
+            values = [row[width + index] or 0 for index in range(len(metric_names))]
+            for index, name in enumerate(metric_names):
+                total[name] += values[index]
+            for index, dimension in enumerate(dimension_names):
+                bucket = by[dimension].get(row[index])
+                if bucket is None:
+                    by[dimension][row[index]] = dict(zip(metric_names, values))
+                else:
+                    for name, value in zip(metric_names, values):
+                        bucket[name] += value
+        return {'total': total, 'by': by}
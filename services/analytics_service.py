@@ -6,78 +6,68 @@ from database.connection import get_session
 from models.contact import Contact
 from models.outreach import Outreach
 from models.campaign import Campaign
+from services.aggregation_engine import AggregationEngine
+from services.contact_stats_service import ContactStatsService
+from models.contact_stats import KEY_FIELDS as ROLLUP_DIMENSIONS
 from sqlalchemy import func, and_
 from datetime import datetime, timedelta
 import json
 
 class AnalyticsService:
     
+    @staticmethod
+    def contact_groups(session, engine, dimensions):
+        """
+        Totals and per-dimension breakdowns of performance_metrics.
+        Read from the contact_stats rollup (O(groups)); falls back to one live
+        scan of contacts when the rollup is missing or not yet built.
+        """
+        try:
+            if all(dimension in ROLLUP_DIMENSIONS for dimension in dimensions):
+                groups = ContactStatsService.rollup(session, dimensions)
+                if groups['total']['total']:
+                    return groups
+        except Exception as e:
+            session.rollback()
+            print(f"contact_stats unavailable, aggregating contacts directly: {str(e)}", flush=True)
+        
+        return engine.rollup(
+            {dimension: AnalyticsService.BREAKDOWN_DIMENSIONS[dimension] for dimension in dimensions},
+            AnalyticsService.performance_metrics(engine)
+        )
+    
     @staticmethod
     def get_dashboard_stats():
-        """Get overall dashboard statistics for lead gen"""
+        """Get overall dashboard statistics for lead gen (from the contact_stats rollup)"""
         session = get_session()
         try:
-            # Total contacts
-            total_contacts = session.query(func.count(Contact.id)).scalar()
-            
-            # By tier
-            tier_breakdown = session.query(
-                Contact.tier,
-                func.count(Contact.id)
-            ).group_by(Contact.tier).all()
-            
-            # By industry
-            industry_breakdown = session.query(
-                Contact.industry,
-                func.count(Contact.id)
-            ).group_by(Contact.industry).all()
+            engine = AggregationEngine(session)
             
-            # By source
-            source_breakdown = session.query(
-                Contact.source,
-                func.count(Contact.id)
-            ).group_by(Contact.source).all()
+            contacts = AnalyticsService.contact_groups(session, engine, ['tier', 'industry', 'source'])
+            totals = contacts['total']
             
-            # Email availability
-            with_email = session.query(func.count(Contact.id)).filter(
-                Contact.email.isnot(None),
-                Contact.email != ''
-            ).scalar()
-            
-            # Contacted stats
-            total_contacted = session.query(func.count(Contact.id)).filter(
-                Contact.total_touches > 0
-            ).scalar()
-            
-            total_replied = session.query(func.count(Contact.id)).filter(
-                Contact.has_replied == 1
-            ).scalar()
-            
-            total_converted = session.query(func.count(Contact.id)).filter(
-                Contact.status == 'Converted'
-            ).scalar()
+            total_contacts = totals['total']
+            with_email = totals['with_email']
+            total_contacted = totals['contacted']
+            total_replied = totals['replied']
+            total_converted = totals['converted']
             
             # Calculate rates
             reply_rate = (total_replied / total_contacted * 100) if total_contacted > 0 else 0
             conversion_rate = (total_converted / total_contacted * 100) if total_contacted > 0 else 0
             
             # Average website health by tier
-            avg_health_by_tier = session.query(
-                Contact.tier,
-                func.avg(Contact.website_health_score)
-            ).filter(Contact.website_health_score.isnot(None)).group_by(Contact.tier).all()
-            
-            # AI opportunity counts
-            high_ai_opportunity = session.query(func.count(Contact.id)).filter(
-                Contact.ai_opportunity_score > 60
-            ).scalar()
+            avg_health_by_tier = {
+                tier: values['health_sum'] / values['health_count']
+                for tier, values in contacts['by']['tier'].items()
+                if values['health_count']
+            }
             
             # Campaign stats
-            active_campaigns = session.query(func.count(Campaign.id)).filter(
-                Campaign.is_active == 1
-            ).scalar()
-            
-            total_campaign_sends = session.query(func.sum(Campaign.total_sent)).scalar() or 0
+            campaigns = engine.totals({
+                'active_campaigns': engine.count_if(Campaign.is_active == 1),
+                'total_campaign_sends': func.sum(Campaign.total_sent),
+            })
             
             return {
                 'total_contacts': total_contacts,
@@ -88,110 +78,112 @@ class AnalyticsService:
                 'total_converted': total_converted,
                 'reply_rate': round(reply_rate, 2),
                 'conversion_rate': round(conversion_rate, 2),
-                'tier_breakdown': dict(tier_breakdown),
-                'industry_breakdown': dict(industry_breakdown),
-                'source_breakdown': dict(source_breakdown),
-                'avg_health_by_tier': dict(avg_health_by_tier),
-                'high_ai_opportunity': high_ai_opportunity,
-                'active_campaigns': active_campaigns,
-                'total_campaign_sends': total_campaign_sends
+                'tier_breakdown': {tier: values['total'] for tier, values in contacts['by']['tier'].items()},
+                'industry_breakdown': {industry: values['total'] for industry, values in contacts['by']['industry'].items()},
+                'source_breakdown': {source: values['total'] for source, values in contacts['by']['source'].items()},
+                'avg_health_by_tier': avg_health_by_tier,
+                'high_ai_opportunity': totals['high_ai_opportunity'],
+                'active_campaigns': campaigns['active_campaigns'],
+                'total_campaign_sends': campaigns['total_campaign_sends']
             }
         finally:
             session.close()
     
+    # Dimensions contacts can be broken down by
+    BREAKDOWN_DIMENSIONS = {
+        'industry': Contact.industry,
+        'source': Contact.source,
+        'tier': Contact.tier,
+        'city': Contact.city,
+        'job_category': Contact.job_category,
+    }
+    
     @staticmethod
-    def get_industry_performance():
-        """Get performance metrics by industry"""
+    def performance_metrics(engine):
+        """Additive per-group contact metrics shared by every breakdown"""
+        return {
+            'total': func.count(Contact.id),
+            'with_email': engine.count_if(and_(Contact.email.isnot(None), Contact.email != '')),
+            'contacted': engine.count_if(Contact.total_touches > 0),
+            'replied': engine.count_if(Contact.has_replied == 1),
+            'converted': engine.count_if(Contact.status == 'Converted'),
+            'high_ai_opportunity': engine.count_if(Contact.ai_opportunity_score > 60),
+            'health_sum': func.sum(Contact.website_health_score),
+            'health_count': func.count(Contact.website_health_score),
+        }
+    
+    @staticmethod
+    def performance_row(dimension, value, metrics):
+        """Turn one group's additive metrics into counts and rates"""
+        total = metrics['total']
+        contacted = metrics['contacted']
+        return {
+            dimension: value,
+            'total': total,
+            'with_email': metrics['with_email'],
+            'email_rate': round((metrics['with_email'] / total * 100) if total > 0 else 0, 2),
+            'contacted': contacted,
+            'replied': metrics['replied'],
+            'converted': metrics['converted'],
+            'reply_rate': round((metrics['replied'] / contacted * 100) if contacted > 0 else 0, 2),
+            'conversion_rate': round((metrics['converted'] / contacted * 100) if contacted > 0 else 0, 2),
+            'avg_health_score': round(metrics['health_sum'] / metrics['health_count'], 2) if metrics['health_count'] else None
+        }
+    
+    @staticmethod
+    def get_breakdown(dimension, values=None):
+        """
+        Performance metrics per value of a dimension (industry, source, tier, city, job_category).
+        values: only include these values. Reads the rollup for rollup key
+        dimensions, otherwise runs a single GROUP BY query.
+        """
+        column = AnalyticsService.BREAKDOWN_DIMENSIONS.get(dimension)
+        if column is None:
+            raise ValueError(f"Unknown dimension '{dimension}'")
+        
         session = get_session()
         try:
-            industries = session.query(Contact.industry).distinct().all()
-            
-            results = []
-            for (industry,) in industries:
-                if not industry:
-                    continue
-                
-                total = session.query(func.count(Contact.id)).filter(
-                    Contact.industry == industry
-                ).scalar()
-                
-                contacted = session.query(func.count(Contact.id)).filter(
-                    and_(Contact.industry == industry, Contact.total_touches > 0)
-                ).scalar()
-                
-                replied = session.query(func.count(Contact.id)).filter(
-                    and_(Contact.industry == industry, Contact.has_replied == 1)
-                ).scalar()
-                
-                converted = session.query(func.count(Contact.id)).filter(
-                    and_(Contact.industry == industry, Contact.status == 'Converted')
-                ).scalar()
-                
-                reply_rate = (replied / contacted * 100) if contacted > 0 else 0
-                conversion_rate = (converted / contacted * 100) if contacted > 0 else 0
-                
-                results.append({
-                    'industry': industry,
-                    'total': total,
-                    'contacted': contacted,
-                    'replied': replied,
-                    'converted': converted,
-                    'reply_rate': round(reply_rate, 2),
-                    'conversion_rate': round(conversion_rate, 2)
-                })
-            
-            # Sort by conversion rate
-            results.sort(key=lambda x: x['conversion_rate'], reverse=True)
-            
-            return results
-            
+            engine = AggregationEngine(session)
+            if dimension in ROLLUP_DIMENSIONS:
+                groups = AnalyticsService.contact_groups(session, engine, [dimension])['by'][dimension]
+                groups = {
+                    value: metrics for value, metrics in groups.items()
+                    if (value in values if values is not None else value is not None)
+                }
+            else:
+                filters = [column.in_(values)] if values is not None else [column.isnot(None)]
+                groups = engine.group_by(column, AnalyticsService.performance_metrics(engine), *filters)
+            
+            return [
+                AnalyticsService.performance_row(dimension, value, metrics)
+                for value, metrics in groups.items()
+            ]
         finally:
             session.close()
     
+    @staticmethod
+    def get_industry_performance():
+        """Get performance metrics by industry"""
+        results = [
+            {key: row[key] for key in ('industry', 'total', 'contacted', 'replied', 'converted', 'reply_rate', 'conversion_rate')}
+            for row in AnalyticsService.get_breakdown('industry')
+            if row['industry']
+        ]
+        
+        # Sort by conversion rate
+        results.sort(key=lambda x: x['conversion_rate'], reverse=True)
+        
+        return results
+    
     @staticmethod
     def get_source_performance():
         """Compare Google vs Yelp lead quality"""
-        session = get_session()
-        try:
-            sources = ['google', 'yelp', 'manual']
-            
-            results = []
-            for source in sources:
-                total = session.query(func.count(Contact.id)).filter(
-                    Contact.source == source
-                ).scalar()
-                
-                if total == 0:
-                    continue
-                
-                with_email = session.query(func.count(Contact.id)).filter(
-                    and_(Contact.source == source, Contact.email.isnot(None), Contact.email != '')
-                ).scalar()
-                
-                contacted = session.query(func.count(Contact.id)).filter(
-                    and_(Contact.source == source, Contact.total_touches > 0)
-                ).scalar()
-                
-                replied = session.query(func.count(Contact.id)).filter(
-                    and_(Contact.source == source, Contact.has_replied == 1)
-                ).scalar()
-                
-                avg_health = session.query(func.avg(Contact.website_health_score)).filter(
-                    and_(Contact.source == source, Contact.website_health_score.isnot(None))
-                ).scalar()
-                
-                results.append({
-                    'source': source,
-                    'total': total,
-                    'with_email': with_email,
-                    'email_rate': round((with_email / total * 100), 2),
-                    'contacted': contacted,
-                    'replied': replied,
-                    'reply_rate': round((replied / contacted * 100) if contacted > 0 else 0, 2),
-                    'avg_health_score': round(avg_health, 2) if avg_health else None
-                })
-            
-            return results
-            
-        finally:
-            session.close()
+        sources = ['google', 'yelp', 'manual']
+        
+        by_source = {row['source']: row for row in AnalyticsService.get_breakdown('source', sources)}
+        
+        return [
+            {key: by_source[source][key] for key in ('source', 'total', 'with_email', 'email_rate', 'contacted', 'replied', 'reply_rate', 'avg_health_score')}
+            for source in sources
+            if source in by_source
+        ]
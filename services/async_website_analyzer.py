@@ -0,0 +1,133 @@
+import asyncio
+import aiohttp
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.website_analyzer import WebsiteAnalyzer
+from services.fetch_scheduler import RobotsDisallowed, CrawlBudgetExceeded
+from services.parsing_stage import ParsingStage
+
+class AsyncWebsiteAnalyzer(WebsiteAnalyzer):
+    """
+    asyncio variant of WebsiteAnalyzer for large enrichment batches.
+    Fetches are multiplexed on one event loop; HTML parsing runs in a process pool.
+    """
+    
+    def __init__(self, max_concurrency=200, per_host_limit=4, dns_cache_ttl=300, parsing_stage=None, **kwargs):
+        """
+        max_concurrency: fetches in flight at once across all hosts
+        per_host_limit: open connections allowed per host
+        dns_cache_ttl: seconds resolved hostnames stay cached
+        parsing_stage: ParsingStage used for HTML parsing (defaults to the shared one)
+        """
+        super().__init__(parsing_stage=parsing_stage or ParsingStage.shared(), **kwargs)
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        self.dns_cache_ttl = dns_cache_ttl
+    
+    def analyze_many(self, urls):
+        """Analyze a list of websites, returning results in the same order (None for empty URLs)"""
+        return asyncio.run(self.analyze_many_async(urls))
+    
+    async def analyze_many_async(self, urls):
+        """Coroutine version of analyze_many for callers already inside an event loop"""
+        if not urls:
+            return []
+        
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrency,
+            limit_per_host=self.per_host_limit,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_cache_ttl
+        )
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async with aiohttp.ClientSession(connector=connector, headers=self.headers) as session:
+            tasks = [self._analyze_one(session, semaphore, url) for url in urls]
+            return await asyncio.gather(*tasks)
+    
+    async def _analyze_one(self, session, semaphore, url):
+        """Fetch and analyze a single website"""
+        if not url:
+            return None
+        
+        # Ensure URL has protocol
+        if not url.startswith('http'):
+            url = f'https://{url}'
+        
+        result = self.new_result(url)
+        
+        try:
+            final_url, content_type, encoding, content, truncated, load_time = await self._fetch(session, semaphore, url)
+            
+            result['page_load_speed'] = round(load_time, 2)
+            result['content_type'] = content_type
+            result['bytes_read'] = len(content)
+            result['truncated'] = truncated
+            result['has_https'] = final_url.startswith('https://')
+            
+            if not self._is_html(content_type):
+                result['skipped'] = True
+                result['skip_reason'] = 'non_html'
+                result['health_score'] = self._calculate_health_score(result, load_time)
+                return result
+            
+            # Parsing is CPU-bound, keep it off the event loop
+            page = await asyncio.wrap_future(self.parsing_stage.submit(content, final_url, encoding))
+            result.update(page)
+            
+            return self.score_result(result, load_time)
+        
+        except (RobotsDisallowed, CrawlBudgetExceeded) as e:
+            result['skipped'] = True
+            result['skip_reason'] = 'robots' if isinstance(e, RobotsDisallowed) else 'crawl_budget'
+            return result
+        
+        except Exception as e:
+            print(f"Error analyzing {url}: {str(e)}")
+            return result
+    
+    async def _fetch(self, session, semaphore, url):
+        """
+        Stream a page under the same byte budget as WebsiteAnalyzer.fetch_page; returns the page and its load time.
+        The global semaphore is taken only once the host's slot (and politeness delay) is granted,
+        so a fetch waiting on a slow host doesn't hold a slot other hosts could use.
+        """
+        if self.scheduler is None:
+            return await self._timed_fetch(session, semaphore, url)
+        
+        async with self.scheduler.async_slot(url) as host_key:
+            return await self._timed_fetch(session, semaphore, url, host_key)
+    
+    async def _timed_fetch(self, session, semaphore, url, host_key=None):
+        async with semaphore:
+            start_time = time.time()
+            page = await self._fetch_page_async(session, url, host_key)
+            return page + (time.time() - start_time,)
+    
+    async def _fetch_page_async(self, session, url, host_key=None):
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        
+        async with session.get(url, timeout=timeout, allow_redirects=True) as response:
+            if host_key is not None:
+                self.scheduler.record_response(host_key, response.status, response.headers.get('Retry-After'))
+            
+            content_type = response.headers.get('Content-Type')
+            final_url = str(response.url)
+            
+            if not self._is_html(content_type):
+                return final_url, content_type, response.charset, b'', False
+            
+            buffer = bytearray()
+            head_end = -1
+            truncated = False
+            
+            async for chunk in response.content.iter_chunked(self.CHUNK_SIZE):
+                head_end, truncated = self._consume_chunk(buffer, chunk, head_end)
+                if truncated:
+                    break
+            
+            return final_url, content_type, response.charset, bytes(buffer), truncated
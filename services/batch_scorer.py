@@ -0,0 +1,134 @@
+import json
+import time
+import numpy as np
+from sqlalchemy import update, or_
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import get_session
+from models.contact import Contact
+from services.rules_engine import RulesEngine
+from services.contact_stats_service import ContactStatsService
+
+class BatchScorer:
+    """
+    Re-tiers the whole database with a compiled scoring rule set.
+    Scoring columns are pulled in id-ordered chunks, scored with the rule set's
+    vectorized plan and written back with bulk UPDATEs. Results are identical
+    to LeadScorer.score_lead with the same rule set.
+    """
+    
+    def __init__(self, chunk_size=50000, progress_callback=None, rule_set=None):
+        """rule_set: CompiledRuleSet to apply (defaults to the active one)"""
+        self.chunk_size = chunk_size
+        self.progress_callback = progress_callback
+        self.rule_set = rule_set or RulesEngine.active()
+    
+    def scoring_columns(self):
+        """id, stored tier/tags/version, then every field the rule set reads"""
+        return [Contact.id, Contact.tier, Contact.tags, Contact.score_version] + [
+            getattr(Contact, field) for field in self.rule_set.fields
+        ]
+    
+    def score_rows(self, rows):
+        """
+        Score rows shaped like scoring_columns().
+        Returns (ids, tiers, tags, changed) arrays; changed marks rows whose stored tier/tags/version differ.
+        """
+        if not rows:
+            empty = np.array([], dtype=object)
+            return empty, empty, empty, np.array([], dtype=bool)
+        
+        columns = list(zip(*rows))
+        ids, current_tiers, current_tags, current_versions = columns[:4]
+        fields = dict(zip(self.rule_set.fields, columns[4:]))
+        
+        tiers, tags = self.rule_set.evaluate_columns(fields, len(rows))
+        
+        # Stored tags read back as lists; compare them in the JSON form the rule set produces
+        current_tags = [json.dumps(stored) if stored is not None else None for stored in current_tags]
+        
+        changed = (
+            (tiers != np.array(current_tiers, dtype=object))
+            | (tags != np.array(current_tags, dtype=object))
+            | (np.array(current_versions, dtype=object) != self.rule_set.version)
+        )
+        
+        return np.array(ids, dtype=object), tiers, tags, changed
+    
+    def report_progress(self, message, step=None, total=None):
+        print(message, flush=True)
+        if self.progress_callback:
+            self.progress_callback(message, step, total)
+    
+    def rescore_all(self, only_enriched=True, only_stale=False):
+        """
+        Re-tier contacts with the rule set.
+        only_stale: skip contacts already scored under this rule set version
+        Only rows whose tier, tags or version actually change are written.
+        """
+        session = get_session()
+        # Bulk UPDATEs bypass the contact_stats hooks; rebuild the rollup once at the end instead of per chunk
+        session.info['defer_contact_stats'] = True
+        start_time = time.time()
+        version = self.rule_set.version
+        
+        try:
+            filters = []
+            if only_enriched:
+                filters.append(Contact.is_enriched == 1)
+            if only_stale:
+                filters.append(or_(Contact.score_version.is_(None), Contact.score_version != version))
+            
+            base_query = session.query(*self.scoring_columns()).filter(*filters)
+            total = session.query(Contact.id).filter(*filters).count()
+            
+            scored = 0
+            updated = 0
+            last_id = 0
+            
+            self.report_progress(f"Rescoring {total} contacts with rule set v{version}...", 0, total)
+            
+            while True:
+                # Keyset pagination keeps each chunk an index range scan
+                rows = base_query.filter(Contact.id > last_id).order_by(Contact.id).limit(self.chunk_size).all()
+                if not rows:
+                    break
+                
+                last_id = rows[-1][0]
+                ids, tiers, tags, changed = self.score_rows(rows)
+                changes = [
+                    {'id': contact_id, 'tier': tier, 'tags': tag_list, 'score_version': version}
+                    for contact_id, tier, tag_list in zip(ids[changed], tiers[changed], tags[changed])
+                ]
+                
+                if changes:
+                    session.execute(update(Contact), changes)
+                    session.commit()
+                
+                scored += len(rows)
+                updated += len(changes)
+                self.report_progress(f"Rescored {scored}/{total} contacts ({updated} changed)", scored, total)
+            
+            if updated:
+                ContactStatsService.reconcile()
+            
+            elapsed = round(time.time() - start_time, 2)
+            self.report_progress(f"Rescore complete: {updated} of {scored} contacts changed in {elapsed}s", scored, total)
+            
+            return {
+                'success': True,
+                'version': version,
+                'scored': scored,
+                'updated': updated,
+                'elapsed_seconds': elapsed
+            }
+        
+        except Exception as e:
+            session.rollback()
+            return {'success': False, 'error': str(e)}
+        
+        finally:
+            session.close()
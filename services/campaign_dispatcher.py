@@ -0,0 +1,255 @@
+from sqlalchemy import update
+from datetime import datetime, timedelta
+import math
+import threading
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import get_session
+from models.campaign import Campaign
+from services.campaign_service import CampaignService
+from services.job_lease import Lease
+from config import (CAMPAIGN_SEND_WINDOW_START, CAMPAIGN_SEND_WINDOW_END, CAMPAIGN_DISPATCH_INTERVAL,
+                    CAMPAIGN_DISPATCH_MAX_PER_TICK, CAMPAIGN_DISPATCH_LEASE, CAMPAIGN_DISPATCHER_INLINE)
+
+class CampaignDispatcher:
+    """
+    Sends active campaigns on a schedule.
+    Each tick, a campaign is owed its daily_limit times the share of today's send
+    window that will have passed by the next tick, less what it already queued
+    today (campaign_daily_sends). Owed sends go through send_campaign_batch, which
+    pages through the campaign's pending recipients, so a tick never scans contacts.
+    max_per_tick is split evenly across campaigns, least recently dispatched first.
+    Several processes can run a dispatcher, but only the one holding the
+    'campaign_dispatcher' lease ticks: it is taken before a tick, renewed before
+    each campaign's batch and released when the tick finishes. A holder that dies
+    mid-tick lets the lease lapse after CAMPAIGN_DISPATCH_LEASE seconds.
+    """
+    
+    _shared = None
+    _shared_lock = threading.Lock()
+    
+    def __init__(self, interval=CAMPAIGN_DISPATCH_INTERVAL, max_per_tick=CAMPAIGN_DISPATCH_MAX_PER_TICK,
+                 window_start=CAMPAIGN_SEND_WINDOW_START, window_end=CAMPAIGN_SEND_WINDOW_END,
+                 lease_seconds=CAMPAIGN_DISPATCH_LEASE):
+        """
+        interval: seconds between ticks
+        max_per_tick: emails queued per tick across all campaigns
+        window_start, window_end: 'HH:MM' local times (CAMPAIGN_TIMEZONE) sends are spread over
+        lease_seconds: how long the dispatch lease outlives its last renewal
+        """
+        self.interval = interval
+        self.max_per_tick = max_per_tick
+        self.lease = Lease('campaign_dispatcher', lease_seconds)
+        self.window_start = datetime.strptime(window_start, '%H:%M').time()
+        self.window_end = datetime.strptime(window_end, '%H:%M').time()
+        if self.window_end <= self.window_start:
+            raise ValueError("Send window must end after it starts")
+        
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+    
+    @classmethod
+    def shared(cls):
+        """Process-wide dispatcher"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+    
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='campaign-dispatcher', daemon=True)
+            self._thread.start()
+        print(f"🗓️ Campaign dispatcher started (every {self.interval}s, {self.window_start:%H:%M}-{self.window_end:%H:%M})", flush=True)
+    
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"Campaign dispatcher error: {str(e)}", flush=True)
+            self._stop.wait(self.interval)
+    
+    def window_share(self, now=None):
+        """
+        Share of today's daily_limit due by the next tick (0-1), or None outside the send window.
+        Aiming one tick ahead lets the last tick of the window reach the full limit.
+        """
+        local_now = CampaignService.local_time(now)
+        start = datetime.combine(local_now.date(), self.window_start, tzinfo=local_now.tzinfo)
+        end = datetime.combine(local_now.date(), self.window_end, tzinfo=local_now.tzinfo)
+        if local_now < start or local_now >= end:
+            return None
+        elapsed = local_now + timedelta(seconds=self.interval) - start
+        return min(1.0, elapsed / (end - start))
+    
+    @staticmethod
+    def allocate(owed, budget):
+        """Split budget across campaigns as evenly as their owed counts allow; owed is in priority order"""
+        shares = dict.fromkeys(owed, 0)
+        remaining = {campaign_id: count for campaign_id, count in owed.items() if count > 0}
+        while budget > 0 and remaining:
+            each = max(1, budget // len(remaining))
+            for campaign_id in list(remaining):
+                if budget <= 0:
+                    break
+                given = min(each, remaining[campaign_id], budget)
+                shares[campaign_id] += given
+                remaining[campaign_id] -= given
+                budget -= given
+                if not remaining[campaign_id]:
+                    del remaining[campaign_id]
+        return shares
+    
+    def owed(self, session, now):
+        """{campaign_id: emails owed this tick} for active campaigns, least recently dispatched first"""
+        share = self.window_share(now)
+        if share is None:
+            return {}
+        
+        campaigns = session.query(
+            Campaign.id, Campaign.daily_limit, Campaign.launched_at, Campaign.total_pending
+        ).filter(
+            Campaign.is_active == 1, Campaign.completed_at.is_(None)
+        ).order_by(
+            Campaign.last_dispatched_at.isnot(None), Campaign.last_dispatched_at, Campaign.id
+        ).all()
+        if not campaigns:
+            return {}
+        
+        sent_today = CampaignService.sent_on(session, [c.id for c in campaigns], CampaignService.send_day(now))
+        owed = {}
+        for campaign in campaigns:
+            due = math.ceil((campaign.daily_limit or 0) * share) - sent_today.get(campaign.id, 0)
+            if campaign.launched_at:
+                due = min(due, campaign.total_pending or 0)
+            if due > 0:
+                owed[campaign.id] = due
+        return owed
+    
+    def mark_dispatched(self, session, campaign_ids, now):
+        """Record this tick's campaigns so the next tick serves the others first"""
+        session.execute(
+            update(Campaign)
+            .where(Campaign.id.in_(campaign_ids))
+            .values(last_dispatched_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+    
+    def complete_finished(self, session, now):
+        """Mark launched campaigns with no pending recipients left as completed"""
+        session.execute(
+            update(Campaign)
+            .where(
+                Campaign.is_active == 1,
+                Campaign.completed_at.is_(None),
+                Campaign.launched_at.isnot(None),
+                Campaign.total_pending <= 0
+            )
+            .values(completed_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+    
+    def tick(self):
+        """Queue the sends active campaigns owe right now; returns {campaign_id: emails queued}"""
+        if not self.lease.acquire():
+            return {}
+        try:
+            return self._tick()
+        finally:
+            self.lease.release()
+    
+    def _tick(self):
+        now = datetime.utcnow()
+        session = get_session()
+        try:
+            owed = self.owed(session, now)
+            if not owed:
+                return {}
+            self.mark_dispatched(session, list(owed), now)
+        finally:
+            session.close()
+        
+        shares = self.allocate(owed, self.max_per_tick)
+        queued = {}
+        for campaign_id, share in shares.items():
+            if not share:
+                continue
+            if not self.lease.renew():
+                print("Campaign dispatch lease lost; ending tick early", flush=True)
+                break
+            result = CampaignService.send_campaign_batch(campaign_id, batch_size=share, preview_mode=False)
+            if result['success']:
+                queued[campaign_id] = result['sent']
+            else:
+                print(f"Campaign {campaign_id} dispatch failed: {result['error']}", flush=True)
+        
+        session = get_session()
+        try:
+            self.complete_finished(session, now)
+        finally:
+            session.close()
+        
+        if queued:
+            print(f"🗓️ Dispatched {sum(queued.values())} emails across {len(queued)} campaigns", flush=True)
+        return queued
+    
+    def schedule(self):
+        """Today's quota and progress for each active campaign"""
+        now = datetime.utcnow()
+        session = get_session()
+        try:
+            campaigns = session.query(Campaign).filter(Campaign.is_active == 1).order_by(Campaign.id).all()
+            sent_today = CampaignService.sent_on(session, [c.id for c in campaigns], CampaignService.send_day(now))
+            share = self.window_share(now)
+            return {
+                'window': {
+                    'start': self.window_start.strftime('%H:%M'),
+                    'end': self.window_end.strftime('%H:%M'),
+                    'open': share is not None
+                },
+                'campaigns': [
+                    {
+                        'campaign_id': campaign.id,
+                        'name': campaign.name,
+                        'daily_limit': campaign.daily_limit,
+                        'sent_today': sent_today.get(campaign.id, 0),
+                        'remaining_today': max((campaign.daily_limit or 0) - sent_today.get(campaign.id, 0), 0),
+                        'total_pending': campaign.total_pending if campaign.launched_at else None,
+                        'completed_at': campaign.completed_at.isoformat() if campaign.completed_at else None
+                    }
+                    for campaign in campaigns
+                ]
+            }
+        finally:
+            session.close()
+    
+    @staticmethod
+    def start_inline():
+        """Run the shared dispatcher in this process unless a dedicated one is configured"""
+        if CAMPAIGN_DISPATCHER_INLINE:
+            CampaignDispatcher.shared().start()
+
+if __name__ == '__main__':
+    # Dedicated dispatcher process: set CAMPAIGN_DISPATCHER_INLINE=False on the web process and run this
+    dispatcher = CampaignDispatcher()
+    dispatcher.start()
+    try:
+        while True:
+            dispatcher._stop.wait(60)
+    except KeyboardInterrupt:
+        dispatcher.stop()
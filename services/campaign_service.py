@@ -3,29 +3,43 @@ import os
 import json
 import csv
 import io
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+from sqlalchemy import func, update, select, literal, DateTime
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.connection import get_session
+from database.json_columns import contains_any
+from database.upsert import increment_rows
 from models.contact import Contact
 from models.campaign import Campaign
-from models.outreach import Outreach
+from models.campaign_recipient import CampaignRecipient
+from models.campaign_daily_send import CampaignDailySend
+from services.email_outbox import EmailOutbox, OutboxSender
+from services.template_engine import compile_template, TemplateError
+from services.suppression_list import suppression_list, not_suppressed
+from config import CAMPAIGN_TIMEZONE
 
 class CampaignService:
     
     @staticmethod
-    def create_campaign(name, subject_lines, email_body, target_industries, target_tiers, target_sources, daily_limit):
+    def create_campaign(name, subject_lines, email_body, target_industries, target_tiers, target_sources, daily_limit, target_tags=None):
         """Create a new email campaign"""
         session = get_session()
         try:
+            # Reject templates the engine can't parse before saving them
+            for source in list(subject_lines or []) + [email_body]:
+                compile_template(source)
+            
             campaign = Campaign(
                 name=name,
                 subject_lines=json.dumps(subject_lines),
                 email_body=email_body,
-                target_industries=json.dumps(target_industries),
-                target_tiers=json.dumps(target_tiers),
-                target_sources=json.dumps(target_sources),
+                target_industries=target_industries,
+                target_tiers=target_tiers,
+                target_sources=target_sources,
+                target_tags=target_tags,
                 daily_limit=daily_limit
             )
             session.add(campaign)
@@ -38,198 +52,413 @@ class CampaignService:
             session.close()
     
     @staticmethod
-    def get_campaign_recipients(campaign_id):
-        """Get list of contacts that match campaign criteria"""
+    def recipient_conditions(campaign):
+        """SQL conditions selecting the contacts a campaign targets"""
+        # Targeting criteria (lists)
+        target_industries = campaign.target_industries or []
+        target_tiers = campaign.target_tiers or []
+        target_sources = campaign.target_sources or []
+        target_tags = campaign.target_tags or []
+        
+        conditions = [
+            Contact.email.isnot(None),
+            Contact.email != ''
+        ]
+        
+        if target_industries:
+            conditions.append(Contact.industry.in_(target_industries))
+        
+        if target_tiers:
+            conditions.append(Contact.tier.in_(target_tiers))
+        
+        if target_sources:
+            conditions.append(Contact.source.in_(target_sources))
+        
+        if target_tags:
+            conditions.append(contains_any(Contact.tags, target_tags))
+        
+        # Suppressed addresses and domains never enter the audience
+        conditions.append(not_suppressed())
+        
+        # Contacts already emailed by this campaign are excluded by its campaign_recipients snapshot
+        return conditions
+    
+    @staticmethod
+    def launch_campaign(campaign_id):
+        """
+        Freeze the campaign's audience into campaign_recipients with one INSERT ... SELECT.
+        Later previews, recipient lists and sends read the snapshot, so contacts
+        added or retargeted after launch don't change who the campaign emails.
+        """
         session = get_session()
         try:
             campaign = session.query(Campaign).filter(Campaign.id == campaign_id).first()
             if not campaign:
                 return {'success': False, 'error': 'Campaign not found'}
             
-            # Parse targeting criteria
-            target_industries = json.loads(campaign.target_industries) if campaign.target_industries else []
-            target_tiers = json.loads(campaign.target_tiers) if campaign.target_tiers else []
-            target_sources = json.loads(campaign.target_sources) if campaign.target_sources else []
+            if campaign.launched_at:
+                return {'success': True, 'already_launched': True, 'campaign': campaign.to_dict()}
             
-            # Build query
-            query = session.query(Contact).filter(
-                Contact.email.isnot(None),
-                Contact.email != ''
+            now = datetime.utcnow()
+            audience = select(
+                literal(campaign.id), Contact.id, literal('pending'), literal(now, DateTime)
+            ).where(*CampaignService.recipient_conditions(campaign))
+            session.execute(
+                CampaignRecipient.__table__.insert().from_select(['campaign_id', 'contact_id', 'status', 'created_at'], audience)
             )
             
-            # Apply filters
-            if target_industries:
-                query = query.filter(Contact.industry.in_(target_industries))
-            
-            if target_tiers:
-                query = query.filter(Contact.tier.in_(target_tiers))
-            
-            if target_sources:
-                query = query.filter(Contact.source.in_(target_sources))
-            
-            # Exclude already contacted in this campaign
-            # (For now, exclude anyone contacted in last 7 days)
-            seven_days_ago = datetime.utcnow() - timedelta(days=7)
-            query = query.filter(
-                (Contact.last_contacted.is_(None)) | 
-                (Contact.last_contacted < seven_days_ago)
-            )
-            
-            contacts = query.all()
-            
-            return {
-                'success': True,
-                'recipients': [c.to_dict() for c in contacts],
-                'count': len(contacts)
-            }
+            audience_size = session.query(func.count(CampaignRecipient.id)).filter(
+                CampaignRecipient.campaign_id == campaign.id
+            ).scalar()
+            campaign.audience_size = audience_size
+            campaign.total_pending = audience_size
+            campaign.launched_at = now
+            session.commit()
             
+            print(f"Launched campaign {campaign.id}: {audience_size} recipients", flush=True)
+            return {'success': True, 'already_launched': False, 'campaign': campaign.to_dict()}
+        
+        except Exception as e:
+            session.rollback()
+            return {'success': False, 'error': str(e)}
+        
         finally:
             session.close()
     
     @staticmethod
-    def generate_preview_csv(campaign_id):
-        """Generate preview CSV of campaign recipients and emails"""
+    def audience_query(session, campaign, *entities, statuses=None):
+        """
+        Query for entities over the campaign's audience, in a stable order.
+        Launched campaigns read their snapshot (only recipients in statuses, if given);
+        others evaluate the targeting against contacts.
+        """
+        if not campaign.launched_at:
+            return session.query(*entities).filter(*CampaignService.recipient_conditions(campaign)).order_by(Contact.id)
+        
+        query = session.query(*entities).select_from(CampaignRecipient).join(
+            Contact, Contact.id == CampaignRecipient.contact_id
+        ).filter(CampaignRecipient.campaign_id == campaign.id)
+        if statuses:
+            query = query.filter(CampaignRecipient.status.in_(statuses))
+        return query.order_by(CampaignRecipient.id)
+    
+    @staticmethod
+    def recipient_counts(campaign):
+        """Recipients per status from the campaign's counters (no scan)"""
+        pending = campaign.total_pending or 0
+        sent = campaign.total_sent or 0
+        failed = campaign.total_failed or 0
+        replied = campaign.total_replied or 0
+        suppressed = campaign.total_suppressed or 0
+        return {
+            'pending': pending,
+            'queued': max((campaign.audience_size or 0) - pending - sent - failed - suppressed, 0),
+            'sent': sent - replied,
+            'failed': failed,
+            'replied': replied,
+            'suppressed': suppressed,
+        }
+    
+    @staticmethod
+    def get_campaign_recipients(campaign_id, limit=None, after_id=None):
+        """
+        Get contacts the campaign targets: its frozen audience once launched, else the live targeting.
+        limit / after_id page through them (after_id is the next_after_id of the previous page).
+        """
         session = get_session()
         try:
             campaign = session.query(Campaign).filter(Campaign.id == campaign_id).first()
             if not campaign:
                 return {'success': False, 'error': 'Campaign not found'}
             
-            recipients_result = CampaignService.get_campaign_recipients(campaign_id)
-            if not recipients_result['success']:
-                return recipients_result
-            
-            recipients = recipients_result['recipients']
-            subject_lines = json.loads(campaign.subject_lines)
-            
-            # Generate CSV in memory
-            output = io.StringIO()
-            writer = csv.DictWriter(output, fieldnames=[
-                'contact_id', 'name', 'email', 'company', 'industry', 'tier', 
-                'website', 'subject', 'preview'
-            ])
-            writer.writeheader()
-            
-            for i, contact in enumerate(recipients):
-                # Rotate subject lines
-                subject = subject_lines[i % len(subject_lines)]
-                
-                # Personalize email
-                personalized_subject = CampaignService.personalize_email(subject, contact)
-                personalized_body = CampaignService.personalize_email(campaign.email_body, contact)
-                
-                writer.writerow({
-                    'contact_id': contact['id'],
-                    'name': contact['name'],
-                    'email': contact['email'],
-                    'company': contact['company'],
-                    'industry': contact['industry'],
-                    'tier': contact['tier'],
-                    'website': contact['website_url'],
-                    'subject': personalized_subject,
-                    'preview': personalized_body[:100] + '...'
-                })
-            
-            csv_content = output.getvalue()
-            output.close()
+            if campaign.launched_at:
+                query = CampaignService.audience_query(session, campaign, CampaignRecipient, Contact)
+                if after_id:
+                    query = query.filter(CampaignRecipient.id > after_id)
+                rows = query.limit(limit).all() if limit else query.all()
+                recipients = [dict(contact.to_dict(), campaign_status=recipient.status) for recipient, contact in rows]
+                next_after_id = rows[-1][0].id if rows else None
+                count = campaign.audience_size
+                counts = CampaignService.recipient_counts(campaign)
+            else:
+                query = CampaignService.audience_query(session, campaign, Contact)
+                count = query.order_by(None).count()
+                if after_id:
+                    query = query.filter(Contact.id > after_id)
+                contacts = query.limit(limit).all() if limit else query.all()
+                recipients = [c.to_dict() for c in contacts]
+                next_after_id = contacts[-1].id if contacts else None
+                counts = None
             
             return {
                 'success': True,
-                'csv_content': csv_content,
-                'total_recipients': len(recipients)
+                'launched': bool(campaign.launched_at),
+                'recipients': recipients,
+                'count': count,
+                'counts': counts,
+                'next_after_id': next_after_id if limit and len(recipients) == limit else None
             }
-            
+        
         finally:
             session.close()
     
     @staticmethod
-    def personalize_email(template, contact):
-        """Replace placeholders in email template with contact data"""
-        replacements = {
-            '{{Business}}': contact.get('name', 'your business'),
-            '{{Name}}': contact.get('name', 'there'),
-            '{{Company}}': contact.get('company', 'your company'),
-            '{{Industry}}': contact.get('industry', 'your industry'),
-        }
+    def mark_replied(session, contact_ids, replied_at=None):
+        """Move the contacts' sent campaign recipients to replied and add the replies to each campaign's count"""
+        conditions = [CampaignRecipient.contact_id.in_(list(contact_ids)), CampaignRecipient.status == 'sent']
+        replies = session.query(CampaignRecipient.campaign_id, func.count(CampaignRecipient.id)).filter(
+            *conditions
+        ).group_by(CampaignRecipient.campaign_id).all()
+        if not replies:
+            return
+        
+        session.execute(
+            update(CampaignRecipient)
+            .where(*conditions)
+            .values(status='replied', replied_at=replied_at or datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        for campaign_id, count in replies:
+            session.execute(
+                update(Campaign)
+                .where(Campaign.id == campaign_id)
+                .values(total_replied=func.coalesce(Campaign.total_replied, 0) + count)
+                .execution_options(synchronize_session=False)
+            )
+    
+    PREVIEW_COLUMNS = ['contact_id', 'name', 'email', 'company', 'industry', 'tier', 'website', 'subject', 'preview']
+    
+    @staticmethod
+    def contact_columns(base_columns, templates):
+        """base_columns plus the Contact columns the templates' placeholders read"""
+        fields = set().union(*[template.fields for template in templates])
+        selected = {column.key for column in base_columns}
+        return list(base_columns) + [
+            Contact.__table__.c[field] for field in sorted(fields)
+            if field in Contact.__table__.c and field not in selected
+        ]
+    
+    @staticmethod
+    def stream_preview_csv(campaign_id, yield_per=1000, chunk_rows=500):
+        """
+        Preview CSV of campaign recipients (pending ones, once launched) and their personalized
+        emails, as a generator of encoded chunks. Recipients are read through a server-side cursor (yield_per rows at a time) and
+        rendered as they arrive, so memory stays flat however large the audience is.
+        Returns {'success': False, 'error'} if the campaign doesn't exist.
+        """
+        session = get_session()
+        try:
+            campaign = session.query(Campaign).filter(Campaign.id == campaign_id).first()
+            if not campaign:
+                return {'success': False, 'error': 'Campaign not found'}
+            subject_templates = [compile_template(subject) for subject in json.loads(campaign.subject_lines)]
+            body_template = compile_template(campaign.email_body)
+        finally:
+            session.close()
         
-        result = template
-        for placeholder, value in replacements.items():
-            result = result.replace(placeholder, value)
+        columns = CampaignService.contact_columns(
+            [Contact.id, Contact.name, Contact.email, Contact.company, Contact.industry, Contact.tier, Contact.website_url],
+            subject_templates + [body_template]
+        )
         
-        return result
+        def generate():
+            output = io.StringIO()
+            writer = csv.writer(output)
+            writer.writerow(CampaignService.PREVIEW_COLUMNS)
+            
+            session = get_session()
+            try:
+                rows = CampaignService.audience_query(
+                    session, campaign, *columns, statuses=['pending']
+                ).execution_options(yield_per=yield_per)
+                for i, row in enumerate(rows):
+                    contact = row._asdict()
+                    
+                    # Rotate subject lines
+                    subject = subject_templates[i % len(subject_templates)].render(contact)
+                    body = body_template.render(contact)
+                    
+                    writer.writerow([
+                        contact['id'], contact['name'], contact['email'], contact['company'],
+                        contact['industry'], contact['tier'], contact['website_url'],
+                        subject, body[:100] + '...'
+                    ])
+                    
+                    if (i + 1) % chunk_rows == 0:
+                        yield output.getvalue().encode('utf-8')
+                        output.seek(0)
+                        output.truncate(0)
+                
+                yield output.getvalue().encode('utf-8')
+            finally:
+                session.close()
+        
+        return {'success': True, 'chunks': generate()}
+    
+    @staticmethod
+    def personalize_email(template, contact):
+        """Render a template's placeholders ({{Company}}, {{name | default: "there"}}, ...) with contact data"""
+        return compile_template(template).render(contact)
+    
+    @staticmethod
+    def local_time(moment=None):
+        """moment (naive UTC, default now) in CAMPAIGN_TIMEZONE"""
+        moment = moment or datetime.utcnow()
+        return moment.replace(tzinfo=timezone.utc).astimezone(ZoneInfo(CAMPAIGN_TIMEZONE))
+    
+    @staticmethod
+    def send_day(moment=None):
+        """Day whose daily_limit a send at moment counts toward"""
+        return CampaignService.local_time(moment).date()
+    
+    @staticmethod
+    def sent_on(session, campaign_ids, day):
+        """Emails each campaign queued on day, from the per-day counters"""
+        rows = session.query(CampaignDailySend.campaign_id, CampaignDailySend.sent).filter(
+            CampaignDailySend.campaign_id.in_(campaign_ids), CampaignDailySend.day == day
+        )
+        return {campaign_id: sent for campaign_id, sent in rows}
     
     @staticmethod
     def send_campaign_batch(campaign_id, batch_size=None, preview_mode=True):
-        """Send a batch of campaign emails"""
+        """
+        Send a batch of campaign emails.
+        Launches the campaign if needed, then claims the next batch_size (default daily_limit)
+        pending recipients from its snapshot by index and queues their emails in the outbox.
+        Outreach and contact touches are recorded by the outbox sender once each email is delivered.
+        """
         session = get_session()
         try:
             campaign = session.query(Campaign).filter(Campaign.id == campaign_id).first()
             if not campaign:
                 return {'success': False, 'error': 'Campaign not found'}
             
-            # Get recipients
-            recipients_result = CampaignService.get_campaign_recipients(campaign_id)
-            if not recipients_result['success']:
-                return recipients_result
-            
-            recipients = recipients_result['recipients']
-            subject_lines = json.loads(campaign.subject_lines)
-            
             # Limit batch size
             batch_limit = batch_size or campaign.daily_limit
-            batch = recipients[:batch_limit]
             
             if preview_mode:
+                if campaign.launched_at:
+                    would_send_to = min(campaign.total_pending or 0, batch_limit)
+                else:
+                    would_send_to = CampaignService.audience_query(session, campaign, Contact.id).limit(batch_limit).count()
                 return {
                     'success': True,
                     'preview_mode': True,
                     'message': 'Preview mode: emails not sent',
-                    'would_send_to': len(batch)
+                    'would_send_to': would_send_to
                 }
             
+            # Parse each template once for the whole batch
+            try:
+                subject_templates = [compile_template(subject) for subject in json.loads(campaign.subject_lines)]
+                body_template = compile_template(campaign.email_body)
+            except TemplateError as e:
+                # Saved before the engine checked it; every batch would fail the same way, so stop dispatching it
+                campaign.is_active = 0
+                session.commit()
+                return {'success': False, 'error': f"Campaign deactivated, invalid template: {str(e)}"}
+            
+            if not campaign.launched_at:
+                launched = CampaignService.launch_campaign(campaign_id)
+                if not launched['success']:
+                    return launched
+                session.refresh(campaign)
+            
+            # Address, plus whatever contact fields the templates use
+            columns = CampaignService.contact_columns(
+                [Contact.id, Contact.email],
+                subject_templates + [body_template]
+            )
+            rows = CampaignService.audience_query(
+                session, campaign, CampaignRecipient.id.label('recipient_id'), *columns, statuses=['pending']
+            ).limit(batch_limit).all()
+            
+            # Claim the rows first: a concurrent send (manual or the dispatcher) that read the same
+            # pending rows claims none of them, so messages and counters come only from rows claimed here
+            now = datetime.utcnow()
+            claimed = set(session.scalars(
+                update(CampaignRecipient)
+                .where(CampaignRecipient.id.in_([row.recipient_id for row in rows]), CampaignRecipient.status == 'pending')
+                .values(status='queued', queued_at=now)
+                .returning(CampaignRecipient.id)
+                .execution_options(synchronize_session=False)
+            )) if rows else set()
+            rows = [row for row in rows if row.recipient_id in claimed]
+            
+            if not rows:
+                session.commit()
+                return {'success': True, 'sent': 0, 'message': 'Queued 0 emails'}
+            
+            # Contacts whose email was removed, or suppressed, after launch can't be sent to
+            blocked = suppression_list.suppressed(session, [row.email for row in rows])
+            batch = [row for row in rows if row.email and row.email not in blocked]
+            unreachable = [row.recipient_id for row in rows if not row.email]
+            suppressed = [row.recipient_id for row in rows if row.email in blocked]
+            
             # Actually send emails
-            sent_count = 0
-            for i, contact_data in enumerate(batch):
-                contact = session.query(Contact).filter(Contact.id == contact_data['id']).first()
-                if not contact:
-                    continue
+            messages = []
+            for i, contact in enumerate(batch):
+                contact_data = contact._asdict()
                 
                 # Rotate subject lines
-                subject = subject_lines[i % len(subject_lines)]
-                
-                # Personalize
-                personalized_subject = CampaignService.personalize_email(subject, contact_data)
-                personalized_body = CampaignService.personalize_email(campaign.email_body, contact_data)
+                personalized_subject = subject_templates[i % len(subject_templates)].render(contact_data)
+                personalized_body = body_template.render(contact_data)
                 
-                # Log outreach
-                outreach = Outreach(
-                    contact_id=contact.id,
-                    outreach_type='Email',
-                    subject=personalized_subject,
-                    message=personalized_body,
-                    sent_at=datetime.utcnow()
+                messages.append(EmailOutbox.message(
+                    EmailOutbox.campaign_key(campaign.id, contact.id), contact.email,
+                    personalized_subject, personalized_body, campaign_id=campaign.id, contact_id=contact.id
+                ))
+            
+            if batch:
+                # Queue for delivery by the outbox workers
+                EmailOutbox.enqueue(session, messages)
+            
+            if unreachable:
+                session.execute(
+                    update(CampaignRecipient)
+                    .where(CampaignRecipient.id.in_(unreachable))
+                    .values(status='failed')
+                    .execution_options(synchronize_session=False)
+                )
+            
+            if suppressed:
+                session.execute(
+                    update(CampaignRecipient)
+                    .where(CampaignRecipient.id.in_(suppressed))
+                    .values(status='suppressed')
+                    .execution_options(synchronize_session=False)
                 )
-                session.add(outreach)
-                
-                # Update contact
-                contact.total_touches += 1
-                contact.last_contacted = datetime.utcnow()
-                
-                sent_count += 1
             
-            # Update campaign stats
-            campaign.total_sent += sent_count
+            sent_count = len(batch)
+            
+            # Count today's sends against the daily limit
+            if batch:
+                increment_rows(
+                    session.connection(),
+                    CampaignDailySend.__table__,
+                    ['campaign_id', 'day'],
+                    [{'campaign_id': campaign.id, 'day': CampaignService.send_day(now), 'sent': len(batch)}],
+                    updated_at=now
+                )
+            
+            # Update campaign stats (total_sent counts deliveries, recorded by the outbox)
+            campaign.total_pending = Campaign.total_pending - len(rows)
+            campaign.total_failed = Campaign.total_failed + len(unreachable)
+            campaign.total_suppressed = func.coalesce(Campaign.total_suppressed, 0) + len(suppressed)
             if not campaign.started_at:
-                campaign.started_at = datetime.utcnow()
+                campaign.started_at = now
             
             session.commit()
+            OutboxSender.wake()
             
             return {
                 'success': True,
                 'sent': sent_count,
-                'message': f'Sent {sent_count} emails'
+                'failed': len(unreachable),
+                'suppressed': len(suppressed),
+                'message': f'Queued {sent_count} emails'
             }
-            
+        
         except Exception as e:
             session.rollback()
             return {'success': False, 'error': str(e)}
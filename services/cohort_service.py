@@ -0,0 +1,264 @@
+from sqlalchemy import func, select, update, delete, exists, or_, and_
+from datetime import datetime
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import get_session
+from database.upsert import insert_missing
+from models.contact import Contact
+from models.outreach import Outreach
+from models.lead_discovery import LeadDiscovery
+from models.cohort_member import CohortMember
+from models.cohort_funnel import CohortFunnel, FUNNEL_STAGES
+from models.rollup_watermark import RollupWatermark
+from services.aggregation_engine import AggregationEngine
+from services.outreach_rollup_service import OutreachRollupService
+from services.response_cache import ResponseCache
+from config import COHORT_REFRESH_INTERVAL, COHORT_REFRESH_INLINE
+
+class CohortService:
+    """
+    Funnel (members -> with email -> contacted -> replied -> converted) per cohort.
+    refresh() materializes cohort membership once per contact (past a high-water
+    mark on contact id), then recomputes every cohort's stage counts in one
+    grouped query into cohort_funnels. Reads only touch cohort_funnels;
+    CohortRefresher runs refresh() in the background.
+    A contact committed after a refresh moved the mark past its id is picked
+    up by the next one, which re-scans the RESCAN_WINDOW ids below the mark
+    for contacts that have no cohort membership yet.
+    """
+    
+    WATERMARK = 'cohorts'
+    RESCAN_WINDOW = 5000  # ids below the mark re-checked for late commits
+    
+    # Cohort types and the membership column that defines them
+    COHORT_TYPES = {
+        'week': CohortMember.cohort_week,
+        'discovery': CohortMember.discovery_id,
+        'tier': CohortMember.initial_tier,
+    }
+    
+    @staticmethod
+    def stage_metrics(engine):
+        """Stage counts for contacts joined to their cohort membership"""
+        touched = exists().where(Outreach.contact_id == CohortMember.contact_id)
+        return {
+            'members': func.count(CohortMember.contact_id),
+            'with_email': engine.count_if(and_(Contact.email.isnot(None), Contact.email != '')),
+            'contacted': engine.count_if(or_(Contact.total_touches > 0, touched)),
+            'replied': engine.count_if(Contact.has_replied == 1),
+            'converted': engine.count_if(Contact.status == 'Converted'),
+        }
+    
+    @staticmethod
+    def materialize_members(session, after_id, up_to_id, batch_size=20000):
+        """Insert cohort membership for contacts with after_id < id <= up_to_id that have none yet"""
+        added = 0
+        while after_id < up_to_id:
+            rows = session.query(
+                Contact.id, Contact.created_at, Contact.discovery_id, Contact.tier
+            ).filter(
+                Contact.id > after_id,
+                Contact.id <= up_to_id,
+                ~exists().where(CohortMember.contact_id == Contact.id)
+            ).order_by(Contact.id).limit(batch_size).all()
+            if not rows:
+                break
+            
+            today = datetime.utcnow().date()
+            # A concurrent refresh may add some of the same contacts; the key check skips those
+            added += insert_missing(session.connection(), CohortMember.__table__, ['contact_id'], [
+                {
+                    'contact_id': contact_id,
+                    'cohort_week': OutreachRollupService.bucket_start(created_at.date() if created_at else today, 'week'),
+                    'discovery_id': discovery_id or 0,
+                    'initial_tier': tier or '',
+                    'created_at': datetime.utcnow(),
+                }
+                for contact_id, created_at, discovery_id, tier in rows
+            ])
+            after_id = rows[-1][0]
+        return added
+    
+    @staticmethod
+    def refresh():
+        """Add new contacts to their cohorts and rebuild cohort_funnels"""
+        session = get_session()
+        start_time = time.time()
+        
+        try:
+            last_id = session.query(RollupWatermark.last_id).filter(
+                RollupWatermark.name == CohortService.WATERMARK
+            ).scalar()
+            max_id = session.query(func.max(Contact.id)).scalar() or 0
+            
+            # Claim the refresh; a concurrent one that moved the mark first wins
+            if last_id is None:
+                last_id = 0
+                session.add(RollupWatermark(name=CohortService.WATERMARK, last_id=max(max_id, 0)))
+                session.flush()
+            else:
+                claimed = session.execute(
+                    update(RollupWatermark)
+                    .where(RollupWatermark.name == CohortService.WATERMARK, RollupWatermark.last_id == last_id)
+                    .values(last_id=max(max_id, last_id), updated_at=datetime.utcnow())
+                ).rowcount
+                if not claimed:
+                    session.rollback()
+                    return {'success': True, 'skipped': True}
+            
+            floor = max(last_id - CohortService.RESCAN_WINDOW, 0)
+            added = CohortService.materialize_members(session, floor, max(max_id, last_id))
+            
+            # Contacts imported before they were scored take the first tier they get
+            session.execute(
+                update(CohortMember)
+                .where(CohortMember.initial_tier == '')
+                .values(initial_tier=func.coalesce(
+                    select(Contact.tier).where(Contact.id == CohortMember.contact_id).scalar_subquery(), ''
+                ))
+            )
+            
+            engine = AggregationEngine(session)
+            groups = engine.rollup(
+                CohortService.COHORT_TYPES,
+                CohortService.stage_metrics(engine),
+                CohortMember.contact_id == Contact.id
+            )
+            
+            job_names = dict(session.query(LeadDiscovery.id, LeadDiscovery.job_name).all())
+            now = datetime.utcnow()
+            rows = []
+            for cohort_type, cohorts in groups['by'].items():
+                for value, metrics in cohorts.items():
+                    if cohort_type == 'week':
+                        key = value.isoformat()
+                        label = f"Week of {key}"
+                    elif cohort_type == 'discovery':
+                        key = str(value) if value else ''
+                        label = job_names.get(value, 'No discovery job' if not value else f"Job {value}")
+                    else:
+                        key = value or ''
+                        label = value or 'Unscored'
+                    rows.append(dict(
+                        cohort_type=cohort_type, cohort_key=key, label=label, refreshed_at=now,
+                        **{stage: metrics[stage] for stage in FUNNEL_STAGES}
+                    ))
+            
+            session.execute(delete(CohortFunnel))
+            if rows:
+                session.execute(CohortFunnel.__table__.insert(), rows)
+            ResponseCache.bump('analytics', session.connection())
+            session.commit()
+            
+            elapsed = round(time.time() - start_time, 2)
+            print(f"Refreshed cohort funnels: {added} new members, {len(rows)} cohorts in {elapsed}s", flush=True)
+            
+            return {'success': True, 'new_members': added, 'cohorts': len(rows), 'elapsed_seconds': elapsed}
+        
+        except Exception as e:
+            session.rollback()
+            print(f"Error refreshing cohort funnels: {str(e)}", flush=True)
+            return {'success': False, 'error': str(e)}
+        
+        finally:
+            session.close()
+    
+    @staticmethod
+    def last_refreshed():
+        session = get_session()
+        try:
+            return session.query(RollupWatermark.updated_at).filter(
+                RollupWatermark.name == CohortService.WATERMARK
+            ).scalar()
+        finally:
+            session.close()
+    
+    @staticmethod
+    def funnels(cohort_type):
+        """
+        Funnel rows for one cohort type (week, discovery, tier), as of the last refresh
+        (refreshed_at is None until CohortRefresher or the refresh endpoint has run once).
+        """
+        if cohort_type not in CohortService.COHORT_TYPES:
+            raise ValueError(f"Unknown cohort type '{cohort_type}'")
+        
+        refreshed_at = CohortService.last_refreshed()
+        
+        session = get_session()
+        try:
+            query = session.query(CohortFunnel).filter(CohortFunnel.cohort_type == cohort_type)
+            if cohort_type == 'week':
+                query = query.order_by(CohortFunnel.cohort_key)
+            else:
+                query = query.order_by(CohortFunnel.members.desc())
+            
+            return {
+                'cohort_type': cohort_type,
+                'refreshed_at': refreshed_at.isoformat() if refreshed_at else None,
+                'cohorts': [row.to_dict() for row in query.all()]
+            }
+        finally:
+            session.close()
+
+class CohortRefresher:
+    """Background thread that rebuilds the cohort funnels every interval seconds, off the request path"""
+    
+    _shared = None
+    _shared_lock = threading.Lock()
+    
+    def __init__(self, interval=COHORT_REFRESH_INTERVAL):
+        self.interval = interval
+        
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+    
+    @classmethod
+    def shared(cls):
+        """Process-wide refresher"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+    
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='cohort-refresher', daemon=True)
+            self._thread.start()
+    
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                CohortService.refresh()
+            except Exception as e:
+                print(f"Cohort refresher error: {str(e)}", flush=True)
+            self._stop.wait(self.interval)
+    
+    @staticmethod
+    def start_inline():
+        """Run the shared refresher in this process unless a dedicated one is configured"""
+        if COHORT_REFRESH_INLINE:
+            CohortRefresher.shared().start()
+
+if __name__ == '__main__':
+    # Dedicated refresher process: set COHORT_REFRESH_INLINE=False on the web process and run this
+    refresher = CohortRefresher()
+    refresher.start()
+    try:
+        while True:
+            refresher._stop.wait(60)
+    except KeyboardInterrupt:
+        refresher.stop()
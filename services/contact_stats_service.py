@@ -0,0 +1,90 @@
+from sqlalchemy import func, case, select, delete, and_, literal, DateTime
+from datetime import datetime
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import get_session
+from models.contact import Contact
+from models.contact_stats import ContactStats, KEY_FIELDS, METRIC_FIELDS
+from services.response_cache import ResponseCache
+
+class ContactStatsService:
+    """
+    Reads and rebuilds the contact_stats rollup.
+    Contact writes keep it current through the ORM hooks in models.contact_stats;
+    reconcile() rebuilds it from contacts to repair drift after bulk writes or raw SQL.
+    """
+    
+    @staticmethod
+    def reconcile():
+        """Rebuild contact_stats from contacts in one INSERT ... SELECT ... GROUP BY"""
+        session = get_session()
+        start_time = time.time()
+        try:
+            keys = [func.coalesce(getattr(Contact, field), '') for field in KEY_FIELDS]
+            flag = lambda condition: func.sum(case((condition, 1), else_=0))
+            
+            source = select(
+                *keys,
+                func.count(Contact.id),
+                flag(and_(Contact.email.isnot(None), Contact.email != '')),
+                flag(Contact.total_touches > 0),
+                flag(Contact.has_replied == 1),
+                flag(Contact.status == 'Converted'),
+                flag(Contact.ai_opportunity_score > 60),
+                func.coalesce(func.sum(Contact.website_health_score), 0),
+                func.count(Contact.website_health_score),
+                literal(datetime.utcnow(), DateTime)
+            ).group_by(*keys)
+            
+            session.execute(delete(ContactStats))
+            session.execute(
+                ContactStats.__table__.insert().from_select(KEY_FIELDS + METRIC_FIELDS + ['updated_at'], source)
+            )
+            ResponseCache.bump('analytics', session.connection())
+            session.commit()
+            
+            groups = session.query(func.count(ContactStats.id)).scalar()
+            elapsed = round(time.time() - start_time, 2)
+            print(f"Reconciled contact_stats: {groups} groups in {elapsed}s", flush=True)
+            
+            return {'success': True, 'groups': groups, 'elapsed_seconds': elapsed}
+        
+        except Exception as e:
+            session.rollback()
+            print(f"Error reconciling contact_stats: {str(e)}", flush=True)
+            return {'success': False, 'error': str(e)}
+        
+        finally:
+            session.close()
+    
+    @staticmethod
+    def rows(session):
+        """Non-empty rollup rows as (key dict, metrics dict); '' keys read back as None"""
+        table = ContactStats.__table__
+        result = []
+        query = select(*[table.c[field] for field in KEY_FIELDS + METRIC_FIELDS]).where(table.c.total > 0)
+        for row in session.execute(query):
+            key = {field: row[index] or None for index, field in enumerate(KEY_FIELDS)}
+            metrics = {field: row[len(KEY_FIELDS) + index] or 0 for index, field in enumerate(METRIC_FIELDS)}
+            result.append((key, metrics))
+        return result
+    
+    @staticmethod
+    def rollup(session, dimensions):
+        """Same shape as AggregationEngine.rollup, computed from the rollup rows"""
+        total = dict.fromkeys(METRIC_FIELDS, 0)
+        by = {dimension: {} for dimension in dimensions}
+        
+        for key, metrics in ContactStatsService.rows(session):
+            for field, value in metrics.items():
+                total[field] += value
+            for dimension in dimensions:
+                bucket = by[dimension].setdefault(key[dimension], dict.fromkeys(METRIC_FIELDS, 0))
+                for field, value in metrics.items():
+                    bucket[field] += value
+        
+        return {'total': total, 'by': by}
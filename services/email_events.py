@@ -0,0 +1,402 @@
+from sqlalchemy import select, update, case, func
+from datetime import datetime, timezone
+from collections import deque
+import atexit
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import get_session
+from database.upsert import insert_missing
+from models.contact import Contact
+from models.campaign import Campaign
+from models.campaign_recipient import CampaignRecipient
+from models.outbox_message import OutboxMessage
+from models.email_event import EmailEvent, EVENT_TYPES
+from models.contact_stats import stats_key, apply_deltas, METRIC_FIELDS
+from services.campaign_service import CampaignService
+from services.suppression_list import suppression_list
+from config import EMAIL_WEBHOOK_SECRET, EMAIL_EVENT_BATCH_SIZE, EMAIL_EVENT_FLUSH_INTERVAL, EMAIL_EVENT_MAX_BUFFERED
+
+class EmailEventService:
+    """
+    Parses provider webhook events and writes them in batches.
+    A batch is stored with one INSERT, and its effects are applied with grouped
+    UPDATEs: contacts that replied, campaign recipients that opened or replied,
+    and per-campaign open/bounce/reply counters.
+    """
+    
+    # Resend webhook types; other senders can post the bare event type
+    PROVIDER_TYPES = {f"email.{event_type}": event_type for event_type in EVENT_TYPES}
+    SIGNATURE_TOLERANCE = 300  # seconds a signed webhook stays valid
+    
+    @staticmethod
+    def verify_signature(headers, body, secret=EMAIL_WEBHOOK_SECRET):
+        """
+        Check a webhook came from the provider. A whsec_ secret verifies Resend's (Svix) signature
+        headers; any other secret must be sent back in X-Webhook-Secret. Without a secret nothing is accepted.
+        """
+        if not secret:
+            return False
+        
+        if not secret.startswith('whsec_'):
+            return hmac.compare_digest(headers.get('X-Webhook-Secret', ''), secret)
+        
+        message_id = headers.get('svix-id', '')
+        timestamp = headers.get('svix-timestamp', '')
+        if not message_id or not timestamp.isdigit() or abs(time.time() - int(timestamp)) > EmailEventService.SIGNATURE_TOLERANCE:
+            return False
+        
+        key = base64.b64decode(secret[len('whsec_'):])
+        expected = base64.b64encode(
+            hmac.new(key, f"{message_id}.{timestamp}.{body}".encode('utf-8'), hashlib.sha256).digest()
+        ).decode()
+        signatures = [part.split(',', 1)[-1] for part in headers.get('svix-signature', '').split()]
+        return any(hmac.compare_digest(signature, expected) for signature in signatures)
+    
+    @staticmethod
+    def parse_time(value):
+        """ISO timestamp as naive UTC (now if missing or unreadable)"""
+        try:
+            moment = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return datetime.utcnow()
+        if moment.tzinfo:
+            moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+        return moment
+    
+    @staticmethod
+    def parse_id(value):
+        """Positive integer id from a payload field, else None"""
+        try:
+            value = int(str(value).strip())
+        except (TypeError, ValueError):
+            return None
+        return value if value > 0 else None
+    
+    @staticmethod
+    def normalize(payload, event_id=None):
+        """
+        Event dict for write() from one webhook payload, or None for event types that aren't tracked.
+        Takes Resend's {'type': 'email.opened', 'created_at', 'data': {'email_id', 'to'}} or a flat
+        {'type': 'opened', 'id', 'message_id', 'email', 'occurred_at'}.
+        event_id: the delivery's id when the payload doesn't carry one (Resend sends it as svix-id)
+        """
+        if not isinstance(payload, dict):
+            return None
+        
+        raw_type = str(payload.get('type') or payload.get('event') or '').lower()
+        event_type = EmailEventService.PROVIDER_TYPES.get(raw_type, raw_type)
+        if event_type not in EVENT_TYPES:
+            return None
+        
+        data = payload.get('data') if isinstance(payload.get('data'), dict) else payload
+        recipient = data.get('email') or data.get('to') or data.get('from')
+        if isinstance(recipient, list):
+            recipient = recipient[0] if recipient else None
+        
+        event = {
+            'event_type': event_type,
+            'provider_message_id': data.get('email_id') or data.get('message_id'),
+            'email': recipient.strip().lower() if recipient else None,
+            'contact_id': EmailEventService.parse_id(data.get('contact_id')),
+            'campaign_id': EmailEventService.parse_id(data.get('campaign_id')),
+            'occurred_at': EmailEventService.parse_time(payload.get('created_at') or data.get('occurred_at')),
+            'payload': json.dumps(payload, default=str),
+        }
+        
+        event_key = payload.get('id') or event_id
+        if not event_key:
+            identity = f"{event_type}|{event['provider_message_id']}|{event['email']}|{event['occurred_at'].isoformat()}"
+            event_key = hashlib.sha1(identity.encode('utf-8')).hexdigest()
+        event['event_key'] = str(event_key)
+        return event
+    
+    @staticmethod
+    def resolve(session, events):
+        """
+        Fill in contact_id / campaign_id from the outbox message, else from the contact's email.
+        Ids the payload names that don't exist are cleared, so they can't break the batch's foreign keys.
+        """
+        message_ids = {event['provider_message_id'] for event in events if event['provider_message_id']}
+        messages = {}
+        if message_ids:
+            for message_id, campaign_id, contact_id in session.query(
+                OutboxMessage.provider_message_id, OutboxMessage.campaign_id, OutboxMessage.contact_id
+            ).filter(OutboxMessage.provider_message_id.in_(message_ids)):
+                messages[message_id] = (campaign_id, contact_id)
+        
+        for event in events:
+            campaign_id, contact_id = messages.get(event['provider_message_id'], (None, None))
+            event['campaign_id'] = event['campaign_id'] or campaign_id
+            event['contact_id'] = event['contact_id'] or contact_id
+        
+        contact_ids = {event['contact_id'] for event in events if event['contact_id']}
+        campaign_ids = {event['campaign_id'] for event in events if event['campaign_id']}
+        if contact_ids:
+            contact_ids = set(session.scalars(select(Contact.id).where(Contact.id.in_(contact_ids))))
+        if campaign_ids:
+            campaign_ids = set(session.scalars(select(Campaign.id).where(Campaign.id.in_(campaign_ids))))
+        for event in events:
+            if event['contact_id'] not in contact_ids:
+                event['contact_id'] = None
+            if event['campaign_id'] not in campaign_ids:
+                event['campaign_id'] = None
+        
+        emails = {event['email'] for event in events if event['email'] and not event['contact_id']}
+        if emails:
+            # Contact emails are stored as entered; events carry them lowercased
+            email = func.lower(func.trim(Contact.email))
+            contacts = dict(session.execute(select(email, Contact.id).where(email.in_(emails)).order_by(Contact.id.desc())).all())
+            for event in events:
+                if not event['contact_id'] and event['email']:
+                    event['contact_id'] = contacts.get(event['email'])
+    
+    @staticmethod
+    def apply_replies(session, events):
+        """Mark replying contacts (one UPDATE) and their sent campaign recipients as replied"""
+        replied_at = {}
+        for event in events:
+            if event['event_type'] == 'replied' and event['contact_id']:
+                contact_id = event['contact_id']
+                replied_at[contact_id] = max(replied_at.get(contact_id, event['occurred_at']), event['occurred_at'])
+        if not replied_at:
+            return
+        
+        # First replies move contacts into the replied rollup metric
+        deltas = {}
+        for contact in session.query(
+            Contact.id, Contact.industry, Contact.source, Contact.tier, Contact.status, Contact.has_replied
+        ).filter(Contact.id.in_(list(replied_at))):
+            if contact.has_replied != 1:
+                deltas.setdefault(stats_key(contact._asdict()), dict.fromkeys(METRIC_FIELDS, 0))['replied'] += 1
+        
+        session.info['defer_contact_stats'] = True
+        session.execute(
+            update(Contact)
+            .where(Contact.id.in_(list(replied_at)))
+            .values(has_replied=1, last_reply_date=case(replied_at, value=Contact.id))
+            .execution_options(synchronize_session=False)
+        )
+        apply_deltas(session.connection(), deltas)
+        
+        CampaignService.mark_replied(session, list(replied_at))
+    
+    @staticmethod
+    def apply_campaign_counts(session, events):
+        """Record first opens on campaign recipients and add opens and bounces to each campaign's counters"""
+        opened = {}
+        bounced = {}
+        for event in events:
+            if not (event['campaign_id'] and event['contact_id']):
+                continue
+            if event['event_type'] == 'opened':
+                times = opened.setdefault(event['campaign_id'], {})
+                times[event['contact_id']] = min(times.get(event['contact_id'], event['occurred_at']), event['occurred_at'])
+            elif event['event_type'] == 'bounced':
+                bounced.setdefault(event['campaign_id'], set()).add(event['contact_id'])
+        
+        counts = {campaign_id: {'total_bounced': len(contact_ids)} for campaign_id, contact_ids in bounced.items()}
+        for campaign_id, times in opened.items():
+            # Only a recipient's first open counts
+            first_opens = session.execute(
+                update(CampaignRecipient)
+                .where(
+                    CampaignRecipient.campaign_id == campaign_id,
+                    CampaignRecipient.contact_id.in_(list(times)),
+                    CampaignRecipient.opened_at.is_(None)
+                )
+                .values(opened_at=case(times, value=CampaignRecipient.contact_id))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if first_opens:
+                counts.setdefault(campaign_id, {})['total_opened'] = first_opens
+        
+        for campaign_id, deltas in counts.items():
+            session.execute(
+                update(Campaign)
+                .where(Campaign.id == campaign_id)
+                .values({
+                    getattr(Campaign, field): func.coalesce(getattr(Campaign, field), 0) + delta
+                    for field, delta in deltas.items()
+                })
+                .execution_options(synchronize_session=False)
+            )
+    
+    @staticmethod
+    def write(events):
+        """Store a batch of normalized events and apply their effects in one transaction"""
+        unique = {}
+        for event in events:
+            unique.setdefault(event['event_key'], event)
+        if not unique:
+            return {'success': True, 'written': 0, 'duplicates': 0}
+        
+        session = get_session()
+        start_time = time.time()
+        try:
+            # Webhooks are redelivered; skip resolving events already stored
+            stored = set(session.scalars(select(EmailEvent.event_key).where(EmailEvent.event_key.in_(list(unique)))))
+            new_events = [event for key, event in unique.items() if key not in stored]
+            
+            if new_events:
+                EmailEventService.resolve(session, new_events)
+                # Only events this insert stored take effect; a concurrent flush of the same
+                # delivery may have stored some of them since the check above
+                inserted = insert_missing(session.connection(), EmailEvent.__table__, ['event_key'], [
+                    dict(event, received_at=datetime.utcnow()) for event in new_events
+                ], returning=True)
+                inserted_keys = {key for (key,) in inserted}
+                new_events = [event for event in new_events if event['event_key'] in inserted_keys]
+            
+            if new_events:
+                EmailEventService.apply_replies(session, new_events)
+                EmailEventService.apply_campaign_counts(session, new_events)
+                
+                # Bounced and complaining addresses are never emailed again
+                for reason in ('bounced', 'complained'):
+                    suppression_list.add(session, [
+                        event['email'] for event in new_events if event['event_type'] == reason and event['email']
+                    ], reason=reason, source='webhook')
+            session.commit()
+            
+            elapsed = round(time.time() - start_time, 3)
+            print(f"📨 Wrote {len(new_events)} email events in {elapsed}s", flush=True)
+            return {'success': True, 'written': len(new_events), 'duplicates': len(events) - len(new_events)}
+        
+        except Exception as e:
+            session.rollback()
+            print(f"Error writing email events: {str(e)}", flush=True)
+            return {'success': False, 'error': str(e)}
+        
+        finally:
+            session.close()
+
+class EmailEventBuffer:
+    """
+    In-process buffer between the webhook and the events table.
+    The webhook only appends; a flusher thread writes a batch once batch_size
+    events are waiting or the oldest has waited flush_interval seconds.
+    A failed batch is split in halves and retried until the events that fail on
+    their own are found; those go to dead_letters. When nothing in a flush could
+    be written (the database is down) the events are kept for the next flush
+    instead, up to max_buffered events, oldest dead-lettered first. Buffered
+    events are flushed at exit, but are lost if the process is killed.
+    """
+    
+    _shared = None
+    _shared_lock = threading.Lock()
+    
+    def __init__(self, batch_size=EMAIL_EVENT_BATCH_SIZE, flush_interval=EMAIL_EVENT_FLUSH_INTERVAL,
+                 max_buffered=EMAIL_EVENT_MAX_BUFFERED):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self.dead_letters = deque(maxlen=max_buffered)  # (event, error) pairs that couldn't be written
+        
+        self._events = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+    
+    @classmethod
+    def shared(cls):
+        """Process-wide buffer fed by every webhook request"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+    
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='email-event-flusher', daemon=True)
+            self._thread.start()
+        atexit.register(self.flush)
+    
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self.flush()
+    
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Email event flusher error: {str(e)}", flush=True)
+    
+    def add(self, events):
+        """Buffer normalized events; returns how many are waiting"""
+        with self._lock:
+            self._events.extend(events)
+            self._trim()
+            waiting = len(self._events)
+        self.start()
+        if waiting >= self.batch_size:
+            self._wake.set()
+        return waiting
+    
+    def _trim(self):
+        """Dead-letter the oldest events beyond max_buffered (caller holds _lock)"""
+        overflow = len(self._events) - self.max_buffered
+        if overflow > 0:
+            print(f"Email event buffer full; dropping {overflow} oldest events", flush=True)
+            self.dead_letters.extend((event, 'buffer full') for event in self._events[:overflow])
+            del self._events[:overflow]
+    
+    def _write(self, events):
+        """Write a batch, bisecting on failure; returns (written, duplicates, [(failed event, error)])"""
+        result = EmailEventService.write(events)
+        if result['success']:
+            return result['written'], result['duplicates'], []
+        if len(events) == 1:
+            return 0, 0, [(events[0], result['error'])]
+        
+        middle = len(events) // 2
+        written, duplicates, failed = self._write(events[:middle])
+        more_written, more_duplicates, more_failed = self._write(events[middle:])
+        return written + more_written, duplicates + more_duplicates, failed + more_failed
+    
+    def flush(self):
+        """Write everything buffered, batch_size events per transaction"""
+        written = 0
+        duplicates = 0
+        failed = []
+        with self._flush_lock:
+            with self._lock:
+                events, self._events = self._events, []
+            
+            for start in range(0, len(events), self.batch_size):
+                batch_written, batch_duplicates, batch_failed = self._write(events[start:start + self.batch_size])
+                written += batch_written
+                duplicates += batch_duplicates
+                failed += batch_failed
+            
+            if failed and not (written or duplicates):
+                # Nothing went through: keep the events for the next flush rather than blaming them
+                with self._lock:
+                    self._events[:0] = [event for event, _ in failed]
+                    self._trim()
+                return {'success': False, 'error': failed[0][1], 'written': 0, 'duplicates': 0}
+            
+            for event, error in failed:
+                print(f"Dead-lettered email event {event['event_key']}: {error}", flush=True)
+            self.dead_letters.extend(failed)
+        
+        return {'success': True, 'written': written, 'duplicates': duplicates, 'dead_lettered': len(failed)}
@@ -0,0 +1,419 @@
+from sqlalchemy import func, select, update, insert, case
+from collections import Counter
+from datetime import datetime, timedelta
+import random
+import threading
+import uuid
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import get_session
+from database.upsert import insert_missing
+from models.outbox_message import OutboxMessage
+from models.campaign import Campaign
+from models.campaign_recipient import CampaignRecipient
+from models.contact import Contact
+from models.outreach import Outreach
+from models.contact_stats import stats_key, apply_deltas, METRIC_FIELDS
+from services.rate_limiter import TokenBucket
+from config import (EMAIL_SEND_RATE, EMAIL_SEND_BURST, EMAIL_SENDER_WORKERS, EMAIL_MAX_ATTEMPTS,
+                    EMAIL_RETRY_BASE_DELAY, EMAIL_SENDING_TIMEOUT, EMAIL_OUTBOX_INLINE_WORKER)
+
+class EmailOutbox:
+    """Writes outbound email to the email_outbox table and reports delivery status"""
+    
+    STATUSES = ('queued', 'sending', 'sent', 'failed')
+    
+    @staticmethod
+    def campaign_key(campaign_id, contact_id):
+        """Idempotency key for a campaign's email to one contact"""
+        return f"campaign:{campaign_id}:contact:{contact_id}"
+    
+    @staticmethod
+    def message(idempotency_key, to_email, subject, body_html, body_text=None, campaign_id=None, contact_id=None):
+        """Row for enqueue()"""
+        now = datetime.utcnow()
+        return {
+            'idempotency_key': idempotency_key,
+            'campaign_id': campaign_id,
+            'contact_id': contact_id,
+            'to_email': to_email,
+            'subject': subject,
+            'body_html': body_html,
+            'body_text': body_text,
+            'status': 'queued',
+            'attempts': 0,
+            'next_attempt_at': now,
+            'created_at': now,
+        }
+    
+    @staticmethod
+    def enqueue(session, messages):
+        """
+        Add messages (from EmailOutbox.message) in the session's transaction with one INSERT;
+        keys already in the outbox are skipped. The caller commits, then calls OutboxSender.wake().
+        Returns the number queued.
+        """
+        return insert_missing(session.connection(), OutboxMessage.__table__, ['idempotency_key'], messages)
+    
+    @staticmethod
+    def summary(campaign_id=None):
+        """Message counts per status, optionally for one campaign"""
+        session = get_session()
+        try:
+            query = session.query(OutboxMessage.status, func.count(OutboxMessage.id))
+            if campaign_id is not None:
+                query = query.filter(OutboxMessage.campaign_id == campaign_id)
+            counts = dict(query.group_by(OutboxMessage.status).all())
+            return {status: counts.get(status, 0) for status in EmailOutbox.STATUSES}
+        finally:
+            session.close()
+
+class OutboxSender:
+    """
+    Worker pool draining email_outbox. Each worker claims a batch of due messages
+    (one UPDATE stamping its claim token), sends them through EmailService in
+    provider batches, taking one token per provider request from a bucket shared
+    by the pool, and commits the outcome per message as soon as the provider
+    answers. Carrying outcomes over to campaign_recipients and outreach touches
+    is a separate step (apply_outcomes) that a later pass retries if it fails,
+    so a delivered message is never left in 'sending' and sent again.
+    Failures are retried with exponential backoff up to max_attempts; claims
+    left in 'sending' by a crashed worker are retried after EMAIL_SENDING_TIMEOUT.
+    The rate limit is per process, so set EMAIL_SEND_RATE to the provider's
+    limit divided by the number of processes running a pool.
+    """
+    
+    CLAIM_SIZE = 100  # one full provider batch
+    POLL_INTERVAL = 2.0  # seconds an idle worker waits before looking again
+    MAX_RETRY_DELAY = 3600
+    
+    _shared = None
+    _shared_lock = threading.Lock()
+    
+    def __init__(self, workers=EMAIL_SENDER_WORKERS, rate=EMAIL_SEND_RATE, burst=EMAIL_SEND_BURST,
+                 max_attempts=EMAIL_MAX_ATTEMPTS, retry_base_delay=EMAIL_RETRY_BASE_DELAY, email_service=None):
+        """
+        workers: sender threads
+        rate, burst: token bucket limiting sends per second across the pool
+        max_attempts: sends tried before a message is marked failed
+        retry_base_delay: seconds before the first retry, doubled for each later one
+        email_service: EmailService to send through (default: one for the EMAIL_PROVIDER setting)
+        """
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.bucket = TokenBucket(rate, burst)
+        self._email_service = email_service
+        
+        self._lock = threading.Lock()
+        self._threads = []
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+    
+    @classmethod
+    def shared(cls):
+        """Process-wide pool so every request enqueuing mail feeds the same workers and rate limit"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+    
+    @staticmethod
+    def wake():
+        """Start (or nudge) this process's pool after new messages were committed"""
+        if not EMAIL_OUTBOX_INLINE_WORKER:
+            return
+        sender = OutboxSender.shared()
+        sender.start()
+        sender._wake.set()
+    
+    @property
+    def email_service(self):
+        if self._email_service is None:
+            from services.email_service import EmailService
+            self._email_service = EmailService()
+        return self._email_service
+    
+    def start(self):
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            if self._threads:
+                return
+            self._stop.clear()
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"outbox-sender-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        print(f"📬 Outbox sender started ({self.workers} workers, {self.bucket.rate}/s)", flush=True)
+    
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                processed = self.process_batch()
+            except Exception as e:
+                print(f"Outbox sender error: {str(e)}", flush=True)
+                processed = 0
+            
+            if not processed:
+                self._wake.wait(self.POLL_INTERVAL)
+                self._wake.clear()
+    
+    def claim(self, session):
+        """Claim up to CLAIM_SIZE due messages for this worker and return them"""
+        now = datetime.utcnow()
+        
+        # Release claims abandoned by a crashed worker; ones out of attempts fail like any other last attempt
+        abandoned = [
+            OutboxMessage.status == 'sending',
+            OutboxMessage.claimed_at < now - timedelta(seconds=EMAIL_SENDING_TIMEOUT)
+        ]
+        # (apply_outcomes carries them over to campaign_recipients)
+        session.execute(
+            update(OutboxMessage)
+            .where(*abandoned, OutboxMessage.attempts >= self.max_attempts)
+            .values(status='failed', claim_token=None, last_error='Send did not finish (worker stopped)')
+            .execution_options(synchronize_session=False)
+        )
+        session.execute(
+            update(OutboxMessage)
+            .where(*abandoned)
+            .values(status='queued', claim_token=None, last_error='Send did not finish (worker stopped)')
+            .execution_options(synchronize_session=False)
+        )
+        
+        ids = session.scalars(
+            select(OutboxMessage.id)
+            .where(OutboxMessage.status == 'queued', OutboxMessage.next_attempt_at <= now)
+            .order_by(OutboxMessage.next_attempt_at, OutboxMessage.id)
+            .limit(self.CLAIM_SIZE)
+        ).all()
+        if not ids:
+            session.commit()
+            return []
+        
+        # Another worker may claim some of the same ids first; the status check leaves those to it
+        token = uuid.uuid4().hex
+        session.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(ids), OutboxMessage.status == 'queued')
+            .values(status='sending', claim_token=token, claimed_at=now, attempts=OutboxMessage.attempts + 1)
+        )
+        session.commit()
+        
+        return session.query(OutboxMessage).filter(OutboxMessage.claim_token == token).order_by(OutboxMessage.id).all()
+    
+    def deliver(self, messages):
+        """Send messages in provider batches; one result per message"""
+        try:
+            return self.email_service.send_batch([
+                {
+                    'to_email': message.to_email,
+                    'subject': message.subject,
+                    'body_html': message.body_html,
+                    'body_text': message.body_text,
+                    'idempotency_key': message.idempotency_key,
+                }
+                for message in messages
+            ], before_request=self.bucket.acquire)
+        except Exception as e:
+            return [{'success': False, 'error': str(e)} for _ in messages]
+    
+    def retry_delay(self, attempts):
+        """Backoff before the next attempt, with jitter so failed batches don't retry in lockstep"""
+        delay = min(self.retry_base_delay * (2 ** (attempts - 1)), self.MAX_RETRY_DELAY)
+        return delay * random.uniform(0.8, 1.2)
+    
+    def record(self, message, result):
+        now = datetime.utcnow()
+        message.claim_token = None
+        if result.get('success'):
+            message.status = 'sent'
+            message.sent_at = now
+            message.provider_message_id = result.get('id')
+            message.last_error = None
+        else:
+            message.last_error = result.get('error')
+            if message.attempts >= self.max_attempts:
+                message.status = 'failed'
+            else:
+                message.status = 'queued'
+                message.next_attempt_at = now + timedelta(seconds=self.retry_delay(message.attempts))
+    
+    def apply_outcomes(self, ids=None):
+        """
+        Carry sent and failed messages over to campaign_recipients, the campaign counters and
+        outreach touches, in one transaction that also stamps their applied_at: if any of it
+        fails nothing is stamped, and the next pass retries. ids: the messages just recorded
+        (default: up to CLAIM_SIZE left over from earlier passes). Returns how many were applied.
+        """
+        session = get_session()
+        try:
+            pending = [OutboxMessage.status.in_(('sent', 'failed')), OutboxMessage.applied_at.is_(None)]
+            if ids is None:
+                ids = select(OutboxMessage.id).where(*pending).order_by(OutboxMessage.id).limit(self.CLAIM_SIZE)
+            # The applied_at check lets only one worker apply a message
+            messages = session.execute(
+                update(OutboxMessage)
+                .where(OutboxMessage.id.in_(ids), *pending)
+                .values(applied_at=datetime.utcnow())
+                .returning(
+                    OutboxMessage.status, OutboxMessage.campaign_id, OutboxMessage.contact_id,
+                    OutboxMessage.subject, OutboxMessage.body_html, OutboxMessage.sent_at
+                )
+                .execution_options(synchronize_session=False)
+            ).all()
+            if not messages:
+                session.commit()
+                return 0
+            self.update_recipients(session, messages)
+            self.record_touches(session, messages)
+            session.commit()
+            return len(messages)
+        except Exception as e:
+            session.rollback()
+            print(f"Outbox apply error (will retry): {str(e)}", flush=True)
+            return 0
+        finally:
+            session.close()
+    
+    @staticmethod
+    def update_recipients(session, messages):
+        """Carry delivered and terminally failed campaign messages over to campaign_recipients and the campaign counters"""
+        now = datetime.utcnow()
+        for status, counter in (('sent', 'total_sent'), ('failed', 'total_failed')):
+            contact_ids = {}
+            for message in messages:
+                if message.status == status and message.campaign_id and message.contact_id:
+                    contact_ids.setdefault(message.campaign_id, []).append(message.contact_id)
+            
+            for campaign_id, ids in contact_ids.items():
+                values = {'status': status, 'sent_at': now} if status == 'sent' else {'status': status}
+                updated = session.execute(
+                    update(CampaignRecipient)
+                    .where(
+                        CampaignRecipient.campaign_id == campaign_id,
+                        CampaignRecipient.contact_id.in_(ids),
+                        CampaignRecipient.status == 'queued'
+                    )
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                if updated:
+                    column = getattr(Campaign, counter)
+                    session.execute(
+                        update(Campaign)
+                        .where(Campaign.id == campaign_id)
+                        .values({column: func.coalesce(column, 0) + updated})
+                        .execution_options(synchronize_session=False)
+                    )
+    
+    @staticmethod
+    def record_touches(session, messages):
+        """Log delivered messages as outreach on their contacts; a manual send also moves a Lead to Contacted"""
+        delivered = [message for message in messages if message.status == 'sent' and message.contact_id]
+        if not delivered:
+            return
+        now = datetime.utcnow()
+        
+        # Status changes go through the ORM so contact_stats moves the contact to its new rollup key
+        leads = {message.contact_id for message in delivered if not message.campaign_id}
+        if leads:
+            for contact in session.query(Contact).filter(Contact.id.in_(leads), Contact.status == 'Lead'):
+                contact.status = 'Contacted'
+            session.flush()
+        
+        # First-time touches move contacts into the contacted rollup metric
+        touches = Counter(message.contact_id for message in delivered)
+        deltas = {}
+        existing = set()
+        for contact in session.query(
+            Contact.id, Contact.industry, Contact.source, Contact.tier, Contact.status, Contact.total_touches
+        ).filter(Contact.id.in_(list(touches))):
+            existing.add(contact.id)
+            if not contact.total_touches:
+                deltas.setdefault(stats_key(contact._asdict()), dict.fromkeys(METRIC_FIELDS, 0))['contacted'] += 1
+        delivered = [message for message in delivered if message.contact_id in existing]
+        if not delivered:
+            return
+        
+        session.execute(insert(Outreach), [
+            {
+                'contact_id': message.contact_id,
+                'campaign_id': message.campaign_id,
+                'outreach_type': 'Email' if message.campaign_id else 'email',
+                'subject': message.subject,
+                'message': message.body_html,
+                'sent_at': message.sent_at or now
+            }
+            for message in delivered
+        ])
+        
+        session.info['defer_contact_stats'] = True
+        session.execute(
+            update(Contact)
+            .where(Contact.id.in_(list(existing)))
+            .values(
+                total_touches=func.coalesce(Contact.total_touches, 0) + case(
+                    {contact_id: touches[contact_id] for contact_id in existing}, value=Contact.id
+                ),
+                last_contacted=now
+            )
+            .execution_options(synchronize_session=False)
+        )
+        apply_deltas(session.connection(), deltas)
+    
+    def process_batch(self):
+        """Claim and send one batch; returns how many messages were claimed"""
+        session = get_session()
+        # Each provider batch commits its outcomes; keep the claimed rows loaded between commits
+        session.expire_on_commit = False
+        try:
+            messages = self.claim(session)
+            self.apply_outcomes()
+            size = max(1, self.email_service.max_batch_size)
+            for start in range(0, len(messages), size):
+                if self._stop.is_set():
+                    # Stopping: hand the rest back without counting the attempt
+                    for pending in messages[start:]:
+                        pending.status = 'queued'
+                        pending.claim_token = None
+                        pending.attempts -= 1
+                    session.commit()
+                    break
+                
+                chunk = messages[start:start + size]
+                for message, result in zip(chunk, self.deliver(chunk)):
+                    self.record(message, result)
+                session.commit()
+                self.apply_outcomes([message.id for message in chunk if message.status in ('sent', 'failed')])
+            return len(messages)
+        finally:
+            session.close()
+    
+    def drain(self):
+        """Send everything currently due in this thread; returns the number of messages processed"""
+        total = 0
+        while True:
+            processed = self.process_batch()
+            if not processed:
+                return total
+            total += processed
+
+if __name__ == '__main__':
+    # Dedicated sender process: set EMAIL_OUTBOX_INLINE_WORKER=False on the web process and run this
+    sender = OutboxSender()
+    sender.start()
+    try:
+        while True:
+            sender._stop.wait(60)
+    except KeyboardInterrupt:
+        sender.stop()
@@ -0,0 +1,259 @@
+from abc import ABC, abstractmethod
+import hashlib
+import smtplib
+import threading
+import uuid
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+class ProviderError(Exception):
+    """The provider rejected a send request (it will fail the same way if resent as is)"""
+    pass
+
+class PartialBatchError(ProviderError):
+    """
+    A batch that was sent message by message stopped or failed part way.
+    outcomes holds one (message_id, error) per message, in order: message_id is
+    set for messages the provider accepted, error for those it did not.
+    """
+    
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        failed = sum(1 for _, error in outcomes if error)
+        super().__init__(f"{failed} of {len(outcomes)} messages in the batch failed")
+
+class EmailProvider(ABC):
+    """
+    Transport behind EmailService. A message is a dict with from, to, subject,
+    html and optional text and idempotency_key (passed on by providers that
+    deduplicate retried requests). send() returns the provider's message id;
+    send_batch() sends up to max_batch_size messages in one request and returns
+    their ids in order, or raises if the request as a whole failed: ProviderError
+    when the provider rejected it, anything else when it may not have arrived.
+    Providers that send a batch one message at a time raise PartialBatchError
+    once some of its messages were accepted, so those are never resent.
+    """
+    
+    name = 'base'
+    max_batch_size = 1
+    
+    @property
+    def configured(self):
+        return True
+    
+    @abstractmethod
+    def send(self, message):
+        pass
+    
+    def send_batch(self, messages):
+        outcomes = []
+        for message in messages:
+            try:
+                outcomes.append((self.send(message), None))
+            except ProviderError as e:
+                outcomes.append((None, str(e)))
+            except Exception as e:
+                if not any(message_id for message_id, _ in outcomes):
+                    raise
+                outcomes.extend((None, str(e)) for _ in messages[len(outcomes):])
+                break
+        return batch_ids(outcomes)
+
+class ResendProvider(EmailProvider):
+    """
+    Resend HTTP API; batches go to /emails/batch (up to 100 messages per request).
+    Idempotency keys go out as the Idempotency-Key header, so Resend answers a
+    retried request with the original response instead of sending again.
+    """
+    
+    name = 'resend'
+    max_batch_size = 100
+    
+    def __init__(self, api_key):
+        import resend
+        self.resend = resend
+        self.api_key = api_key
+        if api_key:
+            resend.api_key = api_key
+    
+    @property
+    def configured(self):
+        return bool(self.api_key)
+    
+    @staticmethod
+    def params(message):
+        params = {
+            "from": message['from'],
+            "to": [message['to']],
+            "subject": message['subject'],
+            "html": message['html'],
+        }
+        if message.get('text'):
+            params["text"] = message['text']
+        return params
+    
+    @staticmethod
+    def rejected(error):
+        """Resend errors carry the HTTP status as code; 4xx other than 429 (rate limited) is a rejection"""
+        try:
+            code = int(getattr(error, 'code', None))
+        except (TypeError, ValueError):
+            return False
+        return 400 <= code < 500 and code != 429
+    
+    @staticmethod
+    def batch_key(messages):
+        """Idempotency key for a batch: the same messages retried together map to the same key"""
+        keys = [message.get('idempotency_key') for message in messages]
+        if not all(keys):
+            return None
+        return 'batch:' + hashlib.sha256('\n'.join(keys).encode('utf-8')).hexdigest()
+    
+    def _request(self, send, params, idempotency_key=None):
+        try:
+            if idempotency_key:
+                return send(params, options={'idempotency_key': idempotency_key})
+            return send(params)
+        except Exception as e:
+            if self.rejected(e):
+                raise ProviderError(str(e)) from e
+            raise
+    
+    def send(self, message):
+        return self._request(self.resend.Emails.send, self.params(message), message.get('idempotency_key'))['id']
+    
+    def send_batch(self, messages):
+        response = self._request(
+            self.resend.Batch.send, [self.params(message) for message in messages], self.batch_key(messages)
+        )
+        results = response.get('data') if isinstance(response, dict) else response
+        if not isinstance(results, list) or len(results) != len(messages):
+            raise ProviderError(f"Unexpected batch response: {response}")
+        return [result['id'] for result in results]
+
+class SmtpProvider(EmailProvider):
+    """
+    Plain SMTP, one message per send over a connection reused for each batch.
+    Point it at a local sink (e.g. `python -m aiosmtpd -n -l localhost:1025`) to test without a provider.
+    """
+    
+    name = 'smtp'
+    max_batch_size = 50
+    
+    def __init__(self, host, port=587, username=None, password=None, use_tls=True):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+    
+    @property
+    def configured(self):
+        return bool(self.host)
+    
+    def _connect(self):
+        connection = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.use_tls:
+            connection.starttls()
+        if self.username:
+            connection.login(self.username, self.password)
+        return connection
+    
+    @staticmethod
+    def _mime(message):
+        mime = MIMEMultipart('alternative')
+        mime['From'] = message['from']
+        mime['To'] = message['to']
+        mime['Subject'] = message['subject']
+        message_id = f"<{uuid.uuid4().hex}@everlystudio>"
+        mime['Message-ID'] = message_id
+        if message.get('text'):
+            mime.attach(MIMEText(message['text'], 'plain'))
+        mime.attach(MIMEText(message['html'], 'html'))
+        return mime, message_id
+    
+    def send(self, message):
+        return self.send_batch([message])[0]
+    
+    def send_batch(self, messages):
+        connection = self._connect()
+        outcomes = []
+        try:
+            for message in messages:
+                mime, message_id = self._mime(message)
+                try:
+                    connection.sendmail(message['from'], [message['to']], mime.as_string())
+                    outcomes.append((message_id, None))
+                except smtplib.SMTPRecipientsRefused:
+                    outcomes.append((None, f"Recipient refused: {message['to']}"))
+                except (smtplib.SMTPDataError, smtplib.SMTPSenderRefused) as e:
+                    # Refused for this message only (the connection is reset and still usable);
+                    # a 4xx reply is temporary, so the message is retried later like any failure
+                    outcomes.append((None, f"{e.smtp_code} {e.smtp_error!r}"))
+        except Exception as e:
+            # The connection broke: messages already accepted stay sent, the rest are not
+            if not any(message_id for message_id, _ in outcomes):
+                raise
+            outcomes.extend((None, str(e)) for _ in messages[len(outcomes):])
+        finally:
+            try:
+                connection.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+        return batch_ids(outcomes)
+
+class MemoryProvider(EmailProvider):
+    """
+    In-process sink for tests: records every message instead of sending it.
+    Addresses in fail_addresses are rejected, and like Resend, a batch holding
+    one of them is rejected as a whole.
+    """
+    
+    name = 'memory'
+    
+    def __init__(self, max_batch_size=100, fail_addresses=None):
+        self.max_batch_size = max_batch_size
+        self.fail_addresses = set(fail_addresses or [])
+        self.sent = []
+        self.requests = 0
+        self._lock = threading.Lock()
+    
+    def _check(self, message):
+        if message['to'] in self.fail_addresses:
+            raise ProviderError(f"Rejected recipient {message['to']}")
+    
+    def send(self, message):
+        with self._lock:
+            self.requests += 1
+            self._check(message)
+            self.sent.append(message)
+            return f"memory-{len(self.sent)}"
+    
+    def send_batch(self, messages):
+        with self._lock:
+            self.requests += 1
+            for message in messages:
+                self._check(message)
+            ids = []
+            for message in messages:
+                self.sent.append(message)
+                ids.append(f"memory-{len(self.sent)}")
+            return ids
+
+def batch_ids(outcomes):
+    """Ids for a batch sent message by message, or the error describing which ones failed"""
+    if all(error is None for _, error in outcomes):
+        return [message_id for message_id, _ in outcomes]
+    if len(outcomes) == 1:
+        raise ProviderError(outcomes[0][1])
+    raise PartialBatchError(outcomes)
+
+def get_provider(name, api_key=None, smtp_host=None, smtp_port=587, smtp_username=None, smtp_password=None, smtp_use_tls=True):
+    """Provider for the EMAIL_PROVIDER setting (resend, smtp or memory)"""
+    if name == 'resend':
+        return ResendProvider(api_key)
+    if name == 'smtp':
+        return SmtpProvider(smtp_host, smtp_port, smtp_username, smtp_password, use_tls=smtp_use_tls)
+    if name == 'memory':
+        return MemoryProvider()
+    raise ValueError(f"Unknown email provider '{name}'")
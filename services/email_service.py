@@ -1,48 +1,61 @@
 import os
-import resend
+import sys
 from dotenv import load_dotenv
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.email_providers import get_provider, ProviderError, PartialBatchError
+from config import EMAIL_PROVIDER, SMTP_HOST, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD, SMTP_USE_TLS
+
 load_dotenv()
 
 class EmailService:
-    def __init__(self):
+    def __init__(self, provider=None):
+        """provider: EmailProvider to send through (default: the EMAIL_PROVIDER setting)"""
         self.api_key = os.getenv('RESEND_API_KEY')
         self.from_email = os.getenv('SMTP_FROM_EMAIL', 'hello@everlystudio.co')
         self.from_name = os.getenv('SMTP_FROM_NAME', 'Everly Studio')
         
-        if self.api_key:
-            resend.api_key = self.api_key
+        self.provider = provider or get_provider(
+            EMAIL_PROVIDER, api_key=self.api_key, smtp_host=SMTP_HOST, smtp_port=SMTP_PORT,
+            smtp_username=SMTP_USERNAME, smtp_password=SMTP_PASSWORD, smtp_use_tls=SMTP_USE_TLS
+        )
         
         # Log configuration
-        print(f"📧 Email Service Initialized (Resend):", flush=True)
+        print(f"📧 Email Service Initialized ({self.provider.name}):", flush=True)
         print(f"  From Email: {self.from_email}", flush=True)
-        print(f"  API Key Configured: {'Yes' if self.api_key else 'No'}", flush=True)
-        
+        print(f"  Provider Configured: {'Yes' if self.provider.configured else 'No'}", flush=True)
+    
+    @property
+    def max_batch_size(self):
+        return self.provider.max_batch_size
+    
+    def message(self, to_email, subject, body_html, body_text=None, idempotency_key=None):
+        """Provider message for one recipient"""
+        return {
+            'from': f"{self.from_name} <{self.from_email}>",
+            'to': to_email,
+            'subject': subject,
+            'html': body_html,
+            'text': body_text,
+            'idempotency_key': idempotency_key,
+        }
+    
     def send_email(self, to_email, subject, body_html, body_text=None):
-        """Send a single email using Resend"""
+        """Send a single email"""
         try:
-            if not self.api_key:
-                error_msg = "Resend API key not configured"
+            if not self.provider.configured:
+                error_msg = f"Email provider '{self.provider.name}' not configured"
                 print(f"❌ {error_msg}", flush=True)
                 return {'success': False, 'error': error_msg}
             
-            print(f"📤 Sending email to {to_email} via Resend...", flush=True)
-            
-            params = {
-                "from": f"{self.from_name} <{self.from_email}>",
-                "to": [to_email],
-                "subject": subject,
-                "html": body_html,
-            }
-            
-            if body_text:
-                params["text"] = body_text
+            print(f"📤 Sending email to {to_email} via {self.provider.name}...", flush=True)
             
-            email = resend.Emails.send(params)
-            
-            print(f"✅ Email sent successfully to {to_email} (ID: {email['id']})", flush=True)
-            return {'success': True}
+            message_id = self.provider.send(self.message(to_email, subject, body_html, body_text))
             
+            print(f"✅ Email sent successfully to {to_email} (ID: {message_id})", flush=True)
+            return {'success': True, 'id': message_id}
+        
         except Exception as e:
             error_msg = f"Error sending email: {str(e)}"
             print(f"❌ {error_msg}", flush=True)
@@ -50,8 +63,77 @@ class EmailService:
             traceback.print_exc()
             return {'success': False, 'error': error_msg}
     
+    def send_batch(self, messages, before_request=None):
+        """
+        Send personalized emails in provider batches (up to max_batch_size per request).
+        messages: dicts with to_email, subject, body_html and optional body_text and idempotency_key
+        before_request: called before every provider request (e.g. a rate limiter's acquire)
+        A batch the provider rejects (ProviderError) is retried one message at a time, so one
+        bad recipient fails alone. When the provider reports which messages of a batch it
+        accepted (PartialBatchError), only the others fail and nothing is resent.
+        Returns one {'success', 'id' | 'error'} per message, in order.
+        Any other error (timeout, connection, provider outage) may mean the batch went out, so
+        it is never resent individually: it is raised if nothing was sent yet, else the
+        remaining messages fail with it.
+        """
+        if not self.provider.configured:
+            error_msg = f"Email provider '{self.provider.name}' not configured"
+            return [{'success': False, 'error': error_msg} for _ in messages]
+        
+        results = []
+        size = max(1, self.max_batch_size)
+        for start in range(0, len(messages), size):
+            chunk = messages[start:start + size]
+            provider_messages = [
+                self.message(m['to_email'], m['subject'], m['body_html'], m.get('body_text'), m.get('idempotency_key'))
+                for m in chunk
+            ]
+            
+            if before_request:
+                before_request()
+            try:
+                ids = self.provider.send_batch(provider_messages)
+                results.extend({'success': True, 'id': message_id} for message_id in ids)
+                print(f"✅ Sent batch of {len(chunk)} emails via {self.provider.name}", flush=True)
+                continue
+            except PartialBatchError as e:
+                results.extend(
+                    {'success': True, 'id': message_id} if error is None
+                    else {'success': False, 'error': f"Error sending email: {error}"}
+                    for message_id, error in e.outcomes
+                )
+                print(f"⚠️ Batch of {len(chunk)} partly sent ({str(e)})", flush=True)
+                continue
+            except ProviderError as e:
+                if len(chunk) == 1:
+                    results.append({'success': False, 'error': f"Error sending email: {str(e)}"})
+                    continue
+                print(f"⚠️ Batch of {len(chunk)} rejected ({str(e)}), sending individually", flush=True)
+            except Exception as e:
+                return self._fail_remaining(results, messages, e)
+            
+            for provider_message in provider_messages:
+                if before_request:
+                    before_request()
+                try:
+                    results.append({'success': True, 'id': self.provider.send(provider_message)})
+                except ProviderError as e:
+                    results.append({'success': False, 'error': f"Error sending email: {str(e)}"})
+                except Exception as e:
+                    return self._fail_remaining(results, messages, e)
+        
+        return results
+    
+    @staticmethod
+    def _fail_remaining(results, messages, error):
+        """Raise a transport error, or once some messages went out, fail the rest with it"""
+        if not results:
+            raise error
+        print(f"❌ Sending stopped after {len(results)} emails: {str(error)}", flush=True)
+        return results + [{'success': False, 'error': f"Error sending email: {str(error)}"}] * (len(messages) - len(results))
+    
     def send_bulk_emails(self, recipients, subject, body_html, body_text=None):
-        """Send emails to multiple recipients"""
+        """Send emails to multiple recipients (in provider batches)"""
         results = {
             'total': len(recipients),
             'sent': 0,
@@ -59,9 +141,12 @@ class EmailService:
             'errors': []
         }
         
-        for recipient in recipients:
-            result = self.send_email(recipient['email'], subject, body_html, body_text)
-            
+        messages = [
+            {'to_email': recipient['email'], 'subject': subject, 'body_html': body_html, 'body_text': body_text}
+            for recipient in recipients
+        ]
+        
+        for recipient, result in zip(recipients, self.send_batch(messages)):
             if result['success']:
                 results['sent'] += 1
             else:
@@ -74,33 +159,33 @@ class EmailService:
         return results
     
     def test_connection(self):
-        """Test Resend API connection"""
+        """Test email provider connection"""
         try:
-            if not self.api_key:
+            if not self.provider.configured:
                 return {
                     'success': False, 
-                    'error': 'Resend API key not configured'
+                    'error': f"Email provider '{self.provider.name}' not configured"
                 }
             
-            print("Testing Resend API connection...", flush=True)
+            print(f"Testing {self.provider.name} connection...", flush=True)
             
-            # Try sending a test email to verify the API key works
+            # Try sending a test email to verify the provider works
             # Note: This will actually send an email
             test_result = self.send_email(
                 to_email=self.from_email,  # Send test to yourself
                 subject="Test Email from Everly Studio",
-                body_html="<p>This is a test email to verify your Resend integration is working!</p>"
+                body_html="<p>This is a test email to verify your email integration is working!</p>"
             )
             
             if test_result['success']:
-                print("✅ Resend API connection successful", flush=True)
-                return {'success': True, 'message': 'Resend API connection successful'}
+                print(f"✅ {self.provider.name} connection successful", flush=True)
+                return {'success': True, 'message': f'{self.provider.name} connection successful'}
             else:
                 return {'success': False, 'error': test_result.get('error')}
-            
+        
         except Exception as e:
-            error_msg = f"Resend API test failed: {str(e)}"
+            error_msg = f"Email provider test failed: {str(e)}"
             print(f"❌ {error_msg}", flush=True)
             import traceback
             traceback.print_exc()
-            return {'success': False, 'error': error_msg}
\ No newline at end of file
+            return {'success': False, 'error': error_msg}
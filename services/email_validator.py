@@ -0,0 +1,98 @@
+import re
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Everything that makes a scraped address useless, folded into one pattern:
+# hash-looking local parts (tracking pixels), placeholder/no-reply mailboxes,
+# and "emails" that are really asset filenames like logo@2x.png
+INVALID_EMAIL_PATTERN = re.compile(
+    r'^(?:[a-f0-9]{32}|[a-f0-9]{40})@'
+    r'|(?:user|email|noreply|no-reply)@'
+    r'|\.(?:png|jpe?g|gif|svg|webp|ico|css|js)$'
+)
+
+# Address shape only (no DNS or MX lookup): dot-atom local part, and a syntactically
+# valid host name (labels of 1-63 chars without edge hyphens, alphabetic or punycode TLD)
+EMAIL_SYNTAX_PATTERN = re.compile(
+    r"^(?!\.)(?!.*\.\.)[a-z0-9!#$%&'*+/=?^_`{|}~.-]{1,64}(?<!\.)"
+    r'@(?=.{1,253}$)(?:(?!-)[a-z0-9-]{1,63}(?<!-)\.)+(?:[a-z]{2,63}|xn--[a-z0-9-]{1,59})$'
+)
+
+# Placeholder domains and analytics/monitoring vendors whose addresses show up in page source
+BLOCKED_DOMAINS = frozenset([
+    'domain.com', 'example.com', 'example.org', 'example.net',
+    'sentry.io', 'wixpress.com', 'segment.com', 'amplitude.com', 'mixpanel.com',
+])
+
+DISPOSABLE_DOMAINS = frozenset([
+    '10minutemail.com', '20minutemail.com', 'dispostable.com', 'emailondeck.com',
+    'fakeinbox.com', 'getairmail.com', 'getnada.com', 'guerrillamail.com',
+    'guerrillamail.net', 'guerrillamailblock.com', 'maildrop.cc', 'mailinator.com',
+    'mailnesia.com', 'mintemail.com', 'mohmal.com', 'mytemp.email', 'sharklasers.com',
+    'spamgourmet.com', 'temp-mail.org', 'tempmail.com', 'tempmailo.com',
+    'throwawaymail.com', 'trashmail.com', 'yopmail.com',
+])
+
+class EmailValidator:
+    """
+    Single source of truth for deciding whether a scraped email is worth keeping.
+    Used by WebsiteAnalyzer while extracting and LeadDiscoveryService while enriching.
+    """
+    
+    @staticmethod
+    def check(email):
+        """Return None if the email is valid, otherwise a short reason string"""
+        if not email or '@' not in email:
+            return 'missing_at'
+        
+        email_lower = email.strip().lower()
+        
+        if INVALID_EMAIL_PATTERN.search(email_lower):
+            return 'pattern'
+        
+        if not EMAIL_SYNTAX_PATTERN.match(email_lower):
+            return 'syntax'
+        
+        domain = email_lower.rpartition('@')[2]
+        
+        if EmailValidator._in_domain_set(domain, BLOCKED_DOMAINS):
+            return 'blocked_domain'
+        
+        if EmailValidator._in_domain_set(domain, DISPOSABLE_DOMAINS):
+            return 'disposable'
+        
+        return None
+    
+    @staticmethod
+    def is_valid(email):
+        """Check if email is valid and not a tracking/monitoring/disposable address"""
+        return EmailValidator.check(email) is None
+    
+    @staticmethod
+    def validate_batch(emails):
+        """Validate a list of emails in one call, returning a parallel list of booleans"""
+        check = EmailValidator.check
+        return [check(email) is None for email in emails]
+    
+    @staticmethod
+    def filter_valid(emails):
+        """Return only the valid emails, preserving order"""
+        check = EmailValidator.check
+        return [email for email in emails if check(email) is None]
+    
+    @staticmethod
+    def _in_domain_set(domain, domains):
+        """Match the domain or any parent domain (o123.ingest.sentry.io -> sentry.io)"""
+        if domain in domains:
+            return True
+        
+        index = domain.find('.')
+        while index != -1:
+            parent = domain[index + 1:]
+            if parent in domains:
+                return True
+            index = domain.find('.', index + 1)
+        
+        return False
@@ -0,0 +1,266 @@
+import asyncio
+import requests
+from contextlib import contextmanager, asynccontextmanager
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+import socket
+import threading
+import time
+import weakref
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CRAWL_BUDGET, CRAWL_BUDGET_WINDOW, CRAWL_PER_HOST_CONCURRENCY, CRAWL_PER_HOST_DELAY
+
+class RobotsDisallowed(Exception):
+    """robots.txt forbids fetching this URL"""
+    pass
+
+class CrawlBudgetExceeded(Exception):
+    """The global fetch budget for the current window is spent"""
+    pass
+
+class FetchCancelled(Exception):
+    """The fetch was cancelled while waiting for its slot"""
+    pass
+
+class _HostState:
+    def __init__(self, concurrency, delay):
+        self.semaphore = threading.BoundedSemaphore(concurrency)
+        self.async_semaphores = weakref.WeakKeyDictionary()  # event loop -> asyncio.Semaphore
+        self.delay = delay
+        self.next_time = 0.0
+        self.backoff = 0.0
+
+class FetchScheduler:
+    """
+    Politeness scheduler for website fetches.
+    Requests are grouped by resolved IP (so many small sites on one Wix or
+    Squarespace box share a slot), limited per group in concurrency and spacing,
+    checked against robots.txt and counted against a global crawl budget.
+    """
+    
+    USER_AGENT = 'EverlyStudio'
+    ROBOTS_TTL = 3600
+    IP_CACHE_TTL = 300  # seconds a hostname's resolved IP is reused (sites move between hosts)
+    ROBOTS_TIMEOUT = 5
+    MAX_DELAY = 10.0
+    CANCEL_POLL = 0.1  # seconds between cancellation checks while waiting for a group's concurrency slot
+    
+    _shared = None
+    _shared_lock = threading.Lock()
+    
+    def __init__(self, per_host_concurrency=CRAWL_PER_HOST_CONCURRENCY, per_host_delay=CRAWL_PER_HOST_DELAY,
+                 budget=CRAWL_BUDGET, budget_window=CRAWL_BUDGET_WINDOW, group_by_ip=True, respect_robots=True):
+        """
+        per_host_concurrency: requests in flight per host/IP group
+        per_host_delay: minimum seconds between request starts in a group
+        budget: fetches allowed per budget_window seconds across all hosts (None = unlimited)
+        group_by_ip: key groups on resolved IP instead of hostname
+        respect_robots: check robots.txt before fetching
+        """
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_delay = per_host_delay
+        self.budget = budget
+        self.budget_window = budget_window
+        self.group_by_ip = group_by_ip
+        self.respect_robots = respect_robots
+        
+        self._lock = threading.Lock()
+        self._hosts = {}
+        self._ip_cache = {}
+        self._robots = {}
+        self._robots_locks = {}
+        self._window_start = time.monotonic()
+        self._spent = 0
+    
+    @classmethod
+    def shared(cls):
+        """Process-wide scheduler so every analyzer in a worker shares host slots and budget"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+    
+    def host_key(self, url):
+        """Group key for a URL: resolved IP when group_by_ip, else hostname"""
+        host = (urlparse(url).hostname or '').lower()
+        if not self.group_by_ip or not host:
+            return host
+        
+        with self._lock:
+            cached = self._ip_cache.get(host)
+            if cached and time.monotonic() - cached[1] < self.IP_CACHE_TTL:
+                return cached[0]
+        
+        try:
+            key = socket.gethostbyname(host)
+        except OSError:
+            key = host
+        
+        with self._lock:
+            self._ip_cache[host] = (key, time.monotonic())
+        return key
+    
+    def _state(self, key):
+        with self._lock:
+            state = self._hosts.get(key)
+            if state is None:
+                state = _HostState(self.per_host_concurrency, self.per_host_delay)
+                self._hosts[key] = state
+            return state
+    
+    def _robots_for(self, url):
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        
+        with self._lock:
+            cached = self._robots.get(origin)
+            if cached and time.monotonic() - cached[1] < self.ROBOTS_TTL:
+                return cached[0]
+            origin_lock = self._robots_locks.setdefault(origin, threading.Lock())
+        
+        # One fetch per origin even when many threads ask at once
+        with origin_lock:
+            with self._lock:
+                cached = self._robots.get(origin)
+                if cached and time.monotonic() - cached[1] < self.ROBOTS_TTL:
+                    return cached[0]
+            
+            parser = RobotFileParser()
+            try:
+                response = requests.get(f"{origin}/robots.txt", timeout=self.ROBOTS_TIMEOUT,
+                                        headers={'User-Agent': self.USER_AGENT})
+                if response.status_code in (401, 403):
+                    parser.disallow_all = True
+                elif response.status_code >= 400:
+                    parser.allow_all = True
+                else:
+                    parser.parse(response.text.splitlines())
+            except Exception:
+                # Unreachable robots.txt: treat the site as open
+                parser.allow_all = True
+            
+            with self._lock:
+                self._robots[origin] = (parser, time.monotonic())
+            return parser
+    
+    def is_allowed(self, url):
+        """Check robots.txt (cached per origin) for url"""
+        if not self.respect_robots:
+            return True
+        return self._robots_for(url).can_fetch(self.USER_AGENT, url)
+    
+    def _crawl_delay(self, url):
+        if not self.respect_robots:
+            return None
+        delay = self._robots_for(url).crawl_delay(self.USER_AGENT)
+        return float(delay) if delay else None
+    
+    def prepare(self, url):
+        """
+        Blocking checks done before a fetch: robots.txt and host grouping.
+        Returns the group key; raises RobotsDisallowed.
+        """
+        if not self.is_allowed(url):
+            raise RobotsDisallowed(url)
+        
+        key = self.host_key(url)
+        crawl_delay = self._crawl_delay(url)
+        if crawl_delay:
+            state = self._state(key)
+            with self._lock:
+                state.delay = min(max(state.delay, crawl_delay), self.MAX_DELAY)
+        return key
+    
+    def reserve(self, key):
+        """
+        Claim the next start time for a group and spend one unit of budget.
+        Returns seconds to wait before sending; raises CrawlBudgetExceeded.
+        """
+        state = self._state(key)
+        with self._lock:
+            now = time.monotonic()
+            
+            if now - self._window_start >= self.budget_window:
+                self._window_start = now
+                self._spent = 0
+            
+            if self.budget is not None and self._spent >= self.budget:
+                raise CrawlBudgetExceeded(f"Crawl budget of {self.budget} fetches spent")
+            self._spent += 1
+            
+            start = max(now, state.next_time)
+            state.next_time = start + state.delay + state.backoff
+            return start - now
+    
+    def record_response(self, key, status_code, retry_after=None):
+        """Back a group off on 429/503 and recover gradually on success"""
+        state = self._state(key)
+        with self._lock:
+            if status_code in (429, 503):
+                try:
+                    wait = float(retry_after) if retry_after else None
+                except ValueError:
+                    wait = None
+                state.backoff = min(max(state.backoff * 2, state.delay, 1.0), self.MAX_DELAY)
+                state.next_time = max(state.next_time, time.monotonic() + (wait or state.backoff))
+            elif state.backoff:
+                state.backoff = state.backoff / 2 if state.backoff > 0.1 else 0.0
+    
+    @contextmanager
+    def slot(self, url, cancel_event=None):
+        """
+        Blocking context manager wrapping one fetch (threads).
+        Setting cancel_event while it waits for the group's slot or spacing raises FetchCancelled.
+        """
+        key = self.prepare(url)
+        state = self._state(key)
+        if cancel_event is None:
+            state.semaphore.acquire()
+        else:
+            while not state.semaphore.acquire(timeout=self.CANCEL_POLL):
+                if cancel_event.is_set():
+                    raise FetchCancelled(url)
+        try:
+            wait = self.reserve(key)
+            if cancel_event is None:
+                if wait > 0:
+                    time.sleep(wait)
+            elif cancel_event.wait(max(wait, 0)):
+                raise FetchCancelled(url)
+            yield key
+        finally:
+            state.semaphore.release()
+    
+    def _async_semaphore(self, key):
+        """The group's concurrency semaphore for the running event loop (asyncio semaphores are per loop)"""
+        state = self._state(key)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = state.async_semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.per_host_concurrency)
+                state.async_semaphores[loop] = semaphore
+            return semaphore
+    
+    @asynccontextmanager
+    async def async_slot(self, url):
+        """Event-loop context manager wrapping one fetch; holds one of the group's concurrency slots"""
+        key = await asyncio.to_thread(self.prepare, url)
+        async with self._async_semaphore(key):
+            wait = self.reserve(key)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            yield key
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'hosts': len(self._hosts),
+                'budget': self.budget,
+                'spent': self._spent,
+                'robots_cached': len(self._robots)
+            }
@@ -0,0 +1,100 @@
+from functools import lru_cache
+import re
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Canonical industries in priority order (the first industry with a matching
+# keyword wins) with the keywords that map to them. Covers LeadScorer's
+# buckets plus Google place types and Yelp category aliases; the finer
+# scraper categories (dental, veterinary, accounting, beauty) fold into
+# their parent industry so every source stores the same values.
+INDUSTRY_TAXONOMY = [
+    ('healthcare', ['health', 'medical', 'doctor', 'physician', 'hospital', 'dental', 'dentist',
+                    'vet', 'veterinary', 'veterinarian']),
+    ('home_services', ['home_services', 'homeservices', 'contractor', 'general_contractor', 'construction',
+                       'plumbing', 'plumber', 'roofing', 'electrician', 'hvac']),
+    ('food', ['restaurant', 'cafe', 'bakery', 'bakeries', 'catering', 'meal_takeaway', 'meal_delivery']),
+    ('legal', ['lawyer', 'attorney', 'law', 'accounting', 'accountant']),
+    ('wellness', ['spa', 'gym', 'fitness', 'physiotherapist', 'salon', 'beauty', 'beautysvc', 'hair']),
+    ('retail', ['store', 'shop', 'shopping', 'boutique', 'clothing']),
+    ('real_estate', ['realestate', 'realtor']),
+    ('auto', ['car_repair', 'car_dealer', 'car_wash', 'autorepair']),
+    ('pet_services', ['pet', 'pets', 'grooming', 'groomer']),
+    ('cleaning', ['cleaner', 'janitorial']),
+    ('landscaping', ['lawn', 'gardener']),
+    ('photography', ['photographer']),
+]
+
+DEFAULT_INDUSTRY = 'other'
+
+# Keywords this short only match a whole token ("spa" but not "space")
+SHORT_KEYWORD_LENGTH = 3
+
+def _build_index():
+    index = {}
+    for priority, (industry, keywords) in enumerate(INDUSTRY_TAXONOMY):
+        for keyword in [industry] + keywords:
+            index.setdefault(keyword, (priority, industry))
+    return index
+
+# keyword -> (priority, industry)
+KEYWORD_INDEX = _build_index()
+
+def _build_matcher():
+    # One alternation over every keyword, longest first so "lawn" beats "law".
+    # Keywords must start a token (raw values are "_", " " or "," separated)
+    # but may prefix it, so "dentists" and "hairsalons" still match.
+    alternatives = []
+    for keyword in sorted(KEYWORD_INDEX, key=len, reverse=True):
+        pattern = re.escape(keyword)
+        if len(keyword) <= SHORT_KEYWORD_LENGTH:
+            pattern += r's?(?![a-z0-9])'
+        alternatives.append(pattern)
+    return re.compile(r'(?<![a-z0-9])(' + '|'.join(alternatives) + ')')
+
+INDUSTRY_MATCHER = _build_matcher()
+
+@lru_cache(maxsize=4096)
+def _normalize(raw_lower):
+    best = None
+    for match in INDUSTRY_MATCHER.finditer(raw_lower):
+        keyword = match.group(1)
+        entry = KEYWORD_INDEX.get(keyword) or KEYWORD_INDEX[keyword[:-1]]
+        if best is None or entry[0] < best[0]:
+            best = entry
+            if best[0] == 0:
+                break
+    return best[1] if best else DEFAULT_INDUSTRY
+
+class IndustryTaxonomy:
+    """
+    Single industry normalizer shared by the scrapers, LeadScorer and imports.
+    Matching is one precompiled regex pass; results are memoized per raw value.
+    """
+    
+    INDUSTRIES = [industry for industry, _ in INDUSTRY_TAXONOMY] + [DEFAULT_INDUSTRY]
+    
+    @staticmethod
+    def normalize(raw_industry):
+        """Map a raw industry string, or a list of source categories, to a canonical industry"""
+        if not raw_industry:
+            return DEFAULT_INDUSTRY
+        
+        if not isinstance(raw_industry, str):
+            raw_industry = ' '.join(term for term in raw_industry if term)
+        
+        return _normalize(raw_industry.lower())
+    
+    @staticmethod
+    def normalize_many(raw_industries):
+        """Normalize a list of raw values, matching each distinct value once"""
+        seen = {}
+        results = []
+        for raw_industry in raw_industries:
+            key = raw_industry if isinstance(raw_industry, (str, type(None))) else tuple(raw_industry)
+            if key not in seen:
+                seen[key] = IndustryTaxonomy.normalize(raw_industry)
+            results.append(seen[key])
+        return results
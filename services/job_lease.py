@@ -0,0 +1,60 @@
+from sqlalchemy import update, or_
+from datetime import datetime, timedelta
+import uuid
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import get_session
+from database.upsert import insert_missing
+from models.job_lease import JobLease
+
+class Lease:
+    """
+    Database lease on a named job, held from acquire() until release().
+    A holder renews it while working; if the process dies the lease lapses
+    after `seconds` and another process can take it.
+    """
+    
+    def __init__(self, name, seconds):
+        self.name = name
+        self.seconds = seconds
+        self.owner = uuid.uuid4().hex
+    
+    def _take(self, conditions):
+        now = datetime.utcnow()
+        session = get_session()
+        try:
+            insert_missing(session.connection(), JobLease.__table__, ['name'], [
+                {'name': self.name, 'owner': None, 'expires_at': now, 'updated_at': now}
+            ])
+            taken = session.execute(
+                update(JobLease)
+                .where(JobLease.name == self.name, *conditions(now))
+                .values(owner=self.owner, expires_at=now + timedelta(seconds=self.seconds), updated_at=now)
+            ).rowcount
+            session.commit()
+            return bool(taken)
+        finally:
+            session.close()
+    
+    def acquire(self):
+        """Take the lease if it is free, lapsed or already ours"""
+        return self._take(lambda now: [or_(JobLease.owner.is_(None), JobLease.expires_at < now, JobLease.owner == self.owner)])
+    
+    def renew(self):
+        """Extend the lease; False if another process took it after it lapsed"""
+        return self._take(lambda now: [JobLease.owner == self.owner])
+    
+    def release(self):
+        session = get_session()
+        try:
+            session.execute(
+                update(JobLease)
+                .where(JobLease.name == self.name, JobLease.owner == self.owner)
+                .values(owner=None, expires_at=datetime.utcnow())
+            )
+            session.commit()
+        finally:
+            session.close()
@@ -2,7 +2,6 @@ import sys
 import os
 import json
 import time
-import re
 from datetime import datetime
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -12,30 +11,18 @@ from models.contact import Contact
 from models.lead_discovery import LeadDiscovery
 from scraper.google_places import GooglePlacesScraper
 from services.website_analyzer import WebsiteAnalyzer
+from services.async_website_analyzer import AsyncWebsiteAnalyzer
+from services.fetch_scheduler import FetchScheduler
 from services.lead_scorer import LeadScorer
+from services.email_validator import EmailValidator
+from services.rules_engine import RulesEngine
 
 class LeadDiscoveryService:
     
-    # Patterns for invalid/tracking emails
-    INVALID_EMAIL_PATTERNS = [
-        r'user@',
-        r'email@',
-        r'@domain\.com',
-        r'@example\.com',
-        r'@sentry\.io',
-        r'@segment\.com',
-        r'@amplitude\.com',
-        r'@mixpanel\.com',
-        r'noreply@',
-        r'no-reply@',
-        r'^[a-f0-9]{32}@',  # MD5 hashes
-        r'^[a-f0-9]{40}@',  # SHA1 hashes
-    ]
-    
     def __init__(self, google_api_key=None, yelp_api_key=None, progress_callback=None):
         self.google_api_key = google_api_key
         self.yelp_api_key = yelp_api_key
-        self.website_analyzer = WebsiteAnalyzer()
+        self.website_analyzer = WebsiteAnalyzer(scheduler=FetchScheduler.shared())
         self.lead_scorer = LeadScorer()
         self.progress_callback = progress_callback
         
@@ -43,17 +30,7 @@ class LeadDiscoveryService:
     
     def is_valid_email(self, email):
         """Check if email is valid and not a tracking/monitoring email"""
-        if not email or '@' not in email:
-            return False
-        
-        email_lower = email.lower()
-        
-        # Check against invalid patterns
-        for pattern in self.INVALID_EMAIL_PATTERNS:
-            if re.search(pattern, email_lower):
-                return False
-        
-        return True
+        return EmailValidator.is_valid(email)
     
     def report_progress(self, message, step=None, total=None):
         """Report progress to callback and console"""
@@ -70,7 +47,7 @@ class LeadDiscoveryService:
                 source=source,
                 location=location,
                 radius_miles=radius_miles,
-                industries=json.dumps(industries),
+                industries=industries,
                 status='pending'
             )
             session.add(job)
@@ -97,7 +74,7 @@ class LeadDiscoveryService:
             job.started_at = datetime.utcnow()
             session.commit()
             
-            industries = json.loads(job.industries) if job.industries else []
+            industries = job.industries or []
             
             raw_leads = []
             
@@ -146,7 +123,7 @@ class LeadDiscoveryService:
             for i, lead_data in enumerate(raw_leads):
                 self.report_progress(f"Processing: {lead_data.get('name')}", i+1, len(raw_leads))
                 
-                result = self.import_lead(lead_data)
+                result = self.import_lead(lead_data, discovery_id=job.id)
                 
                 if result['imported']:
                     imported += 1
@@ -205,8 +182,8 @@ class LeadDiscoveryService:
             if session:
                 session.close()
     
-    def import_lead(self, lead_data):
-        """Import a single lead"""
+    def import_lead(self, lead_data, discovery_id=None):
+        """Import a single lead (discovery_id: the discovery job it came from)"""
         session = get_session()
         
         try:
@@ -235,6 +212,7 @@ class LeadDiscoveryService:
                 zip_code=lead_data.get('zip_code'),
                 website_url=lead_data.get('website_url'),
                 source=lead_data.get('source'),
+                discovery_id=discovery_id,
                 industry=self.lead_scorer.normalize_industry(lead_data.get('industry'), lead_data.get('source')),
                 status='Lead'
             )
@@ -253,8 +231,11 @@ class LeadDiscoveryService:
         finally:
             session.close()
     
-    def enrich_lead(self, contact_id):
-        """Enrich a lead with website analysis"""
+    def enrich_lead(self, contact_id, analysis=None):
+        """
+        Enrich a lead with website analysis
+        analysis: precomputed analyze_website result (e.g. from a batch run)
+        """
         session = get_session()
         
         try:
@@ -264,7 +245,8 @@ class LeadDiscoveryService:
             
             if contact.website_url:
                 try:
-                    analysis = self.website_analyzer.analyze_website(contact.website_url)
+                    if analysis is None:
+                        analysis = self.website_analyzer.analyze_website(contact.website_url)
                     
                     if analysis:
                         contact.website_health_score = analysis['health_score']
@@ -278,14 +260,18 @@ class LeadDiscoveryService:
                         
                         # Filter valid emails
                         if analysis['emails_found']:
-                            valid_emails = [e for e in analysis['emails_found'] if self.is_valid_email(e)]
+                            valid_emails = EmailValidator.filter_valid(analysis['emails_found'])
                             if valid_emails and not contact.email:
                                 contact.email = valid_emails[0]
                         
                         if not contact.email:
-                            contact_emails = self.website_analyzer.check_contact_page(contact.website_url)
+                            contact_emails = self.website_analyzer.check_contact_page(
+                                contact.website_url,
+                                contact_links=analysis.get('contact_links'),
+                                email_filter=self.is_valid_email
+                            )
                             if contact_emails:
-                                valid_emails = [e for e in contact_emails if self.is_valid_email(e)]
+                                valid_emails = EmailValidator.filter_valid(contact_emails)
                                 if valid_emails:
                                     contact.email = valid_emails[0]
                 except Exception as e:
@@ -295,9 +281,11 @@ class LeadDiscoveryService:
             if contact.email and not self.is_valid_email(contact.email):
                 contact.email = None
             
-            tier, tags = self.lead_scorer.score_lead(contact.to_dict())
+            rule_set = RulesEngine.active()
+            tier, tags = self.lead_scorer.score_lead(contact.to_dict(), rule_set)
             contact.tier = tier
-            contact.tags = json.dumps(tags)
+            contact.tags = tags
+            contact.score_version = rule_set.version
             
             contact.is_enriched = 1
             contact.enriched_at = datetime.utcnow()
@@ -316,8 +304,11 @@ class LeadDiscoveryService:
         finally:
             session.close()
     
-    def bulk_enrich(self, batch_size=10):
-        """Enrich multiple unenriched leads"""
+    def bulk_enrich(self, batch_size=10, concurrent=True):
+        """
+        Enrich multiple unenriched leads
+        concurrent: analyze all websites up front with AsyncWebsiteAnalyzer.analyze_many
+        """
         session = get_session()
         
         try:
@@ -332,12 +323,22 @@ class LeadDiscoveryService:
                     'failed': 0
                 }
             
+            analyses = {}
+            if concurrent:
+                with_website = [c for c in unenriched if c.website_url]
+                self.report_progress(f"Analyzing {len(with_website)} websites concurrently...")
+                
+                analyzer = AsyncWebsiteAnalyzer(scheduler=FetchScheduler.shared())
+                results = analyzer.analyze_many([c.website_url for c in with_website])
+                
+                analyses = {c.id: analysis for c, analysis in zip(with_website, results)}
+            
             enriched_count = 0
             failed_count = 0
             
             for contact in unenriched:
                 try:
-                    result = self.enrich_lead(contact.id)
+                    result = self.enrich_lead(contact.id, analysis=analyses.get(contact.id))
                     if result['success']:
                         enriched_count += 1
                     else:
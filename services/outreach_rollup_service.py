@@ -0,0 +1,289 @@
+from sqlalchemy import func, select, update, delete, exists
+from datetime import datetime, date, timedelta
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import get_session
+from database.upsert import increment_rows, insert_missing
+from models.contact import Contact
+from models.outreach import Outreach
+from models.outreach_rollup import OutreachRollup
+from models.rollup_watermark import RollupWatermark
+from models.rollup_folded_row import RollupFoldedRow
+from services.response_cache import ResponseCache
+from config import OUTREACH_ROLLUP_REFRESH_INTERVAL, OUTREACH_ROLLUP_REFRESH_INLINE
+
+class OutreachRollupService:
+    """
+    Day and week outreach counts by type, campaign, industry and source.
+    refresh() folds in Outreach rows past a high-water mark, so each row is
+    aggregated once; series() reads only the rollup rows in the requested range.
+    A row whose transaction commits after higher ids were folded is caught by
+    re-scanning the RESCAN_WINDOW ids below the mark, skipping the ones
+    rollup_folded_rows records as already folded.
+    Industry and source are the contact's values when the row is folded in.
+    """
+    
+    WATERMARK = 'outreach'
+    RESCAN_WINDOW = 5000  # ids below the mark re-checked for late commits
+    GRANULARITIES = ('day', 'week')
+    KEY_FIELDS = ['granularity', 'bucket_start', 'outreach_type', 'campaign_id', 'industry', 'source']
+    
+    # Dimensions a series can be split or filtered by
+    DIMENSIONS = {
+        'outreach_type': OutreachRollup.outreach_type,
+        'campaign': OutreachRollup.campaign_id,
+        'industry': OutreachRollup.industry,
+        'source': OutreachRollup.source,
+    }
+    
+    @staticmethod
+    def bucket_start(day, granularity):
+        """First day of the bucket holding day (weeks start on Monday)"""
+        if granularity == 'week':
+            return day - timedelta(days=day.weekday())
+        return day
+    
+    @staticmethod
+    def refresh(batch_size=20000):
+        """Fold Outreach rows added since the last refresh into the rollups"""
+        session = get_session()
+        start_time = time.time()
+        folded = 0
+        name = OutreachRollupService.WATERMARK
+        
+        try:
+            while True:
+                last_id = session.query(RollupWatermark.last_id).filter(RollupWatermark.name == name).scalar()
+                floor = max((last_id or 0) - OutreachRollupService.RESCAN_WINDOW, 0)
+                if last_id and not session.query(exists().where(RollupFoldedRow.name == name)).scalar():
+                    # Marks set before folded rows were recorded: everything up to the mark is in
+                    floor = last_id
+                
+                rows = session.query(
+                    Outreach.id,
+                    Outreach.sent_at,
+                    Outreach.outreach_type,
+                    Outreach.campaign_id,
+                    Contact.industry,
+                    Contact.source
+                ).outerjoin(Contact, Contact.id == Outreach.contact_id).filter(
+                    Outreach.id > floor,
+                    ~exists().where(RollupFoldedRow.name == name, RollupFoldedRow.source_id == Outreach.id)
+                ).order_by(Outreach.id).limit(batch_size).all()
+                
+                if not rows:
+                    break
+                
+                # Claim the rows first; a concurrent refresh that recorded any of them makes this one stop
+                claimed = insert_missing(session.connection(), RollupFoldedRow.__table__, ['name', 'source_id'], [
+                    {'name': name, 'source_id': row[0]} for row in rows
+                ])
+                if claimed < len(rows):
+                    session.rollback()
+                    break
+                
+                mark = max(last_id or 0, rows[-1][0])
+                if last_id is None:
+                    session.add(RollupWatermark(name=name, last_id=mark))
+                    session.flush()
+                else:
+                    session.execute(
+                        update(RollupWatermark)
+                        .where(RollupWatermark.name == name, RollupWatermark.last_id < mark)
+                        .values(last_id=mark, updated_at=datetime.utcnow())
+                    )
+                session.execute(
+                    delete(RollupFoldedRow).where(
+                        RollupFoldedRow.name == name,
+                        RollupFoldedRow.source_id <= mark - OutreachRollupService.RESCAN_WINDOW
+                    )
+                )
+                
+                counts = {}
+                for _, sent_at, outreach_type, campaign_id, industry, source in rows:
+                    if sent_at is None:
+                        continue
+                    # 'Email' and 'email' are both used for sends
+                    dimensions = ((outreach_type or '').lower(), campaign_id or 0, industry or '', source or '')
+                    for granularity in OutreachRollupService.GRANULARITIES:
+                        key = (granularity, OutreachRollupService.bucket_start(sent_at.date(), granularity)) + dimensions
+                        counts[key] = counts.get(key, 0) + 1
+                
+                increment_rows(
+                    session.connection(),
+                    OutreachRollup.__table__,
+                    OutreachRollupService.KEY_FIELDS,
+                    [dict(zip(OutreachRollupService.KEY_FIELDS, key), count=count) for key, count in counts.items()],
+                    updated_at=datetime.utcnow()
+                )
+                # Cached timeseries were computed from the rollups as they were
+                ResponseCache.bump('analytics', session.connection())
+                session.commit()
+                folded += len(rows)
+                
+                if len(rows) < batch_size:
+                    break
+            
+            return {'success': True, 'folded': folded, 'elapsed_seconds': round(time.time() - start_time, 2)}
+        
+        except Exception as e:
+            session.rollback()
+            print(f"Error refreshing outreach rollups: {str(e)}", flush=True)
+            return {'success': False, 'error': str(e)}
+        
+        finally:
+            session.close()
+    
+    @staticmethod
+    def rebuild():
+        """Drop the rollups and fold in every Outreach row again"""
+        session = get_session()
+        try:
+            session.execute(delete(OutreachRollup))
+            session.execute(delete(RollupWatermark).where(RollupWatermark.name == OutreachRollupService.WATERMARK))
+            session.execute(delete(RollupFoldedRow).where(RollupFoldedRow.name == OutreachRollupService.WATERMARK))
+            session.commit()
+        finally:
+            session.close()
+        return OutreachRollupService.refresh()
+    
+    @staticmethod
+    def normalize_filters(filters):
+        """{dimension: value} as stored in the rollups (campaign ids as ints, outreach types lowercased)"""
+        normalized = {}
+        for dimension, value in (filters or {}).items():
+            if dimension not in OutreachRollupService.DIMENSIONS:
+                raise ValueError(f"Unknown dimension '{dimension}'")
+            if dimension == 'campaign':
+                value = int(value or 0)
+            elif dimension == 'outreach_type':
+                value = (value or '').lower()
+            normalized[dimension] = value or ''
+        return normalized
+    
+    @staticmethod
+    def series(start, end, granularity='day', group_by=None, filters=None):
+        """
+        Outreach counts per bucket between start and end (dates, inclusive).
+        group_by: optional dimension to split each bucket by
+        filters: {dimension: value} restricting the rows counted
+        Every bucket in the range is returned, with zeros where nothing was sent.
+        Reads the rollups as of the last refresh (RollupRefresher runs it in the background).
+        """
+        if granularity not in OutreachRollupService.GRANULARITIES:
+            raise ValueError(f"Unknown granularity '{granularity}'")
+        if group_by is not None and group_by not in OutreachRollupService.DIMENSIONS:
+            raise ValueError(f"Unknown dimension '{group_by}'")
+        if start > end:
+            raise ValueError("start must be on or before end")
+        
+        first_bucket = OutreachRollupService.bucket_start(start, granularity)
+        conditions = [
+            OutreachRollup.granularity == granularity,
+            OutreachRollup.bucket_start >= first_bucket,
+            OutreachRollup.bucket_start <= end,
+        ]
+        for dimension, value in OutreachRollupService.normalize_filters(filters).items():
+            conditions.append(OutreachRollupService.DIMENSIONS[dimension] == value)
+        
+        group_column = OutreachRollupService.DIMENSIONS[group_by] if group_by else None
+        columns = [OutreachRollup.bucket_start] + ([group_column] if group_by else [])
+        
+        session = get_session()
+        try:
+            rows = session.execute(
+                select(*columns, func.sum(OutreachRollup.count)).where(*conditions).group_by(*columns)
+            ).all()
+        finally:
+            session.close()
+        
+        step = timedelta(days=7 if granularity == 'week' else 1)
+        buckets = {}
+        day = first_bucket
+        while day <= end:
+            buckets[day] = {'bucket': day.isoformat(), 'total': 0}
+            if group_by:
+                buckets[day]['groups'] = {}
+            day += step
+        
+        for row in rows:
+            bucket = buckets.get(row[0])
+            if bucket is None:
+                continue
+            count = int(row[-1] or 0)
+            bucket['total'] += count
+            if group_by:
+                # '' / 0 are stored for missing values
+                value = row[1] or None
+                bucket['groups'][value] = bucket['groups'].get(value, 0) + count
+        
+        return {
+            'granularity': granularity,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'group_by': group_by,
+            'buckets': list(buckets.values())
+        }
+
+class RollupRefresher:
+    """Background thread that refreshes the outreach rollups every interval seconds, off the request path"""
+    
+    _shared = None
+    _shared_lock = threading.Lock()
+    
+    def __init__(self, interval=OUTREACH_ROLLUP_REFRESH_INTERVAL):
+        self.interval = interval
+        
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+    
+    @classmethod
+    def shared(cls):
+        """Process-wide refresher"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+    
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='outreach-rollup-refresher', daemon=True)
+            self._thread.start()
+    
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                OutreachRollupService.refresh()
+            except Exception as e:
+                print(f"Outreach rollup refresher error: {str(e)}", flush=True)
+            self._stop.wait(self.interval)
+    
+    @staticmethod
+    def start_inline():
+        """Run the shared refresher in this process unless a dedicated one is configured"""
+        if OUTREACH_ROLLUP_REFRESH_INLINE:
+            RollupRefresher.shared().start()
+
+if __name__ == '__main__':
+    # Dedicated refresher process: set OUTREACH_ROLLUP_REFRESH_INLINE=False on the web process and run this
+    refresher = RollupRefresher()
+    refresher.start()
+    try:
+        while True:
+            refresher._stop.wait(60)
+    except KeyboardInterrupt:
+        refresher.stop()
@@ -0,0 +1,78 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import threading
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.website_analyzer import parse_page
+
+class ParsingStage:
+    """
+    Process pool for the CPU-bound half of website analysis.
+    Takes raw page bytes and returns the compact parse_page dict, so fetch
+    threads or an event loop never hold the GIL while BeautifulSoup runs.
+    """
+    
+    _shared = None
+    _shared_lock = threading.Lock()
+    
+    def __init__(self, workers=None):
+        """workers: number of parser processes (defaults to CPU count)"""
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = None
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def shared(cls):
+        """One stage per worker process, reused across enrichment batches"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+    
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+    
+    def submit(self, content, page_url, encoding=None):
+        """Queue a page for parsing, returning a concurrent.futures.Future"""
+        return self._get_pool().submit(parse_page, content, page_url, encoding)
+    
+    def parse(self, content, page_url, encoding=None):
+        """Parse one page in the pool, blocking the calling thread until it's done"""
+        try:
+            return self.submit(content, page_url, encoding).result()
+        except BrokenProcessPool:
+            # A parser process died (e.g. OOM on a pathological page); start fresh next time
+            self._reset()
+            return parse_page(content, page_url, encoding)
+    
+    def parse_many(self, pages):
+        """Parse a list of (content, page_url, encoding) tuples, preserving order"""
+        if not pages:
+            return []
+        
+        contents, urls, encodings = zip(*pages)
+        chunksize = max(1, len(pages) // (self.workers * 4))
+        try:
+            return list(self._get_pool().map(parse_page, contents, urls, encodings, chunksize=chunksize))
+        except BrokenProcessPool:
+            self._reset()
+            return [parse_page(*page) for page in pages]
+    
+    def _reset(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+    
+    def close(self):
+        """Shut down the parser processes"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
@@ -0,0 +1,51 @@
+import threading
+import time
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: tokens refill at rate per second up to capacity,
+    and acquire() blocks until one is available.
+    """
+    
+    def __init__(self, rate, capacity=None):
+        """
+        rate: tokens added per second
+        capacity: burst size (default: one second's worth, at least 1)
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def try_acquire(self, tokens=1):
+        """Take tokens if available now; returns whether it did"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+    
+    def acquire(self, tokens=1, stop_event=None):
+        """
+        Block until tokens are taken. Returns False if stop_event was set while waiting.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            
+            if stop_event is not None:
+                if stop_event.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
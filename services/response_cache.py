@@ -0,0 +1,156 @@
+from sqlalchemy import event, delete
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+import hashlib
+import json
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import get_session, engine
+from database.upsert import increment_rows
+from models.cache_entry import CacheVersion, CacheEntry
+from config import ANALYTICS_CACHE_TTL
+
+class ResponseCache:
+    """
+    TTL cache for expensive JSON responses, stored in the database so every
+    gunicorn worker shares it. Each namespace has a version counter that
+    writes to its source tables bump in their own transaction; an entry is
+    served only while its version is current and its TTL hasn't run out.
+    Expired entries are deleted whenever a new one is stored.
+    """
+    
+    def __init__(self, namespace, ttl=ANALYTICS_CACHE_TTL):
+        self.namespace = namespace
+        self.ttl = ttl
+    
+    def current_version(self, session):
+        version = session.query(CacheVersion.version).filter(CacheVersion.namespace == self.namespace).scalar()
+        return version or 0
+    
+    @staticmethod
+    def encode(data):
+        """JSON payload and its content hash (the ETag)"""
+        payload = json.dumps(data, default=str)
+        return payload, hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    
+    def get_or_compute(self, name, compute):
+        """
+        Return (payload, etag) for name, calling compute() only on a miss.
+        payload is the JSON-encoded result of compute().
+        """
+        key = f"{self.namespace}:{name}"
+        session = get_session()
+        try:
+            try:
+                # Read the version before computing so a write landing mid-compute invalidates this entry
+                version = self.current_version(session)
+                entry = session.query(CacheEntry).filter(CacheEntry.key == key).first()
+            except Exception as e:
+                # Cache tables missing (migration not run): serve uncached
+                session.rollback()
+                print(f"Response cache unavailable: {str(e)}", flush=True)
+                return self.encode(compute())
+            
+            now = datetime.utcnow()
+            if entry and entry.version == version and entry.expires_at > now:
+                return entry.payload, entry.etag
+            
+            payload, etag = self.encode(compute())
+            
+            if entry is None:
+                entry = CacheEntry(key=key)
+                session.add(entry)
+            entry.version = version
+            entry.etag = etag
+            entry.payload = payload
+            entry.created_at = now
+            entry.expires_at = now + timedelta(seconds=self.ttl)
+            session.execute(delete(CacheEntry).where(CacheEntry.expires_at <= now, CacheEntry.key != key))
+            
+            try:
+                session.commit()
+            except Exception as e:
+                # Another worker stored the same key first; the computed payload is still good
+                session.rollback()
+                print(f"Could not store cache entry {key}: {str(e)}", flush=True)
+            
+            return payload, etag
+        finally:
+            session.close()
+    
+    @staticmethod
+    def bump(namespace, connection=None):
+        """
+        Invalidate every entry in a namespace.
+        connection: bump inside that connection's transaction (under a savepoint, so a
+        failure can't abort the caller's write); by default in a transaction of its own.
+        """
+        try:
+            if connection is None:
+                with engine.begin() as own_connection:
+                    ResponseCache._increment(own_connection, namespace)
+            else:
+                with connection.begin_nested():
+                    ResponseCache._increment(connection, namespace)
+        except Exception as e:
+            # Entries still expire on their TTL
+            print(f"Could not invalidate cache {namespace}: {str(e)}", flush=True)
+    
+    @staticmethod
+    def _increment(connection, namespace):
+        increment_rows(connection, CacheVersion.__table__, ['namespace'], [{'namespace': namespace, 'version': 1}],
+                       updated_at=datetime.utcnow())
+    
+    @staticmethod
+    def invalidate_on_writes(namespace, table_names):
+        """
+        Bump namespace in the same transaction as any ORM write (per-object or bulk) to table_names,
+        once per transaction: a cached entry can't outlive the write, and a rolled-back write bumps nothing.
+        Writes made outside this process's ORM sessions are picked up when entries expire.
+        """
+        table_names = frozenset(table_names)
+        flag = f"cache_dirty:{namespace}"
+        bumped = f"cache_bumped:{namespace}"
+        
+        def touches(objects):
+            return any(getattr(obj, '__tablename__', None) in table_names for obj in objects)
+        
+        def bump_once(session):
+            if not session.info.get(bumped):
+                session.info[bumped] = True
+                ResponseCache.bump(namespace, session.connection())
+        
+        @event.listens_for(Session, 'after_flush')
+        def bump_on_flush(session, flush_context):
+            if session.info.pop(flag, False) or touches(session.new) or touches(session.dirty) or touches(session.deleted):
+                bump_once(session)
+        
+        @event.listens_for(Session, 'do_orm_execute')
+        def mark_bulk_dirty(orm_execute_state):
+            if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+                return
+            mapper = orm_execute_state.bind_mapper
+            if mapper is not None and mapper.local_table.name in table_names:
+                orm_execute_state.session.info[flag] = True
+        
+        @event.listens_for(Session, 'before_commit')
+        def bump_before_commit(session):
+            # Bulk statements don't flush; bump for them as late as possible to keep the version row locked briefly
+            if session.info.pop(flag, False):
+                bump_once(session)
+        
+        @event.listens_for(Session, 'after_commit')
+        def reset(session):
+            session.info.pop(bumped, None)
+        
+        @event.listens_for(Session, 'after_rollback')
+        def discard(session):
+            session.info.pop(flag, None)
+            session.info.pop(bumped, None)
+
+# Analytics responses depend on contacts, campaigns and outreach
+analytics_cache = ResponseCache('analytics')
+ResponseCache.invalidate_on_writes('analytics', ['contacts', 'campaigns', 'outreach'])
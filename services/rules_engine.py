@@ -0,0 +1,397 @@
+import json
+import string
+from datetime import datetime
+import threading
+import time
+import numpy as np
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Built-in rule set (version 0). Mirrors the original LeadScorer.score_lead if-chain:
+# rules are checked in order, points add up, and within a group only the first
+# matching rule fires (the elif branches). Tags may use {field} placeholders.
+DEFAULT_SCORING_RULES = {
+    'rules': [
+        {'tag': 'no-website', 'points': 30, 'when': [['website_url', 'empty']]},
+        {'tag': 'poor-website', 'points': 25, 'group': 'website_health',
+         'when': [['website_url', 'present'], ['website_health_score', 'lt', 40]]},
+        {'tag': 'needs-improvement', 'points': 15, 'group': 'website_health',
+         'when': [['website_url', 'present'], ['website_health_score', 'lt', 70]]},
+        {'tag': 'no-https', 'points': 10, 'when': [['website_url', 'present'], ['has_https', 'empty']]},
+        {'tag': 'no-mobile', 'points': 10, 'when': [['website_url', 'present'], ['has_mobile_optimization', 'empty']]},
+        {'tag': 'slow-site', 'points': 10, 'when': [['website_url', 'present'], ['page_load_speed', 'gt', 4]]},
+        {'tag': 'ai-opportunity', 'points': 20, 'group': 'ai', 'when': [['ai_opportunity_score', 'gt', 60]]},
+        {'tag': 'ai-potential', 'points': 10, 'group': 'ai', 'when': [['ai_opportunity_score', 'gt', 30]]},
+        {'tag': 'has-email', 'points': 15, 'when': [['email', 'present']]},
+        {'tag': 'no-email', 'points': 0, 'when': [['email', 'empty']]},
+        {'tag': 'source:{source}', 'when': [['source', 'present']]},
+        {'tag': 'industry:{industry}', 'when': [['industry', 'present']]},
+        {'tag': 'local-smb'},
+    ],
+    # Highest tier first; the last tier (min_score None) catches everything else
+    'tiers': [
+        ['High', 60],
+        ['Medium', 30],
+        ['Low', None],
+    ],
+}
+
+# Numeric comparisons deliberately treat NULL as 0. This is a behaviour change: the original
+# score_lead compared the raw values and raised TypeError on None.
+ROW_OPERATORS = {
+    'present': lambda value, arg: bool(value),
+    'empty': lambda value, arg: not value,
+    'eq': lambda value, arg: value == arg,
+    'ne': lambda value, arg: value != arg,
+    'in': lambda value, arg: value in arg,
+    'lt': lambda value, arg: (value or 0) < arg,
+    'lte': lambda value, arg: (value or 0) <= arg,
+    'gt': lambda value, arg: (value or 0) > arg,
+    'gte': lambda value, arg: (value or 0) >= arg,
+}
+
+VECTOR_OPERATORS = {
+    'present': lambda column, arg: column.present,
+    'empty': lambda column, arg: ~column.present,
+    'eq': lambda column, arg: column.objects == arg,
+    'ne': lambda column, arg: column.objects != arg,
+    'in': lambda column, arg: np.fromiter((value in arg for value in column.objects), dtype=bool, count=len(column.objects)),
+    'lt': lambda column, arg: column.numeric < arg,
+    'lte': lambda column, arg: column.numeric <= arg,
+    'gt': lambda column, arg: column.numeric > arg,
+    'gte': lambda column, arg: column.numeric >= arg,
+}
+
+NO_ARGUMENT_OPERATORS = ('present', 'empty')
+
+# Bits available in the int64 tag mask used by the vectorized plan
+MAX_RULES = 62
+
+class RuleSetError(ValueError):
+    """A rule set definition that cannot be compiled"""
+    pass
+
+class _Column:
+    """Lazily converted views of one column for the vectorized plan"""
+    
+    def __init__(self, values):
+        self.values = values
+        self._objects = None
+        self._present = None
+        self._numeric = None
+    
+    @property
+    def objects(self):
+        if self._objects is None:
+            self._objects = np.array(self.values, dtype=object)
+        return self._objects
+    
+    @property
+    def present(self):
+        if self._present is None:
+            self._present = self.objects.astype(bool)
+        return self._present
+    
+    @property
+    def numeric(self):
+        if self._numeric is None:
+            self._numeric = np.nan_to_num(np.array(self.values, dtype=np.float64))
+        return self._numeric
+
+class _CompiledRule:
+    def __init__(self, index, definition):
+        self.index = index
+        self.tag = definition.get('tag')
+        self.points = definition.get('points', 0)
+        self.group = definition.get('group')
+        self.conditions = []
+        
+        if not isinstance(self.points, (int, float)):
+            raise RuleSetError(f"Rule {index}: points must be a number")
+        
+        for condition in definition.get('when', []):
+            if not isinstance(condition, (list, tuple)) or len(condition) not in (2, 3):
+                raise RuleSetError(f"Rule {index}: conditions are [field, op] or [field, op, value]")
+            
+            field, op = condition[0], condition[1]
+            if op not in ROW_OPERATORS:
+                raise RuleSetError(f"Rule {index}: unknown operator '{op}'")
+            if op not in NO_ARGUMENT_OPERATORS and len(condition) != 3:
+                raise RuleSetError(f"Rule {index}: operator '{op}' needs a value")
+            
+            arg = condition[2] if len(condition) == 3 else None
+            if op == 'in':
+                arg = frozenset(arg)
+            self.conditions.append((field, op, arg))
+        
+        # Placeholder fields in the tag, e.g. 'source:{source}'
+        self.tag_fields = []
+        if self.tag:
+            self.tag_fields = [name for _, name, _, _ in string.Formatter().parse(self.tag) if name]
+        
+        self.match = self._compile_row_matcher()
+    
+    def _compile_row_matcher(self):
+        checks = [(field, ROW_OPERATORS[op], arg) for field, op, arg in self.conditions]
+        
+        if not checks:
+            return lambda contact: True
+        
+        if len(checks) == 1:
+            field, check, arg = checks[0]
+            return lambda contact: check(contact.get(field), arg)
+        
+        def match(contact):
+            for field, check, arg in checks:
+                if not check(contact.get(field), arg):
+                    return False
+            return True
+        return match
+    
+    def match_columns(self, columns, size):
+        mask = np.ones(size, dtype=bool)
+        for field, op, arg in self.conditions:
+            mask &= VECTOR_OPERATORS[op](columns[field], arg)
+        return mask
+    
+    def render_tag(self, values):
+        if not self.tag_fields:
+            return self.tag
+        return self.tag.format(**values)
+
+class CompiledRuleSet:
+    """
+    A scoring rule set compiled once into a row evaluator (closures) and a
+    vectorized plan (NumPy masks). Both produce identical (tier, tags).
+    """
+    
+    def __init__(self, definition, version=0):
+        if not isinstance(definition, dict) or not isinstance(definition.get('rules'), list):
+            raise RuleSetError("Rule set needs a 'rules' list")
+        
+        rules = definition['rules']
+        if len(rules) > MAX_RULES:
+            raise RuleSetError(f"At most {MAX_RULES} rules are supported")
+        
+        tiers = definition.get('tiers') or DEFAULT_SCORING_RULES['tiers']
+        if tiers[-1][1] is not None:
+            raise RuleSetError("The last tier must have min_score null")
+        
+        self.version = version
+        self.definition = definition
+        self.rules = [_CompiledRule(index, rule) for index, rule in enumerate(rules)]
+        self.tiers = [(name, min_score) for name, min_score in tiers]
+        
+        fields = []
+        for rule in self.rules:
+            for field in [condition[0] for condition in rule.conditions] + rule.tag_fields:
+                if field not in fields:
+                    fields.append(field)
+        self.fields = fields
+    
+    def tier_for(self, score):
+        for name, min_score in self.tiers:
+            if min_score is None or score >= min_score:
+                return name
+    
+    def evaluate(self, contact):
+        """Score one contact dict, returning (tier, tags) like LeadScorer.score_lead"""
+        score = 0
+        tags = []
+        fired_groups = set()
+        
+        for rule in self.rules:
+            if rule.group and rule.group in fired_groups:
+                continue
+            if not rule.match(contact):
+                continue
+            
+            score += rule.points
+            if rule.tag:
+                tags.append(rule.render_tag({field: contact.get(field) for field in rule.tag_fields}))
+            if rule.group:
+                fired_groups.add(rule.group)
+        
+        return self.tier_for(score), tags
+    
+    def evaluate_columns(self, columns, size):
+        """
+        Score many contacts at once. columns maps each field in self.fields to a
+        sequence of values. Returns (tiers, tags_json) as object arrays.
+        """
+        views = {field: _Column(columns[field]) for field in self.fields}
+        
+        scores = np.zeros(size, dtype=np.float64)
+        tag_bits = np.zeros(size, dtype=np.int64)
+        group_taken = {}
+        
+        for rule in self.rules:
+            mask = rule.match_columns(views, size)
+            if rule.group:
+                taken = group_taken.setdefault(rule.group, np.zeros(size, dtype=bool))
+                mask &= ~taken
+                taken |= mask
+            if rule.points:
+                scores += mask * rule.points
+            if rule.tag:
+                tag_bits |= mask.astype(np.int64) << rule.index
+        
+        conditions = []
+        choices = []
+        for name, min_score in self.tiers[:-1]:
+            conditions.append(scores >= min_score)
+            choices.append(name)
+        tiers = np.select(conditions, choices, default=self.tiers[-1][0]).astype(object)
+        
+        return tiers, self._tags_json_columns(tag_bits, views, size)
+    
+    def _tags_json_columns(self, tag_bits, views, size):
+        # Rows share few distinct (tag bits, placeholder values) combinations,
+        # so each JSON tag list is built once and broadcast
+        template_fields = []
+        for rule in self.rules:
+            for field in rule.tag_fields:
+                if field not in template_fields:
+                    template_fields.append(field)
+        
+        combo_bits, codes = np.unique(tag_bits, return_inverse=True)
+        codes = codes.reshape(-1)
+        field_distinct = []
+        field_codes = []
+        for field in template_fields:
+            values = views[field].values
+            distinct = list(dict.fromkeys(values))
+            lookup = {value: code for code, value in enumerate(distinct)}
+            field_distinct.append(distinct)
+            field_codes.append(np.fromiter(map(lookup.__getitem__, values), dtype=np.int64, count=size))
+        
+        key = codes
+        for distinct, value_codes in zip(field_distinct, field_codes):
+            key = key * len(distinct) + value_codes
+            _, key = np.unique(key, return_inverse=True)
+            key = key.reshape(-1)
+        
+        combos, first_rows, inverse = np.unique(key, return_index=True, return_inverse=True)
+        
+        combo_tags = np.empty(len(combos), dtype=object)
+        for index, row in enumerate(first_rows.tolist()):
+            bits = int(combo_bits[codes[row]])
+            values = {field: views[field].values[row] for field in template_fields}
+            tags = [rule.render_tag(values) for rule in self.rules if rule.tag and bits & (1 << rule.index)]
+            combo_tags[index] = json.dumps(tags)
+        
+        return combo_tags[inverse.reshape(-1)]
+
+DEFAULT_RULE_SET = CompiledRuleSet(DEFAULT_SCORING_RULES, version=0)
+
+class RulesEngine:
+    """
+    Loads versioned rule sets from the scoring_rule_sets table.
+    The active set is compiled once per version and re-checked at most every CACHE_TTL seconds.
+    """
+    
+    CACHE_TTL = 30
+    
+    _compiled = {0: DEFAULT_RULE_SET}
+    _active_version = None
+    _checked_at = 0
+    _lock = threading.Lock()
+    
+    @classmethod
+    def active(cls):
+        """Currently active compiled rule set (built-in defaults when none is stored)"""
+        from database.connection import get_session
+        from models.scoring_rule_set import ScoringRuleSet
+        
+        with cls._lock:
+            if cls._active_version is not None and time.time() - cls._checked_at < cls.CACHE_TTL:
+                return cls._compiled[cls._active_version]
+        
+        session = get_session()
+        try:
+            row = session.query(ScoringRuleSet).filter(ScoringRuleSet.is_active == 1).order_by(
+                ScoringRuleSet.id.desc()
+            ).first()
+            
+            with cls._lock:
+                if row is None:
+                    version = 0
+                else:
+                    version = row.id
+                    if version not in cls._compiled:
+                        cls._compiled[version] = CompiledRuleSet(json.loads(row.rules), version=version)
+                cls._active_version = version
+                cls._checked_at = time.time()
+                return cls._compiled[version]
+        except Exception as e:
+            print(f"Error loading scoring rules, using defaults: {str(e)}", flush=True)
+            return DEFAULT_RULE_SET
+        finally:
+            session.close()
+    
+    @classmethod
+    def invalidate(cls):
+        with cls._lock:
+            cls._active_version = None
+    
+    @classmethod
+    def create_version(cls, definition, name=None, activate=False):
+        """Validate (by compiling) and store a new rule set version"""
+        from database.connection import get_session
+        from models.scoring_rule_set import ScoringRuleSet
+        from models.contact import Contact
+        
+        try:
+            compiled = CompiledRuleSet(definition)
+        except (RuleSetError, KeyError, TypeError, ValueError, IndexError) as e:
+            return {'success': False, 'error': f"Invalid rule set: {str(e)}"}
+        
+        unknown = [field for field in compiled.fields if field not in Contact.__table__.columns]
+        if unknown:
+            return {'success': False, 'error': f"Invalid rule set: unknown contact fields {unknown}"}
+        
+        session = get_session()
+        try:
+            rule_set = ScoringRuleSet(name=name, rules=json.dumps(definition))
+            session.add(rule_set)
+            session.commit()
+            version = rule_set.id
+        except Exception as e:
+            session.rollback()
+            return {'success': False, 'error': str(e)}
+        finally:
+            session.close()
+        
+        if activate:
+            return cls.activate(version)
+        return {'success': True, 'version': version}
+    
+    @classmethod
+    def activate(cls, version):
+        """Make a stored version the active rule set (0 reverts to the built-in defaults)"""
+        from database.connection import get_session
+        from models.scoring_rule_set import ScoringRuleSet
+        
+        session = get_session()
+        try:
+            if version:
+                rule_set = session.query(ScoringRuleSet).filter(ScoringRuleSet.id == version).first()
+                if not rule_set:
+                    return {'success': False, 'error': 'Rule set not found'}
+            
+            session.query(ScoringRuleSet).filter(ScoringRuleSet.is_active == 1).update({'is_active': 0})
+            if version:
+                rule_set.is_active = 1
+                rule_set.activated_at = datetime.utcnow()
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            return {'success': False, 'error': str(e)}
+        finally:
+            session.close()
+        
+        cls.invalidate()
+        return {'success': True, 'version': version}
+
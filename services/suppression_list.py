@@ -0,0 +1,168 @@
+from sqlalchemy import select, exists, func
+from datetime import datetime
+import hashlib
+import math
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import get_session, engine
+from database.upsert import insert_missing
+from models.contact import Contact
+from models.suppression import Suppression
+from config import SUPPRESSION_FILTER_CAPACITY, SUPPRESSION_FILTER_ERROR_RATE, SUPPRESSION_REBUILD_INTERVAL
+
+def normalize(value):
+    """Lowercased address or domain ('@example.com' and 'example.com' are the same domain)"""
+    value = (value or '').strip().lower()
+    return value[1:] if value.startswith('@') else value
+
+def email_keys(email):
+    """Suppression values that block an email: the address and its domain"""
+    address = normalize(email)
+    return (address, address.rsplit('@', 1)[-1]) if '@' in address else (address,)
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings; k bit positions per value from one blake2b digest"""
+    
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(capacity, 1)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + index * second) % self.size for index in range(self.hashes)]
+    
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+class SuppressionList:
+    """
+    Answers "is this address suppressed?" without a query per recipient.
+    Every suppressed value is kept in a process-local Bloom filter; a check
+    first folds in rows added since the last one (an id range scan), then
+    confirms only the filter's hits against the suppressions table with a
+    single IN query. Rows deleted from the table, or added while their ids
+    were out of order, are picked up by a full rebuild every
+    SUPPRESSION_REBUILD_INTERVAL seconds; until then a deleted value only
+    costs a database check.
+    """
+    
+    def __init__(self, capacity=SUPPRESSION_FILTER_CAPACITY, error_rate=SUPPRESSION_FILTER_ERROR_RATE,
+                 rebuild_interval=SUPPRESSION_REBUILD_INTERVAL):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.rebuild_interval = rebuild_interval
+        
+        self._lock = threading.Lock()
+        self._filter = None
+        self._last_id = 0
+        self._built_at = 0
+    
+    def rebuild(self, session):
+        """Load every suppressed value into a new filter, sized with room to grow"""
+        with self._lock:
+            total = session.query(func.count(Suppression.id)).scalar() or 0
+            bloom = BloomFilter(max(self.capacity, total * 2), self.error_rate)
+            last_id = 0
+            for suppression_id, value in session.execute(select(Suppression.id, Suppression.value)).yield_per(10000):
+                bloom.add(value)
+                last_id = max(last_id, suppression_id)
+            self._filter = bloom
+            self._last_id = last_id
+            self._built_at = time.time()
+    
+    def refresh(self, session):
+        """Fold in suppressions added since the last check (or rebuild when due or full)"""
+        if self._filter is None or time.time() - self._built_at > self.rebuild_interval:
+            self.rebuild(session)
+            return
+        
+        rows = session.execute(
+            select(Suppression.id, Suppression.value).where(Suppression.id > self._last_id).order_by(Suppression.id)
+        ).all()
+        if not rows:
+            return
+        if self._filter.count + len(rows) > self._filter.capacity:
+            self.rebuild(session)
+            return
+        with self._lock:
+            for suppression_id, value in rows:
+                self._filter.add(value)
+                self._last_id = max(self._last_id, suppression_id)
+    
+    def suppressed(self, session, emails):
+        """The emails (as given) whose address or domain is suppressed"""
+        emails = [email for email in emails if email]
+        if not emails:
+            return set()
+        
+        self.refresh(session)
+        bloom = self._filter
+        candidates = [email for email in emails if any(key in bloom for key in email_keys(email))]
+        if not candidates:
+            return set()
+        
+        keys = {key for email in candidates for key in email_keys(email)}
+        confirmed = set(session.scalars(select(Suppression.value).where(Suppression.value.in_(keys))))
+        return {email for email in candidates if any(key in confirmed for key in email_keys(email))}
+    
+    def is_suppressed(self, email):
+        session = get_session()
+        try:
+            return bool(self.suppressed(session, [email]))
+        finally:
+            session.close()
+    
+    def add(self, session, values, reason='manual', source=None):
+        """
+        Suppress addresses and domains (in the caller's transaction); values already suppressed are left as they are.
+        Returns the number added.
+        """
+        now = datetime.utcnow()
+        rows = {}
+        for value in values:
+            value = normalize(value)
+            if value:
+                rows[value] = {
+                    'value': value,
+                    'kind': 'address' if '@' in value else 'domain',
+                    'reason': reason,
+                    'source': source,
+                    'created_at': now
+                }
+        if not rows:
+            return 0
+        
+        added = insert_missing(session.connection(), Suppression.__table__, ['value'], list(rows.values()))
+        # Visible to this process's checks right away (a rolled-back add only costs a database check)
+        if self._filter is not None:
+            with self._lock:
+                for value in rows:
+                    self._filter.add(value)
+        return added
+
+def not_suppressed():
+    """SQL condition: the contact's email address and domain aren't suppressed (for set-based recipient selection)"""
+    email = func.lower(func.trim(Contact.email))
+    if engine.dialect.name == 'postgresql':
+        domain = func.split_part(email, '@', 2)
+    else:
+        domain = func.substr(email, func.instr(email, '@') + 1)
+    return ~exists().where(Suppression.value.in_([email, domain]))
+
+# Shared by every request in the process
+suppression_list = SuppressionList()
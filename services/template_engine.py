@@ -0,0 +1,149 @@
+from functools import lru_cache
+import re
+
+class TemplateError(ValueError):
+    """A template uses syntax or a filter the engine doesn't know"""
+    pass
+
+# Template field -> contact field (names are matched case-insensitively)
+FIELD_ALIASES = {
+    'business': 'name',
+    'website': 'website_url',
+    'zip': 'zip_code',
+}
+
+# Shown when a field is missing or empty and the placeholder gives no default
+FIELD_DEFAULTS = {
+    'business': 'your business',
+    'name': 'there',
+    'company': 'your company',
+    'industry': 'your industry',
+}
+
+def _truncate(value, length=50):
+    return value if len(value) <= length else value[:length].rstrip() + '...'
+
+def _length(argument):
+    if not re.fullmatch(r'[0-9]+', argument):
+        raise TemplateError(f"truncate takes a whole number of characters, not '{argument}'")
+    return int(argument)
+
+# Filters applied left to right after the field is resolved; extra arguments come after ':'
+FILTERS = {
+    'upper': str.upper,
+    'lower': str.lower,
+    'title': str.title,
+    'capitalize': str.capitalize,
+    'trim': str.strip,
+    'first_word': lambda value: value.split()[0] if value.split() else value,
+    'truncate': _truncate,
+}
+
+# Filters that take an argument -> its converter, run when the template is parsed
+FILTER_ARGUMENTS = {
+    'truncate': _length,
+}
+
+PLACEHOLDER = re.compile(r'\{\{(.*?)\}\}', re.S)
+FIELD_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+FILTER_SPEC = re.compile(r'''^\s*([A-Za-z_]+)\s*(?::\s*(?:"([^"]*)"|'([^']*)'|([^|]*?)))?\s*$''')
+
+def _split_pipes(expression):
+    """Split on | outside quotes"""
+    parts, current, quote = [], [], None
+    for char in expression:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '|':
+            parts.append(''.join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append(''.join(current))
+    return parts
+
+class Template:
+    """
+    A template parsed once into literal text and field slots.
+    Placeholders look like {{ Company }}, {{ name | default: "friend" }} or
+    {{ industry | lower }}. Field names are case-insensitive; a missing or empty
+    value falls back to the placeholder's default, then FIELD_DEFAULTS, then ''.
+    render() fills the slots for one record and joins the parts once.
+    """
+    
+    def __init__(self, source):
+        self.source = source or ''
+        self._parts = []
+        self._slots = []
+        
+        position = 0
+        for match in PLACEHOLDER.finditer(self.source):
+            if match.start() > position:
+                self._parts.append(self.source[position:match.start()])
+            self._slots.append((len(self._parts),) + self._parse(match.group(1)))
+            self._parts.append('')
+            position = match.end()
+        if position < len(self.source):
+            self._parts.append(self.source[position:])
+    
+    @staticmethod
+    def _parse(expression):
+        pieces = _split_pipes(expression)
+        name = pieces[0].strip().lower()
+        if not FIELD_NAME.match(name):
+            raise TemplateError(f"Invalid placeholder '{{{{{expression}}}}}'")
+        
+        default = FIELD_DEFAULTS.get(name, '')
+        filters = []
+        for spec in pieces[1:]:
+            match = FILTER_SPEC.match(spec)
+            if not match:
+                raise TemplateError(f"Invalid filter '{spec.strip()}' in '{{{{{expression}}}}}'")
+            filter_name = match.group(1).lower()
+            argument = next((group for group in match.groups()[1:] if group is not None), None)
+            if filter_name == 'default':
+                default = argument or ''
+            elif filter_name in FILTERS:
+                argument = argument.strip() if argument else None
+                if argument is not None:
+                    if filter_name not in FILTER_ARGUMENTS:
+                        raise TemplateError(f"Filter '{filter_name}' takes no argument")
+                    argument = FILTER_ARGUMENTS[filter_name](argument)
+                filters.append((FILTERS[filter_name], argument))
+            else:
+                raise TemplateError(f"Unknown filter '{filter_name}'")
+        
+        return FIELD_ALIASES.get(name, name), default, tuple(filters)
+    
+    @property
+    def fields(self):
+        """Record keys this template reads"""
+        return {field for _, field, _, _ in self._slots}
+    
+    def render(self, record):
+        """Render for one record (a dict of contact fields)"""
+        if not self._slots:
+            return self.source
+        parts = self._parts[:]
+        get = record.get
+        for index, field, default, filters in self._slots:
+            value = get(field)
+            if value is None or value == '':
+                value = default
+            elif type(value) is not str:
+                value = str(value)
+            for function, argument in filters:
+                value = function(value) if argument is None else function(value, argument)
+            parts[index] = value
+        return ''.join(parts)
+
+@lru_cache(maxsize=512)
+def compile_template(source):
+    """Parsed Template for source, cached so each template is parsed once per process"""
+    return Template(source)
+
+def render(source, record):
+    return compile_template(source).render(record)
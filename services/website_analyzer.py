@@ -1,5 +1,9 @@
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin, urlparse
+import threading
 import time
 import re
 import sys
@@ -7,25 +11,139 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from services.fetch_scheduler import RobotsDisallowed, CrawlBudgetExceeded
+from services.email_validator import EmailValidator
+
 class WebsiteAnalyzer:
-    def __init__(self):
+    
+    # Content types we are willing to download and parse
+    HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+    
+    CHUNK_SIZE = 16 * 1024
+    
+    # Fallback paths probed when the homepage exposes no contact/about links
+    CONTACT_PATHS = ['/contact', '/contact-us', '/about', '/about-us']
+    CONTACT_LINK_KEYWORDS = ('contact', 'about')
+    MAX_CONTACT_LINKS = 6
+    
+    def __init__(self, stream=True, max_bytes=1024 * 1024, body_bytes=256 * 1024, pool_size=10, parsing_stage=None, scheduler=None):
+        """
+        stream: download pages incrementally instead of reading the whole response
+        max_bytes: hard cap on bytes read per page in streaming mode
+        body_bytes: bytes of body to read after </head> before stopping early
+        pool_size: connections kept per host and threads used for contact probes
+        parsing_stage: optional ParsingStage to parse HTML out of process
+        scheduler: optional FetchScheduler enforcing per-host politeness, robots.txt and crawl budget
+        """
         self.timeout = 10
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.body_bytes = body_bytes
+        self.pool_size = pool_size
+        self.parsing_stage = parsing_stage
+        self.scheduler = scheduler
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (compatible; EverlyStudio/1.0; +https://everlystudio.com)'
         }
+        
+        # Shared keep-alive session so probes to the same site reuse connections
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
     
-    def analyze_website(self, url):
+    def fetch_page(self, url, timeout=None, cancel_event=None):
         """
-        Analyze a website and return health metrics + AI opportunities
+        Fetch a page and return (response, content, truncated).
+        In streaming mode non-HTML responses come back with empty content, and
+        the download stops at max_bytes, once the head plus body_bytes of body
+        have arrived, or when cancel_event is set.
         """
-        if not url:
-            return None
+        if self.scheduler is None:
+            return self._fetch_page(url, timeout, cancel_event)
         
-        # Ensure URL has protocol
-        if not url.startswith('http'):
-            url = f'https://{url}'
+        with self.scheduler.slot(url, cancel_event) as host_key:
+            response, content, truncated = self._fetch_page(url, timeout, cancel_event)
+            self.scheduler.record_response(host_key, response.status_code, response.headers.get('Retry-After'))
+            return response, content, truncated
+    
+    def _fetch_page(self, url, timeout=None, cancel_event=None):
+        timeout = timeout or self.timeout
+        
+        if not self.stream:
+            response = self.session.get(url, timeout=timeout, allow_redirects=True)
+            return response, response.content, False
+        
+        response = self.session.get(url, timeout=timeout, allow_redirects=True, stream=True)
+        try:
+            if not self._is_html(response.headers.get('Content-Type')):
+                return response, b'', False
+            
+            buffer = bytearray()
+            head_end = -1
+            truncated = False
+            
+            for chunk in response.iter_content(chunk_size=self.CHUNK_SIZE):
+                if not chunk:
+                    continue
+                
+                if cancel_event is not None and cancel_event.is_set():
+                    truncated = True
+                    break
+                
+                head_end, truncated = self._consume_chunk(buffer, chunk, head_end)
+                if truncated:
+                    break
+            
+            return response, bytes(buffer), truncated
+        finally:
+            response.close()
+    
+    def _consume_chunk(self, buffer, chunk, head_end):
+        """
+        Append a downloaded chunk to buffer.
+        Returns (head_end, done) where done means the byte budget is spent.
+        """
+        # Only rescan the tail that could contain a split '</head'
+        scan_from = max(0, len(buffer) - 6)
+        buffer.extend(chunk)
+        
+        if head_end < 0:
+            # Tag names are case-insensitive ('</Head>' is valid HTML)
+            pos = buffer[scan_from:].lower().find(b'</head')
+            if pos >= 0:
+                head_end = scan_from + pos
         
-        result = {
+        if len(buffer) >= self.max_bytes:
+            del buffer[self.max_bytes:]
+            return head_end, True
+        
+        if head_end >= 0 and len(buffer) - head_end >= self.body_bytes:
+            return head_end, True
+        
+        return head_end, False
+    
+    @classmethod
+    def _is_html(cls, content_type):
+        """Check a Content-Type header (missing header is treated as HTML)"""
+        content_type = (content_type or '').lower()
+        if not content_type:
+            return True
+        return any(html_type in content_type for html_type in cls.HTML_CONTENT_TYPES)
+    
+    @staticmethod
+    def _decode(content, encoding=None):
+        """Decode fetched bytes using the response charset"""
+        try:
+            return content.decode(encoding or 'utf-8', errors='replace')
+        except LookupError:
+            return content.decode('utf-8', errors='replace')
+    
+    @staticmethod
+    def new_result(url):
+        """Empty analysis result for a URL"""
+        return {
             'url': url,
             'health_score': 0,
             'has_https': False,
@@ -35,56 +153,94 @@ class WebsiteAnalyzer:
             'has_appointments': False,
             'has_faq': False,
             'ai_opportunity_score': 0,
-            'emails_found': []
+            'emails_found': [],
+            'content_type': None,
+            'bytes_read': 0,
+            'truncated': False,
+            'skipped': False,
+            'skip_reason': None,
+            'contact_links': []
         }
+    
+    @classmethod
+    def score_result(cls, result, load_time):
+        """Fill in health and AI opportunity scores once the page signals are known"""
+        result['health_score'] = cls._calculate_health_score(result, load_time)
+        result['ai_opportunity_score'] = cls._calculate_ai_score(result)
+        return result
+    
+    def analyze_website(self, url, parsing_stage=None):
+        """
+        Analyze a website and return health metrics + AI opportunities
+        parsing_stage: overrides self.parsing_stage for this call
+        """
+        parsing_stage = parsing_stage or self.parsing_stage
+        
+        if not url:
+            return None
+        
+        # Ensure URL has protocol
+        if not url.startswith('http'):
+            url = f'https://{url}'
+        
+        result = self.new_result(url)
         
         try:
             # Time the request
             start_time = time.time()
-            response = requests.get(url, headers=self.headers, timeout=self.timeout, allow_redirects=True)
+            response, content, truncated = self.fetch_page(url)
             load_time = time.time() - start_time
             
             result['page_load_speed'] = round(load_time, 2)
+            result['content_type'] = response.headers.get('Content-Type')
+            result['bytes_read'] = len(content)
+            result['truncated'] = truncated
             
             # Check HTTPS
             result['has_https'] = response.url.startswith('https://')
             
-            # Parse HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Check mobile optimization
-            viewport = soup.find('meta', attrs={'name': 'viewport'})
-            result['has_mobile_optimization'] = viewport is not None
-            
-            # Check for forms
-            forms = soup.find_all('form')
-            result['has_forms'] = len(forms) > 0
+            # Skip PDFs, images, downloads etc.
+            if self.stream and not self._is_html(result['content_type']):
+                result['skipped'] = True
+                result['skip_reason'] = 'non_html'
+                result['health_score'] = self._calculate_health_score(result, load_time)
+                return result
             
-            # Check for appointment/booking keywords
-            text_content = soup.get_text().lower()
-            appointment_keywords = ['appointment', 'schedule', 'book', 'booking', 'calendar']
-            result['has_appointments'] = any(keyword in text_content for keyword in appointment_keywords)
+            if parsing_stage:
+                result.update(parsing_stage.parse(content, response.url, response.encoding))
+            else:
+                result.update(parse_page(content, response.url, response.encoding))
             
-            # Check for FAQ
-            faq_keywords = ['faq', 'frequently asked', 'questions']
-            result['has_faq'] = any(keyword in text_content for keyword in faq_keywords)
-            
-            # Find emails
-            result['emails_found'] = self._extract_emails(soup, response.text)
-            
-            # Calculate health score
-            result['health_score'] = self._calculate_health_score(result, load_time)
-            
-            # Calculate AI opportunity score
-            result['ai_opportunity_score'] = self._calculate_ai_score(result)
+            return self.score_result(result, load_time)
             
+        except (RobotsDisallowed, CrawlBudgetExceeded) as e:
+            result['skipped'] = True
+            result['skip_reason'] = 'robots' if isinstance(e, RobotsDisallowed) else 'crawl_budget'
             return result
             
         except Exception as e:
             print(f"Error analyzing {url}: {str(e)}")
             return result
     
-    def _extract_emails(self, soup, html_text):
+    def analyze_many(self, urls, workers=None):
+        """
+        Analyze a list of websites, returning results in the same order (None for empty URLs).
+        Fetches run on a thread pool; parsing goes to a ParsingStage so it
+        scales across cores instead of serializing on the GIL.
+        """
+        from services.parsing_stage import ParsingStage
+        
+        if not urls:
+            return []
+        
+        parsing_stage = self.parsing_stage or ParsingStage.shared()
+        workers = workers or max(self.pool_size, parsing_stage.workers * 2)
+        
+        with ThreadPoolExecutor(max_workers=min(workers, len(urls))) as executor:
+            return list(executor.map(lambda url: self.analyze_website(url, parsing_stage), urls))
+    
+    @staticmethod
+    def _extract_emails(soup, html_text):
         """Extract email addresses from page"""
         emails = set()
         
@@ -92,28 +248,25 @@ class WebsiteAnalyzer:
         mailto_links = soup.find_all('a', href=re.compile(r'^mailto:', re.I))
         for link in mailto_links:
             email = link['href'].replace('mailto:', '').split('?')[0]
-            if self._is_valid_email(email):
+            if WebsiteAnalyzer._is_valid_email(email):
                 emails.add(email.lower())
         
         # Find emails in text with regex
         email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
         found_emails = re.findall(email_pattern, html_text)
         for email in found_emails:
-            if self._is_valid_email(email):
+            if WebsiteAnalyzer._is_valid_email(email):
                 emails.add(email.lower())
         
         return list(emails)[:3]  # Return max 3 emails
     
-    def _is_valid_email(self, email):
-        """Basic email validation"""
-        if not email or '@' not in email:
-            return False
-        
-        # Filter out common false positives
-        bad_patterns = ['.png', '.jpg', '.jpeg', '.gif', '.css', '.js']
-        return not any(pattern in email.lower() for pattern in bad_patterns)
+    @staticmethod
+    def _is_valid_email(email):
+        """Email validation shared with LeadDiscoveryService"""
+        return EmailValidator.is_valid(email)
     
-    def _calculate_health_score(self, result, load_time):
+    @staticmethod
+    def _calculate_health_score(result, load_time):
         """Calculate website health score (0-100)"""
         score = 0
         
@@ -143,7 +296,8 @@ class WebsiteAnalyzer:
         
         return min(score, 100)
     
-    def _calculate_ai_score(self, result):
+    @staticmethod
+    def _calculate_ai_score(result):
         """Calculate AI opportunity score (0-100)"""
         score = 0
         
@@ -161,21 +315,115 @@ class WebsiteAnalyzer:
         
         return min(score, 100)
     
-    def check_contact_page(self, base_url):
-        """Try to find and scrape contact page for additional emails"""
-        contact_paths = ['/contact', '/contact-us', '/about', '/about-us']
+    @classmethod
+    def find_contact_links(cls, soup, page_url):
+        """Mine same-site contact/about links from a parsed page, contact pages first"""
+        host = urlparse(page_url).netloc.lower()
+        contact_links = []
+        about_links = []
         
-        for path in contact_paths:
-            try:
-                url = base_url.rstrip('/') + path
-                response = requests.get(url, headers=self.headers, timeout=5)
-                
-                if response.status_code == 200:
-                    emails = self._extract_emails(BeautifulSoup(response.content, 'html.parser'), response.text)
-                    if emails:
-                        return emails
-                        
-            except:
+        for link in soup.find_all('a', href=True):
+            href = link['href'].strip()
+            if not href or href.startswith(('mailto:', 'tel:', 'javascript:', '#')):
+                continue
+            
+            label = f"{href} {link.get_text(' ', strip=True)}".lower()
+            if not any(keyword in label for keyword in cls.CONTACT_LINK_KEYWORDS):
+                continue
+            
+            url = urljoin(page_url, href).split('#')[0]
+            if urlparse(url).netloc.lower() != host:
                 continue
+            
+            target = contact_links if 'contact' in label else about_links
+            if url not in contact_links and url not in about_links:
+                target.append(url)
+        
+        return (contact_links + about_links)[:cls.MAX_CONTACT_LINKS]
+    
+    def check_contact_page(self, base_url, contact_links=None, email_filter=None, parallel=True):
+        """
+        Try to find and scrape contact page for additional emails.
+        contact_links: links mined from the homepage, probed before the fallback paths
+        email_filter: optional callable; only emails passing it count as found
+        parallel: probe all candidates concurrently and cancel the rest on the first hit
+        """
+        if base_url and not base_url.startswith('http'):
+            base_url = f'https://{base_url}'
+        
+        candidates = []
+        for url in list(contact_links or []) + [base_url.rstrip('/') + path for path in self.CONTACT_PATHS]:
+            if url not in candidates:
+                candidates.append(url)
         
-        return []
+        if not parallel:
+            for url in candidates:
+                emails = self._probe_contact_page(url, email_filter)
+                if emails:
+                    return emails
+            return []
+        
+        cancel_event = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=min(self.pool_size, len(candidates)))
+        try:
+            futures = [
+                executor.submit(self._probe_contact_page, url, email_filter, cancel_event)
+                for url in candidates
+            ]
+            
+            for future in as_completed(futures):
+                emails = future.result()
+                if emails:
+                    # Stop in-flight downloads and drop probes not yet started
+                    cancel_event.set()
+                    for pending in futures:
+                        pending.cancel()
+                    return emails
+            
+            return []
+        finally:
+            cancel_event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _probe_contact_page(self, url, email_filter=None, cancel_event=None):
+        """Fetch one candidate page and return the valid emails on it"""
+        if cancel_event is not None and cancel_event.is_set():
+            return []
+        
+        try:
+            response, content, _ = self.fetch_page(url, timeout=5, cancel_event=cancel_event)
+            
+            if response.status_code != 200 or not content:
+                return []
+            
+            emails = self._extract_emails(BeautifulSoup(content, 'html.parser'), self._decode(content, response.encoding))
+            if email_filter:
+                emails = [email for email in emails if email_filter(email)]
+            return emails
+            
+        except Exception:
+            return []
+
+
+def parse_page(content, page_url, encoding=None):
+    """
+    Parse raw HTML bytes into page signals.
+    Kept at module level so it can be shipped to a process pool.
+    """
+    soup = BeautifulSoup(content, 'html.parser')
+    text_content = soup.get_text().lower()
+    
+    # Check for appointment/booking keywords
+    appointment_keywords = ['appointment', 'schedule', 'book', 'booking', 'calendar']
+    
+    # Check for FAQ
+    faq_keywords = ['faq', 'frequently asked', 'questions']
+    
+    return {
+        'has_mobile_optimization': soup.find('meta', attrs={'name': 'viewport'}) is not None,
+        'has_forms': soup.find('form') is not None,
+        'has_appointments': any(keyword in text_content for keyword in appointment_keywords),
+        'has_faq': any(keyword in text_content for keyword in faq_keywords),
+        'emails_found': WebsiteAnalyzer._extract_emails(soup, WebsiteAnalyzer._decode(content, encoding)),
+        'contact_links': WebsiteAnalyzer.find_contact_links(soup, page_url)
+    }